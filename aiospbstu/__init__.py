@@ -1,9 +1,37 @@
-from . import types
-from . import utils
-from .api import PolyScheduleAPI
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from . import types
+    from . import utils
+    from .api import PolyScheduleAPI
 
 __all__ = [
     'types',
     'utils',
     'PolyScheduleAPI',
 ]
+
+# Submodules are imported on first access, so `import aiospbstu` doesn't pay for pydantic and aiohttp
+_LAZY_ATTRIBUTES = {
+    'types': ('.types', None),
+    'utils': ('.utils', None),
+    'PolyScheduleAPI': ('.api', 'PolyScheduleAPI'),
+}
+
+
+def __getattr__(name: str):
+    try:
+        module_name, attribute = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}') from None
+
+    value = importlib.import_module(module_name, __name__)
+    if attribute is not None:
+        value = getattr(value, attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,26 @@
+import argparse
+import logging
+
+from .base import DEFAULT_CACHE_TTL
+from .cache import MemoryCache, SharedCache
+from .server import run_server
+
+parser = argparse.ArgumentParser(prog='python -m aiospbstu', description='RUZ-compatible caching proxy server')
+parser.add_argument('--host', default='127.0.0.1')
+parser.add_argument('--port', type=int, default=8080)
+parser.add_argument('--cache-socket', help='path of CacheServer socket, in-process cache is used if not set')
+parser.add_argument('--cache-ttl', type=float, default=DEFAULT_CACHE_TTL, help='seconds to keep cached responses')
+parser.add_argument('--rate-limit', type=float, help='max count of requests to RUZ per second')
+parser.add_argument('--debug', action='store_true')
+
+args = parser.parse_args()
+logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO)
+
+# Api is created by server on startup, inside of the loop that serves requests
+run_server(
+    host=args.host,
+    port=args.port,
+    cache=SharedCache(args.cache_socket) if args.cache_socket else MemoryCache(),
+    cache_ttl=args.cache_ttl,
+    rate_limit=args.rate_limit,
+)
@@ -0,0 +1,135 @@
+"""
+Incremental per-week occupancy and workload counters
+
+WorkloadAggregator listens to a :class:`aiospbstu.query.LessonStore`, so every lesson is counted once
+even if it's in schedules of several owners, and when a week of an owner is added again,
+only its removed and added lessons change counters, nothing is recomputed from scratch.
+
+Counters by week start:
+    rooms       occupied minutes by auditory ID
+    buildings   occupied minutes by building ID
+    teachers    teaching minutes by teacher ID
+    chairs      teaching minutes by chair name
+    groups      minutes of lessons by group ID
+    types       count of lessons by lesson type
+
+Example:
+.. code-block:: python3
+    aggregator = WorkloadAggregator()
+    for schedule in schedules:
+        aggregator.add_schedule(schedule)
+
+    week = datetime.date(2019, 9, 2)
+    hours = aggregator.teacher_hours(week)
+    utilisation = aggregator.room_utilisation(week)
+
+"""
+
+import datetime
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from . import types
+from .query import LessonRecord, LessonStore
+from .types import AnyDate
+from .utils.date import week_start
+
+__all__ = ['WorkloadAggregator']
+
+METRICS = 'rooms', 'buildings', 'teachers', 'chairs', 'groups', 'types'
+
+# Lessons take place from 8:00 to 21:00, Monday to Saturday
+DEFAULT_AVAILABLE_MINUTES = 13 * 60 * 6
+
+
+def _minutes(record: LessonRecord) -> int:
+    return int((record.datetime_end - record.datetime_start).total_seconds() // 60)
+
+
+def _contributions(record: LessonRecord) -> Iterable[Tuple[str, Hashable, int]]:
+    lesson = record.lesson
+    minutes = _minutes(record)
+    for auditory in lesson.auditories:
+        yield 'rooms', auditory.auditory_id, minutes
+    for building_id in {auditory.building.id for auditory in lesson.auditories}:
+        yield 'buildings', building_id, minutes
+    for teacher in lesson.teachers or ():
+        yield 'teachers', teacher.id, minutes
+    for chair in {teacher.chair for teacher in lesson.teachers or ()}:
+        yield 'chairs', chair, minutes
+    for group in lesson.groups:
+        yield 'groups', group.id, minutes
+    yield 'types', lesson.lesson_type, 1
+
+
+class WorkloadAggregator:
+
+    def __init__(self, store: Optional[LessonStore] = None):
+        """
+        :param store: store to aggregate lessons of, a new one by default
+        """
+        self._counters: Dict[str, Dict[datetime.date, Counter]] = {metric: {} for metric in METRICS}
+        self.store = store if store is not None else LessonStore()
+        self.store.add_listener(self)
+
+    def add_schedule(self, schedule: types.Schedule) -> None:
+        """
+        Add or replace week schedule of owner, counters are updated by difference with the previous one
+        """
+        self.store.add_schedule(schedule)
+
+    def record_added(self, record: LessonRecord) -> None:
+        self._update(record, 1)
+
+    def record_removed(self, record: LessonRecord) -> None:
+        self._update(record, -1)
+
+    def weeks(self) -> List[datetime.date]:
+        return sorted(self._counters['types'])
+
+    def get(self, metric: str, week: AnyDate) -> Dict[Hashable, int]:
+        """
+        :param metric: one of METRICS
+        :param week: any date of week
+        """
+        if metric not in self._counters:
+            raise ValueError(f'Unknown metric "{metric}", available metrics: {METRICS}')
+        return dict(self._counters[metric].get(week_start(week), {}))
+
+    def room_minutes(self, week: AnyDate) -> Dict[int, int]:
+        return self.get('rooms', week)
+
+    def building_minutes(self, week: AnyDate) -> Dict[int, int]:
+        return self.get('buildings', week)
+
+    def teacher_hours(self, week: AnyDate) -> Dict[int, float]:
+        return {teacher_id: minutes / 60 for teacher_id, minutes in self.get('teachers', week).items()}
+
+    def chair_hours(self, week: AnyDate) -> Dict[str, float]:
+        return {chair: minutes / 60 for chair, minutes in self.get('chairs', week).items()}
+
+    def group_hours(self, week: AnyDate) -> Dict[int, float]:
+        return {group_id: minutes / 60 for group_id, minutes in self.get('groups', week).items()}
+
+    def lesson_types(self, week: AnyDate) -> Dict[int, int]:
+        return self.get('types', week)
+
+    def room_utilisation(self,
+                         week: AnyDate,
+                         available_minutes: int = DEFAULT_AVAILABLE_MINUTES) -> Dict[int, float]:
+        """
+        Share of available time rooms are occupied, only rooms that have lessons are included
+
+        :param available_minutes: minutes per week room can be used
+        """
+        return {auditory_id: minutes / available_minutes for auditory_id, minutes in self.room_minutes(week).items()}
+
+    def _update(self, record: LessonRecord, sign: int) -> None:
+        week = week_start(record.date)
+        for metric, key, value in _contributions(record):
+            counter = self._counters[metric].setdefault(week, Counter())
+            counter[key] += sign * value
+            if not counter[key]:
+                del counter[key]
+                if not counter:
+                    del self._counters[metric][week]
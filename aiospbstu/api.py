@@ -1,29 +1,80 @@
+from __future__ import annotations
+
 import asyncio
+import contextlib
 import logging
-from typing import Optional, Union, List, Type, Tuple
+import time
+from concurrent.futures import Executor
+from typing import (Any, Awaitable, Callable, Optional, Union, List, Type, Tuple, Dict, Iterable, TypeVar,
+                    TYPE_CHECKING)
+
+import pydantic
 
 from . import exceptions as exc, types
-from .base import BaseScheduleApi
+from .base import BaseScheduleApi, DEFAULT_CACHE_TTL
+from .cache import BaseCache
+from .projection import Projection, parse_projected
+from .registry import IdRegistry, NegativeCache
+from .scheduler import Priority, RequestScheduler, request_options
 from .types import AnyDate, Method
-from .utils.date import iso_date
-from .utils.error_handler import error_handler
+from .types.base import parsing_api
+from .utils import json
+from .utils.date import week_start
+from .utils.error_handler import error_handler, ErrorPolicy
+
+if TYPE_CHECKING:
+    from .transport import BaseTransport
+    from .warmup import WarmUpScheduler
 
 log = logging.getLogger('aiospbstu')
 
+LISTS_CACHE_TTL = 24 * 60 * 60
+
+T = TypeVar('T')
+
+
+def _parse_item(model: Type[T], data: dict, fields: Optional[Projection] = None) -> T:
+    if fields is None:
+        return model.model_validate(data)
+    return parse_projected(model, data, fields)
+
+
+def _parse_body(body: str,
+                model: Type[T],
+                key: Optional[str] = None,
+                fields: Optional[Projection] = None,
+                method: Optional[Method] = None,
+                url: Optional[str] = None) -> Union[T, List[T]]:
+    """
+    Decode response, check it for API errors if method is passed, and create object or list of objects
+    under the key from it.
+    Runs in parse_executor, so it's module level function that raises only picklable exceptions
+    """
+    response = json.loads(body) if method is None else BaseScheduleApi._load_response(method, url, body)
+    try:
+        if key is None:
+            return _parse_item(model, response, fields)
+        return [_parse_item(model, item, fields) for item in response[key]]
+    except pydantic.ValidationError as e:
+        raise exc.ResponseValueError(f'Unable to parse {model.__name__}', cause=e)
+
 
 class Methods:
     # All API methods
     GET_FACULTIES = Method(
         endpoint='/faculties',
-        expected_keys='faculties'
+        expected_keys='faculties',
+        cache_ttl=LISTS_CACHE_TTL
     )
     GET_TEACHERS = Method(
         endpoint='/teachers',
-        expected_keys='teachers'
+        expected_keys='teachers',
+        cache_ttl=LISTS_CACHE_TTL
     )
     GET_BUILDINGS = Method(
         endpoint='/buildings',
-        expected_keys='buildings'
+        expected_keys='buildings',
+        cache_ttl=LISTS_CACHE_TTL
     )
     GET_GROUP = Method(
         endpoint_template='/group/{group_id}',
@@ -129,6 +180,9 @@ class PolyScheduleAPI(BaseScheduleApi):
     """
     methods = Methods()
 
+    RECENT_OWNERS_LIMIT = 1000
+    SCHEDULES_LIMIT = 10000
+
     def __init__(self,
                  group_id: Optional[int] = None,
                  teacher_id: Optional[int] = None,
@@ -136,7 +190,19 @@ class PolyScheduleAPI(BaseScheduleApi):
                  faculty_id: Optional[int] = None,
                  skip_exceptions: Optional[Union[Tuple[Type[exc.UniScheduleException]],
                                                  Type[exc.UniScheduleException]]] = (),
-                 loop: Optional[asyncio.AbstractEventLoop] = None):
+                 loop: Optional[asyncio.AbstractEventLoop] = None,
+                 cache: Optional[BaseCache] = None,
+                 cache_ttl: float = DEFAULT_CACHE_TTL,
+                 error_policy: Optional[ErrorPolicy] = None,
+                 rate_limit: Optional[float] = None,
+                 transport: Optional[BaseTransport] = None,
+                 parse_executor: Optional[Executor] = None,
+                 parse_threshold: int = 256 * 1024,
+                 negative_cache: Optional[NegativeCache] = None,
+                 id_registry: Optional[IdRegistry] = None,
+                 stale_grace: Optional[float] = None,
+                 max_staleness: Optional[float] = None,
+                 scheduler: Optional[RequestScheduler] = None):
         """
 
         :param group_id: Default group ID for requests where its needed
@@ -146,78 +212,385 @@ class PolyScheduleAPI(BaseScheduleApi):
         :param skip_exceptions: exceptions that will be suppressed, for example if you want to get responses
                even if server returned {"error": True}, use "skip_exceptions=exceptions.ApiResponseError"
         :param loop: asyncio event loop
+        :param cache: cache of API responses, use SharedCache to share responses between processes
+        :param cache_ttl: seconds to keep cached responses, unless method has its own cache_ttl
+        :param error_policy: defines skipped exceptions and their logging, overrides skip_exceptions
+        :param rate_limit: max count of requests to server per second
+        :param transport: transport that makes HTTP requests, AiohttpTransport by default
+        :param parse_executor: executor (e.g. ProcessPoolExecutor) to decode and parse large responses in,
+               so event loop is not blocked by parsing
+        :param parse_threshold: min size of response body in bytes to parse it in parse_executor
+        :param negative_cache: remembers not found groups, teachers and buildings to not request them again
+        :param id_registry: collects valid IDs from full lists to reject unknown IDs without requests
+        :param stale_grace: enables stale-while-revalidate for schedules: for this many seconds after cache_ttl
+               expires, schedule getters return the last received schedule and refresh it in background.
+               Schedule.age tells how old returned data is
+        :param max_staleness: schedules older than this many seconds are never returned, cache_ttl + stale_grace
+               by default
+        :param scheduler: limits simultaneous requests and serves them by priority, see aiospbstu.scheduler
 
         """
-        super().__init__(loop)
+        super().__init__(loop, cache=cache, cache_ttl=cache_ttl, rate_limit=rate_limit, transport=transport,
+                         scheduler=scheduler)
 
         self.group_id = group_id
         self.teacher_id = teacher_id
         self.auditory_id = auditory_id
         self.faculty_id = faculty_id
 
-        if not isinstance(skip_exceptions, tuple):
-            skip_exceptions = (skip_exceptions,)
-        for exception in skip_exceptions:
-            if not issubclass(exception, BaseException):
-                raise ValueError(f'Unexpected type of exception in skip_exceptions: {exception}')
-            elif not issubclass(exception, exc.BaseUniScheduleError):
-                log.warning(f'Expected subclass of {exc.BaseUniScheduleError} in skip_exceptions , got {exception}')
+        self.error_policy = error_policy or ErrorPolicy(skip_exceptions)
 
-        self.skip_exceptions = skip_exceptions
+        self.parse_executor = parse_executor
+        self.parse_threshold = parse_threshold
 
-    async def get_faculties(self) -> List[types.Faculty]:
-        method = self.methods.GET_FACULTIES
+        self.negative_cache = negative_cache
+        self.id_registry = id_registry
+
+        self.stale_grace = stale_grace
+        self.max_staleness = max_staleness
+        self._schedules: Dict[str, types.Schedule] = {}
+        # Tasks are kept, so they aren't garbage collected while running
+        self._revalidating: Dict[str, asyncio.Task] = {}
+
+        self._recent_owners: Dict[Tuple[str, int], None] = {}
+        # (relation, parent ID) to time of loading and related objects, shared by all parents with this ID
+        self._related: Dict[Tuple[str, int], Tuple[float, list]] = {}
+
+    @property
+    def skip_exceptions(self) -> Tuple[Type[BaseException], ...]:
+        return self.error_policy.skip_exceptions
+
+    def parse(self, model: Type[T], **data) -> T:
+        """
+        Create object bound to this api instance, so its methods (e.g. Group.get_schedule) use this instance
+        """
+        token = parsing_api.set(self)
+        try:
+            return model.model_validate(data)
+        finally:
+            parsing_api.reset(token)
+
+    def parse_projected(self, model: Type[T], data: dict, fields: Projection) -> T:
+        """
+        Create object bound to this api instance only with fields of projection, see aiospbstu.projection
+        """
+        token = parsing_api.set(self)
+        try:
+            return parse_projected(model, data, fields)
+        finally:
+            parsing_api.reset(token)
+
+    def _defers_check(self, body: str) -> bool:
+        # Large bodies are decoded once, in parse_executor
+        return self.parse_executor is not None and len(body) >= self.parse_threshold
+
+    def _parse_response(self, model: Type[T], data: dict, fields: Optional[Projection]) -> T:
+        if fields is None:
+            return self.parse(model, **data)
+        return self.parse_projected(model, data, fields)
+
+    async def _request_parsed(self,
+                              model: Type[T],
+                              method: Method,
+                              key: Optional[str] = None,
+                              fields: Optional[Projection] = None,
+                              refresh: bool = False,
+                              **params) -> Union[T, List[T]]:
+        """
+        Request method and create object or list of objects under the key from response,
+        large responses are parsed in parse_executor if it's set
+
+        :param fields: projection, only these fields are parsed
+        :param refresh: request method even if its response is cached
+        """
+        parsed, _ = await self._request_parsed_at(model, method, key, fields, params, refresh)
+        return parsed
+
+    async def _request_parsed_at(self,
+                                 model: Type[T],
+                                 method: Method,
+                                 key: Optional[str],
+                                 fields: Optional[Projection],
+                                 params: dict,
+                                 refresh: bool = False) -> Tuple[Union[T, List[T]], float]:
+        """
+        Same as _request_parsed(), but also returns time of fetching response, it may be taken from cache
+        """
+        url = method.get_url(self.API_URL, params)
+        body, response, fetched_at, checked = await self._request(method, url, refresh,
+                                                                  defer_check=self.parse_executor is not None)
+        if response is None and self.parse_executor is not None:
+            parsed = await self.parse_body(body, model, key, fields, method, url)
+            if not checked:
+                await self._cache_checked(method, url, body, fetched_at)
+            return parsed, fetched_at
+
+        if response is None:
+            response = self._load_response(method, url, body)
+        if key is None:
+            return self._parse_response(model, response, fields), fetched_at
+        return [self._parse_response(model, item, fields) for item in response[key]], fetched_at
+
+    async def parse_body(self,
+                         body: str,
+                         model: Type[T],
+                         key: Optional[str] = None,
+                         fields: Optional[Projection] = None,
+                         method: Optional[Method] = None,
+                         url: Optional[str] = None) -> Union[T, List[T]]:
+        """
+        Create object or list of objects under the key from response body got with request_body(),
+        large bodies are parsed in parse_executor if it's set
+
+        :param fields: projection, only these fields are parsed
+        :param method: method body was requested with, body is checked for API errors and expected keys,
+               so it may be requested with request_body(check=False)
+        :param url: url of request for error messages
+        """
+        if self.parse_executor is None or len(body) < self.parse_threshold:
+            parsed = _parse_body(body, model, key, fields, method, url)
+        else:
+            parsed = await self.loop.run_in_executor(self.parse_executor, _parse_body, body, model, key, fields,
+                                                     method, url)
+
+        for obj in parsed if isinstance(parsed, list) else (parsed,):
+            obj.bind(self)
+        return parsed
+
+    @staticmethod
+    def schedule_or_none(schedule: Any) -> Optional[types.Schedule]:
+        """
+        Schedule got with parse_body() or schedule getters, or None if it's server response instead of schedule:
+        errors in skip_exceptions are suppressed and server response is returned
+        """
+        return schedule if isinstance(schedule, types.Schedule) else None
+
+    async def _get_schedule(self, method: Method, fields: Optional[Projection] = None, **params) -> types.Schedule:
+        # Partial schedules are not kept, so they don't replace full ones
+        if self.stale_grace is None or fields is not None:
+            return await self._request_parsed(types.Schedule, method, fields=fields, **params)
+
+        url = method.get_url(self.API_URL, params)
+        ttl = method.cache_ttl or self.cache_ttl
+
+        max_staleness = self.max_staleness if self.max_staleness is not None else float('inf')
+
+        schedule = self._schedules.get(url)
+        if schedule is not None:
+            age = schedule.age
+            if age <= min(ttl, max_staleness):
+                return schedule
+            if age <= min(ttl + self.stale_grace, max_staleness):
+                if url not in self._revalidating:
+                    self._revalidating[url] = self.loop.create_task(self._revalidate_schedule(url, method, params))
+                return schedule
+
+        schedule = await self._fetch_schedule(url, method, params)
+        if schedule.age > max_staleness:
+            # Cached response is older than allowed
+            schedule = await self._fetch_schedule(url, method, params, refresh=True)
+        return schedule
+
+    async def _fetch_schedule(self, url: str, method: Method, params: dict, refresh: bool = False) -> types.Schedule:
+        schedule, fetched_at = await self._request_parsed_at(types.Schedule, method, None, None, params, refresh)
+        schedule._set_fetched_at(fetched_at)
+        self._schedules.pop(url, None)
+        self._schedules[url] = schedule
+        if len(self._schedules) > self.SCHEDULES_LIMIT:
+            del self._schedules[next(iter(self._schedules))]
+        return schedule
+
+    async def _revalidate_schedule(self, url: str, method: Method, params: dict) -> None:
+        try:
+            with request_options(priority=Priority.prefetch):
+                # Cached response is as old as the schedule itself
+                await self._fetch_schedule(url, method, params, refresh=True)
+        except Exception as e:
+            log.warning('Unable to revalidate schedule "%s": %r', url, e)
+        finally:
+            self._revalidating.pop(url, None)
+
+    @contextlib.contextmanager
+    def _check_id(self, kind: str, entity_id: int, not_found_error: Type[exc.ApiNotFoundError]):
+        """
+        Reject IDs that are known to be invalid before request, remember result of request
+        """
+        key = (kind, entity_id)
+        if self.negative_cache is not None:
+            response = self.negative_cache.get(key)
+            if response is not None:
+                raise not_found_error(response.get('text'), response=response)
+        if self.id_registry is not None and self.id_registry.is_known(kind, entity_id) is False:
+            text = f'{kind.capitalize()} {entity_id} is not found in registry'
+            raise not_found_error(text, response={'error': True, 'text': text})
+
+        try:
+            yield
+        except exc.ApiNotFoundError as e:
+            if self.negative_cache is not None and isinstance(e.response, dict):
+                self.negative_cache.add(key, e.response)
+            raise
+
+        if self.id_registry is not None:
+            self.id_registry.add(kind, entity_id)
+
+    @property
+    def recent_owners(self) -> List[Tuple[str, int]]:
+        """
+        (kind, id) of owners whose schedules were recently requested, from the oldest to the newest
+        """
+        return list(self._recent_owners)
+
+    def _remember_owner(self, kind: str, owner_id: int):
+        self._recent_owners.pop((kind, owner_id), None)
+        self._recent_owners[kind, owner_id] = None
+        if len(self._recent_owners) > self.RECENT_OWNERS_LIMIT:
+            del self._recent_owners[next(iter(self._recent_owners))]
+
+    async def _include(self,
+                       parents: list,
+                       include: Iterable[str],
+                       loaders: Dict[str, Callable[..., Awaitable[list]]],
+                       refresh: bool = False) -> None:
+        """
+        Load related objects of all parents concurrently and set them as parents' attributes
 
-        response = await self.request(method)
+        :param refresh: load related objects even if they are cached
+        """
+        if isinstance(include, str):
+            raise TypeError(f'include must be a collection of relation names, e.g. [{include!r}], not a string')
+        include = set(include)
+        unknown = include - loaders.keys()
+        if unknown:
+            raise ValueError(f'Unknown relations {sorted(unknown)}, available relations: {sorted(loaders)}')
+
+        for relation in include:
+            loader = loaders[relation]
+            related = await asyncio.gather(*(self._get_related(relation, parent.id, loader, refresh)
+                                             for parent in parents))
+            for parent, objects in zip(parents, related):
+                setattr(parent, relation, objects)
+
+    async def _get_related(self,
+                           relation: str,
+                           parent_id: int,
+                           loader: Callable[..., Awaitable[list]],
+                           refresh: bool) -> list:
+        key = (relation, parent_id)
+        loaded = self._related.get(key)
+        if not refresh and loaded is not None and time.monotonic() - loaded[0] < LISTS_CACHE_TTL:
+            return loaded[1]
+
+        objects = await loader(parent_id, refresh=refresh)
+        now = time.monotonic()
+        # Entries are kept in order of loading, so expired ones are at the start
+        self._related.pop(key, None)
+        self._related[key] = now, objects
+        oldest_key = next(iter(self._related))
+        while now - self._related[oldest_key][0] >= LISTS_CACHE_TTL:
+            del self._related[oldest_key]
+            oldest_key = next(iter(self._related))
+        return objects
+
+    def warm_up(self,
+                group_ids: Iterable[int] = (),
+                teacher_ids: Iterable[int] = (),
+                auditory_ids: Iterable[int] = (),
+                **kwargs) -> WarmUpScheduler:
+        """
+        Start background prefetching of hot schedules, see WarmUpScheduler for available options
 
-        return [types.Faculty(**faculty) for faculty in response[method.faculties_key]]
+        :param group_ids: IDs of groups whose schedules should be always warm
+        :param teacher_ids: IDs of teachers whose schedules should be always warm
+        :param auditory_ids: IDs of auditories whose schedules should be always warm
+        """
+        from .warmup import WarmUpScheduler
+        scheduler = WarmUpScheduler(self, group_ids, teacher_ids, auditory_ids, **kwargs)
+        scheduler.start()
+        return scheduler
+
+    async def get_faculties(self, include: Iterable[str] = (), refresh: bool = False) -> List[types.Faculty]:
+        """
+        :param include: relations to load with faculties, concurrently: 'groups' sets Faculty.groups
+        :param refresh: request faculties and their relations even if they are cached
+        """
+        method = self.methods.GET_FACULTIES
+
+        faculties = await self._request_parsed(types.Faculty, method, key=method.faculties_key, refresh=refresh)
+        if self.id_registry is not None:
+            self.id_registry.set_faculties(faculty.id for faculty in faculties)
+        await self._include(faculties, include, {'groups': self._get_faculty_groups}, refresh)
+        return faculties
 
     async def get_teachers(self) -> List[types.Teacher]:
         method = self.methods.GET_TEACHERS
 
-        response = await self.request(method)
+        teachers = await self._request_parsed(types.Teacher, method, key=method.teachers_key)
+        if self.id_registry is not None:
+            self.id_registry.set_ids('teacher', (teacher.id for teacher in teachers))
+        return teachers
 
-        return [types.Teacher(**teacher)
-                for teacher in response[method.teachers_key]]
-
-    async def get_buildings(self) -> List[types.Building]:
+    async def get_buildings(self, include: Iterable[str] = (), refresh: bool = False) -> List[types.Building]:
+        """
+        :param include: relations to load with buildings, concurrently: 'rooms' sets Building.rooms
+        :param refresh: request buildings and their relations even if they are cached
+        """
         method = self.methods.GET_BUILDINGS
 
-        response = await self.request(method)
-
-        return [types.Building(**building)
-                for building in response[method.buildings_key]]
+        buildings = await self._request_parsed(types.Building, method, key=method.buildings_key, refresh=refresh)
+        if self.id_registry is not None:
+            self.id_registry.set_ids('building', (building.id for building in buildings))
+        await self._include(buildings, include, {'rooms': self._get_building_auditories}, refresh)
+        return buildings
 
-    async def get_faculty(self, faculty_id: int) -> types.Faculty:
+    async def get_faculty(self, faculty_id: int, include: Iterable[str] = (), refresh: bool = False) -> types.Faculty:
+        """
+        :param include: see get_faculties()
+        :param refresh: see get_faculties()
+        """
         method = self.methods.GET_FACULTY
 
-        response = await self.request(method, faculty_id=faculty_id)
+        response = await self.request(method, refresh=refresh, faculty_id=faculty_id)
 
-        return types.Faculty(**response)
+        faculty = self.parse(types.Faculty, **response)
+        await self._include([faculty], include, {'groups': self._get_faculty_groups}, refresh)
+        return faculty
 
     async def get_group(self, group_id: int) -> types.Group:
         method = self.methods.GET_GROUP
 
-        response = await self.request(method, group_id=group_id)
+        with self._check_id('group', group_id, exc.GroupNotFoundByIDError):
+            response = await self.request(method, group_id=group_id)
 
-        return types.Group(**response)
+        return self.parse(types.Group, **response)
 
     async def get_teacher(self, teacher_id: int) -> types.Teacher:
-        response = await self.request(self.methods.GET_TEACHER, teacher_id=teacher_id)
+        with self._check_id('teacher', teacher_id, exc.TeacherNotFoundByIDError):
+            response = await self.request(self.methods.GET_TEACHER, teacher_id=teacher_id)
 
-        return types.Teacher(**response)
+        return self.parse(types.Teacher, **response)
 
-    async def get_building(self, building_id: int) -> types.Building:
-        response = await self.request(self.methods.GET_BUILDING, building_id=building_id)
+    async def get_building(self,
+                           building_id: int,
+                           include: Iterable[str] = (),
+                           refresh: bool = False) -> types.Building:
+        """
+        :param include: see get_buildings()
+        :param refresh: see get_buildings()
+        """
+        with self._check_id('building', building_id, exc.BuildingNotFoundByIDError):
+            response = await self.request(self.methods.GET_BUILDING, refresh=refresh, building_id=building_id)
 
-        return types.Building(**response)
+        building = self.parse(types.Building, **response)
+        await self._include([building], include, {'rooms': self._get_building_auditories}, refresh)
+        return building
 
     async def search_group(self, group_name: Union[str, int]) -> List[types.Group]:
         method = self.methods.SEARCH_GROUP
 
         response = await self.request(method, group_name=group_name)
 
-        return [types.Group(**group)
+        return [self.parse(types.Group, **group)
                 for group in response[method.groups_key]] if response[method.groups_key] else []
 
     async def search_teacher(self, teacher_name: str) -> List[types.Teacher]:
@@ -225,7 +598,7 @@ class PolyScheduleAPI(BaseScheduleApi):
 
         response = await self.request(method, teacher_name=teacher_name)
 
-        return [types.Teacher(**teacher)
+        return [self.parse(types.Teacher, **teacher)
                 for teacher in response[method.teachers_key]] if response[method.teachers_key] else []
 
     async def search_auditory(self, auditory_name: Union[str, int]) -> List[types.Auditory]:
@@ -233,52 +606,83 @@ class PolyScheduleAPI(BaseScheduleApi):
 
         response = await self.request(method, auditory_name=auditory_name)
 
-        return [types.Auditory(**auditory)
+        return [self.parse(types.Auditory, **auditory)
                 for auditory in response[method.auditories_key]] if response[method.auditories_key] else []
 
     async def get_faculty_groups(self, faculty_id: int) -> List[types.Group]:
+        return await self._get_faculty_groups(faculty_id or self.faculty_id)
+
+    async def _get_faculty_groups(self, faculty_id: int, refresh: bool = False) -> List[types.Group]:
         method = self.methods.GET_FACULTY_GROUPS
 
-        response = await self.request(method, faculty_id=faculty_id or self.faculty_id)
+        response = await self.request(method, refresh=refresh, faculty_id=faculty_id)
 
-        groups_faculty = types.Faculty(**response[method.faculty_key])
-        return [types.Group(**group, faculty=groups_faculty)
-                for group in response[method.groups_key]]
+        groups_faculty = self.parse(types.Faculty, **response[method.faculty_key])
+        groups = [self.parse(types.Group, **group, faculty=groups_faculty)
+                  for group in response[method.groups_key]]
+        if self.id_registry is not None:
+            self.id_registry.set_faculty_groups(groups_faculty.id, (group.id for group in groups))
+        return groups
 
     async def get_building_auditories(self, building_id: int) -> List[types.Auditory]:
+        return await self._get_building_auditories(building_id)
+
+    async def _get_building_auditories(self, building_id: int, refresh: bool = False) -> List[types.Auditory]:
         method = self.methods.GET_BUILDING_AUDITORIES
 
-        response = await self.request(method, building_id=building_id)
+        response = await self.request(method, refresh=refresh, building_id=building_id)
 
-        auditories_building = types.Building(**response[method.building_key])
-        return [types.Auditory(**auditory, building=auditories_building)
+        auditories_building = self.parse(types.Building, **response[method.building_key])
+        return [self.parse(types.Auditory, **auditory, building=auditories_building)
                 for auditory in response[method.auditories_key]]
 
     async def get_group_schedule(self,
                                  group_id: int = None,
-                                 date: Optional[AnyDate] = None) -> types.Schedule:
-        response = await self.request(
-            self.methods.GET_GROUP_SCHEDULE,
-            group_id=group_id or self.group_id,
-            date=iso_date(date)
-        )
-        return types.Schedule(**response)
+                                 date: Optional[AnyDate] = None,
+                                 fields: Optional[Projection] = None) -> types.Schedule:
+        """
+        :param fields: projection, only these fields of schedule are parsed, see aiospbstu.projection
+        """
+        group_id = group_id or self.group_id
+        self._remember_owner('group', group_id)
+
+        with self._check_id('group', group_id, exc.GroupNotFoundByIDError):
+            return await self._get_schedule(
+                self.methods.GET_GROUP_SCHEDULE,
+                group_id=group_id,
+                date=week_start(date),
+                fields=fields
+            )
 
     async def get_teacher_schedule(self, teacher_id: int = None,
-                                   date: Optional[AnyDate] = None) -> types.Schedule:
+                                   date: Optional[AnyDate] = None,
+                                   fields: Optional[Projection] = None) -> types.Schedule:
+        """
+        :param fields: projection, only these fields of schedule are parsed, see aiospbstu.projection
+        """
+        teacher_id = teacher_id or self.teacher_id
+        self._remember_owner('teacher', teacher_id)
 
-        response = await self.request(
-            self.methods.GET_TEACHER_SCHEDULE,
-            teacher_id=teacher_id or self.teacher_id,
-            date=iso_date(date)
-        )
-        return types.Schedule(**response)
+        with self._check_id('teacher', teacher_id, exc.TeacherNotFoundByIDError):
+            return await self._get_schedule(
+                self.methods.GET_TEACHER_SCHEDULE,
+                teacher_id=teacher_id,
+                date=week_start(date),
+                fields=fields
+            )
 
     async def get_auditory_schedule(self, auditory_id: int = None,
-                                    date: Optional[AnyDate] = None) -> types.Schedule:
-        response = await self.request(
+                                    date: Optional[AnyDate] = None,
+                                    fields: Optional[Projection] = None) -> types.Schedule:
+        """
+        :param fields: projection, only these fields of schedule are parsed, see aiospbstu.projection
+        """
+        auditory_id = auditory_id or self.auditory_id
+        self._remember_owner('auditory', auditory_id)
+
+        return await self._get_schedule(
             self.methods.GET_AUDITORY_SCHEDULE,
-            auditory_id=auditory_id or self.auditory_id,
-            date=iso_date(date)
+            auditory_id=auditory_id,
+            date=week_start(date),
+            fields=fields
         )
-        return types.Schedule(**response)
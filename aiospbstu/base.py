@@ -1,58 +1,314 @@
 import asyncio
 import logging
-import ssl
+import time
 from http import HTTPStatus
-from typing import Optional, Type, Union
-
-import aiohttp
-import certifi
+from typing import Dict, Optional, Tuple, Union, TYPE_CHECKING
 
 from . import exceptions as exc
+from .cache import BaseCache
+from .scheduler import RequestScheduler, SlotTicket
 from .types.method import Method
 from .utils import json
 from .utils.mixins import ContextInstanceMixin
+from .utils.rate_limit import RateLimiter
+
+if TYPE_CHECKING:
+    import aiohttp
+    from .transport import BaseTransport
 
 log = logging.getLogger('aiospbstu')
 
+DEFAULT_CACHE_TTL = 60 * 60
+
+# Body, its decoded JSON, time of fetching and whether body is checked for API errors
+Response = Tuple[str, Optional[Union[dict, list]], float, bool]
+
+
+def _pack_cached(body: str, fetched_at: float) -> str:
+    # Time of fetching is kept with body, so responses fetched long ago by other workers aren't taken for fresh
+    return f'{fetched_at!r}\n{body}'
+
+
+def _unpack_cached(value: str) -> Tuple[str, float]:
+    fetched_at, _, body = value.partition('\n')
+    return body, float(fetched_at)
+
+
+def _looks_like_data(body: str) -> bool:
+    """
+    Cheap check of body that isn't decoded yet: it's a JSON object and not an error
+    """
+    head = body[:32].lstrip()
+    return head.startswith('{') and not head[1:].lstrip().startswith('"error"') and body.rstrip().endswith('}')
+
+
+class _PendingRequest:
+    """
+    Task that requests url and count of callers waiting for it
+    """
+    __slots__ = 'key', 'task', 'ticket', 'callers'
+
+    def __init__(self, key: Tuple[str, bool], task: asyncio.Task, ticket: Optional[SlotTicket]):
+        self.key = key
+        self.task = task
+        self.ticket = ticket
+        self.callers = 1
+
 
 class BaseScheduleApi(ContextInstanceMixin):
     BASE_URL, API_ENDPOINT = 'https://ruz.spbstu.ru', '/api/v1/ruz'
     API_URL = BASE_URL + API_ENDPOINT
+    CACHE_LOCK_TIMEOUT = 60
+
+    def __init__(self,
+                 loop: Optional[asyncio.AbstractEventLoop] = None,
+                 cache: Optional[BaseCache] = None,
+                 cache_ttl: float = DEFAULT_CACHE_TTL,
+                 rate_limit: Optional[float] = None,
+                 transport: Optional['BaseTransport'] = None,
+                 scheduler: Optional[RequestScheduler] = None):
+        # Running loop is taken at call time, so api can be created before the loop that uses it is started
+        self._loop = loop
 
-    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
-        if not loop:
-            loop = asyncio.get_event_loop()
-        self.loop = loop
+        # Default transport is created on first request, so api construction is cheap
+        self._transport = transport
 
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
-        connector = aiohttp.TCPConnector(ssl=ssl_context, loop=self.loop)
-        self.session = aiohttp.ClientSession(connector=connector, loop=self.loop, json_serialize=json.dumps)
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+        # Key is url and whether cached response is ignored
+        self._pending_requests: Dict[Tuple[str, bool], _PendingRequest] = {}
+
+        self.rate_limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.scheduler = scheduler
 
         self.set_current(self)
 
-    async def request(self, method: Method, **params) -> Optional[Union[dict, list]]:
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Running event loop, or the passed one outside of loop
+        """
+        try:
+            return asyncio.get_running_loop()
+        except RuntimeError:
+            return self._loop or asyncio.get_event_loop()
+
+    @property
+    def transport(self) -> 'BaseTransport':
+        if self._transport is None:
+            from .transport import AiohttpTransport
+            self._transport = AiohttpTransport(loop=self.loop)
+        return self._transport
+
+    @transport.setter
+    def transport(self, transport: 'BaseTransport') -> None:
+        self._transport = transport
+
+    @property
+    def session(self) -> Optional['aiohttp.ClientSession']:
+        return getattr(self.transport, 'session', None)
+
+    async def close(self) -> None:
+        if self._transport is not None:
+            await self._transport.close()
+
+    async def request(self, method: Method, *, refresh: bool = False, **params) -> Optional[Union[dict, list]]:
         """
         Base method to get response from API
+        Concurrent requests of the same url are made only once, responses are cached if cache is set.
+        If scheduler is set, priority and deadline of request are taken from aiospbstu.scheduler.request_options
 
         :param on_api_error_exception: Exceptions to raise if '{"error": True}' is in API response
         :param method: Method class instance with url and expected_keys attrs
+        :param refresh: ignore cached response and replace it with a new one
 
         :raises ApiError, NetworkError
         """
         url = method.get_url(self.API_URL, params)
-        log.debug('Make request: "%s"' % url)
+
+        body, result_json, fetched_at, checked = await self._request(method, url, refresh)
+        if result_json is not None:
+            return result_json
+
+        # Decoding cached body, or decoding body again, so every caller gets its own response object
+        result_json = self._load_response(method, url, body)
+        if not checked:
+            await self._cache_checked(method, url, body, fetched_at)
+        return result_json
+
+    async def request_body(self,
+                           method: Method,
+                           *,
+                           refresh: bool = False,
+                           check: bool = True,
+                           **params) -> str:
+        """
+        Same as request(), but returns response body without decoding it
+
+        :param check: check body for API errors, pass False if body is checked by caller, e.g. with
+               PolyScheduleAPI.parse_body(method=...), then large bodies are decoded only once, in parse_executor.
+               Bodies that are not checked are not cached
+        :raises ApiError, NetworkError
+        """
+        url = method.get_url(self.API_URL, params)
+
+        body, _, fetched_at, checked = await self._request(method, url, refresh, defer_check=not check)
+        if check and not checked:
+            # Request was made by caller that checks body itself
+            self._load_response(method, url, body)
+            await self._cache_checked(method, url, body, fetched_at)
+        return body
+
+    async def _request(self, method: Method, url: str, refresh: bool = False, defer_check: bool = False) -> Response:
+        """
+        :param defer_check: caller checks body itself, so large bodies may be left unchecked, see _defers_check()
+        :return: response body, decoded response if it was decoded for this call only, time of fetching it
+                 and whether body is checked
+        """
+        pending, created = self._get_pending_response(method, url, refresh, defer_check)
+        if pending.ticket is not None:
+            try:
+                await self.scheduler.wait(pending.ticket, pending.task, url)
+            except BaseException as e:
+                pending.callers -= 1
+                if isinstance(e, exc.RequestDeadlineExceeded) and not pending.callers:
+                    # Nobody waits for request anymore, so it leaves the queue
+                    self._forget_pending(pending)
+                    pending.task.cancel()
+                raise
+
+        body, result_json, fetched_at, checked = await asyncio.shield(pending.task)
+        return body, result_json if created else None, fetched_at, checked
+
+    def _get_pending_response(self,
+                              method: Method,
+                              url: str,
+                              refresh: bool,
+                              defer_check: bool = False) -> Tuple[_PendingRequest, bool]:
+        """
+        Get request that is already requesting url, or create a new one.
+        Refreshing callers join only refreshing requests, since other ones may return cached response.
+        With scheduler, joined request gets priority of caller if it's higher
+
+        :return: request and whether it was created by this call
+        """
+        keys = [(url, True)] if refresh else [(url, False), (url, True)]
+        for key in keys:
+            pending = self._pending_requests.get(key)
+            if pending is not None:
+                pending.callers += 1
+                if pending.ticket is not None:
+                    self.scheduler.join(pending.ticket)
+                return pending, False
+
+        ticket = self.scheduler.ticket() if self.scheduler is not None else None
+        task = self.loop.create_task(self._get_response(method, url, refresh, ticket, defer_check))
+        pending = self._pending_requests[url, refresh] = _PendingRequest((url, refresh), task, ticket)
+        task.add_done_callback(lambda _: self._forget_pending(pending))
+        return pending, True
+
+    def _forget_pending(self, pending: _PendingRequest) -> None:
+        if self._pending_requests.get(pending.key) is pending:
+            del self._pending_requests[pending.key]
+
+    async def _get_response(self,
+                            method: Method,
+                            url: str,
+                            refresh: bool = False,
+                            ticket: Optional[SlotTicket] = None,
+                            defer_check: bool = False) -> Response:
+        """
+        :param ticket: place of request in queue of scheduler
+        :param defer_check: see _request()
+        :return: response body, decoded response, time of fetching it and whether body is checked,
+                 cached bodies are not decoded, since they were checked before
+        """
+        if self.cache is None:
+            body, result_json = await self._fetch(method, url, ticket, defer_check)
+            return body, result_json, time.time(), result_json is not None
+
+        if refresh:
+            value, locked = None, False
+        else:
+            value, locked = await self.cache.lock(url, timeout=self.CACHE_LOCK_TIMEOUT)
+        if value is not None:
+            log.debug('Cached response for "%s"', url)
+            body, fetched_at = _unpack_cached(value)
+            return body, None, fetched_at, True
 
         try:
-            async with self.session.get(url) as response:
-                body = await response.text()
-        except aiohttp.ClientError as e:
-            raise exc.NetworkError(url=url, cause=e)
+            body, result_json = await self._fetch(method, url, ticket, defer_check)
+        except BaseException:
+            if locked:
+                await self.cache.release(url)
+            raise
+
+        fetched_at = time.time()
+        if result_json is None:
+            # Body isn't checked yet, it's cached by caller that checks it, so invalid body isn't cached for ttl
+            if locked:
+                await self.cache.release(url)
+            return body, None, fetched_at, False
+
+        await self.cache.set(url, _pack_cached(body, fetched_at), method.cache_ttl or self.cache_ttl)
+        return body, result_json, fetched_at, True
+
+    async def _cache_checked(self, method: Method, url: str, body: str, fetched_at: float) -> None:
+        """
+        Cache body that was left unchecked by request and then checked by caller
+        """
+        if self.cache is not None:
+            await self.cache.set(url, _pack_cached(body, fetched_at), method.cache_ttl or self.cache_ttl)
+
+    async def _fetch(self,
+                     method: Method,
+                     url: str,
+                     ticket: Optional[SlotTicket] = None,
+                     defer_check: bool = False) -> Tuple[str, Optional[Union[dict, list]]]:
+        if self.scheduler is None:
+            return await self._send(method, url, defer_check)
+
+        # Whole response is checked inside of slot, so scheduler sees errors of server too
+        async with self.scheduler.slot(url, ticket):
+            return await self._send(method, url, defer_check)
+
+    async def _send(self,
+                    method: Method,
+                    url: str,
+                    defer_check: bool = False) -> Tuple[str, Optional[Union[dict, list]]]:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+
+        log.debug('Make request: "%s"' % url)
+
+        response = await self.transport.get(url)
+        body = response.body
 
         log.debug('Response for "%s": [%d] "%r"', url, response.status, body)
 
         if response.content_type != 'application/json':
             raise exc.ResponseTypeError(url=url, response=body)
 
+        is_ok = HTTPStatus.OK <= response.status <= HTTPStatus.IM_USED
+        if is_ok and defer_check and self._defers_check(body) and _looks_like_data(body):
+            # Body is decoded and checked once, by the caller
+            return body, None
+
+        result_json = self._load_response(method, url, body)
+
+        if is_ok:
+            return body, result_json
+
+        raise exc.ApiError(f'Bad API response [{response.status}]', url=url, response=result_json)
+
+    def _defers_check(self, body: str) -> bool:
+        """
+        Whether decoding and checking of fresh body is left to caller, e.g. to do it out of event loop
+        """
+        return False
+
+    @staticmethod
+    def _load_response(method: Method, url: Optional[str], body: str) -> Union[dict, list]:
         try:
             result_json = json.loads(body)
         except ValueError as e:
@@ -76,7 +332,4 @@ class BaseScheduleApi(ContextInstanceMixin):
                     url=url, response=result_json
                 )
 
-        if HTTPStatus.OK <= response.status <= HTTPStatus.IM_USED:
-            return result_json
-
-        raise exc.ApiError(f'Bad API response [{response.status}]', url=url, response=result_json)
+        return result_json
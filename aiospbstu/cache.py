@@ -0,0 +1,286 @@
+"""
+Response caches for :class:`aiospbstu.PolyScheduleAPI`
+
+MemoryCache keeps responses inside of the current process.
+SharedCache keeps them in CacheServer, that listens on a Unix socket, so every worker process
+reuses responses fetched by the others, and only one of them requests the same url at a time.
+
+Example:
+.. code-block:: python3
+    # Cache daemon, can be also started with "python -m aiospbstu.cache /tmp/aiospbstu.sock"
+    server = CacheServer('/tmp/aiospbstu.sock')
+    await server.start()
+
+    # In each worker
+    api = PolyScheduleAPI(cache=SharedCache('/tmp/aiospbstu.sock'))
+
+"""
+
+import abc
+import asyncio
+import logging
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .utils import json
+
+log = logging.getLogger('aiospbstu')
+
+__all__ = ['BaseCache', 'MemoryCache', 'SharedCache', 'CacheServer']
+
+# Max size of protocol line, teacher lists and big schedules are hundreds of KB, default limit of streams is 64 KB
+MAX_LINE_SIZE = 64 * 2 ** 20
+
+
+class BaseCache(abc.ABC):
+
+    @abc.abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abc.abstractmethod
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        """
+        Store value and release lock on key, if it was acquired
+        """
+
+    async def lock(self, key: str, timeout: float) -> Tuple[Optional[str], bool]:
+        """
+        Get cached value or exclusive right to fetch it
+
+        :param key: cache key
+        :param timeout: seconds after which lock is considered lost by its owner
+        :return: (value, False) if value is cached, (None, True) if caller has to fetch value
+                 and then call set() or release()
+        """
+        value = await self.get(key)
+        return value, value is None
+
+    async def release(self, key: str) -> None:
+        """
+        Release lock on key without storing value
+        """
+
+    async def close(self) -> None:
+        ...
+
+
+class MemoryCache(BaseCache):
+    """
+    Cache that lives in memory of current process
+    Expired values are purged on set() from time to time, so values that are never read again don't pile up
+    """
+
+    def __init__(self, max_size: Optional[int] = None):
+        """
+        :param max_size: max count of stored values, the oldest ones are evicted first
+        """
+        self.max_size = max_size
+        self._storage: Dict[str, Tuple[float, str]] = {}
+        self._sets_since_purge = 0
+
+    def __len__(self):
+        return len(self._storage)
+
+    async def get(self, key: str) -> Optional[str]:
+        expires, value = self._storage.get(key, (None, None))
+        if expires is not None and expires < time.monotonic():
+            del self._storage[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        self._storage.pop(key, None)
+        self._storage[key] = time.monotonic() + ttl, value
+
+        if self.max_size is not None:
+            while len(self._storage) > self.max_size:
+                del self._storage[next(iter(self._storage))]
+
+        # Whole storage is scanned once per len/2 sets, so purging costs O(1) per set on average
+        self._sets_since_purge += 1
+        if self._sets_since_purge * 2 >= len(self._storage):
+            self.purge()
+
+    def purge(self) -> int:
+        """
+        Delete expired values
+
+        :return: count of deleted values
+        """
+        now = time.monotonic()
+        expired = [key for key, (expires, _) in self._storage.items() if expires < now]
+        for key in expired:
+            del self._storage[key]
+        self._sets_since_purge = 0
+        return len(expired)
+
+
+class _Lock:
+    __slots__ = 'deadline', 'released'
+
+    def __init__(self, deadline: float):
+        self.deadline = deadline
+        self.released = asyncio.Event()
+
+
+class CacheServer:
+    """
+    Cache daemon shared by processes on the same host, serves SharedCache clients over a Unix socket
+
+    Protocol is newline delimited JSON: every request is {"op": ..., "key": ..., ...},
+    every response is {"value": ..., "locked": ...}
+    """
+
+    def __init__(self, path: str, cache: Optional[BaseCache] = None):
+        """
+        :param path: path of Unix socket to listen
+        :param cache: storage of values, MemoryCache by default
+        """
+        self.path = path
+        self.cache = cache or MemoryCache()
+        self._locks: Dict[str, _Lock] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_unix_server(self._handle_connection, path=self.path, limit=MAX_LINE_SIZE)
+        log.debug('Cache server is listening on "%s"', self.path)
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.close()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = json.loads(line)
+                value, locked = await self._handle_request(request)
+                writer.write(json.dumps({'value': value, 'locked': locked}).encode() + b'\n')
+                await writer.drain()
+        except (ConnectionError, KeyError, ValueError) as e:
+            log.warning('Cache server dropped connection: %r', e)
+        finally:
+            writer.close()
+
+    async def _handle_request(self, request: dict) -> Tuple[Optional[str], bool]:
+        op, key = request['op'], request['key']
+        if op == 'get':
+            return await self.cache.get(key), False
+        elif op == 'lock':
+            return await self._lock(key, request['timeout'])
+        elif op == 'set':
+            await self.cache.set(key, request['value'], request['ttl'])
+            self._release(key)
+        elif op == 'release':
+            self._release(key)
+        else:
+            raise ValueError(f'Unknown cache operation: {op}')
+        return None, False
+
+    async def _lock(self, key: str, timeout: float) -> Tuple[Optional[str], bool]:
+        loop = asyncio.get_event_loop()
+        while True:
+            value = await self.cache.get(key)
+            if value is not None:
+                return value, False
+
+            lock = self._locks.get(key)
+            if lock is None or lock.deadline <= loop.time():
+                self._locks[key] = _Lock(deadline=loop.time() + timeout)
+                return None, True
+
+            # Someone is already fetching this key, waiting for result
+            try:
+                await asyncio.wait_for(lock.released.wait(), lock.deadline - loop.time())
+            except asyncio.TimeoutError:
+                pass
+
+    def _release(self, key: str) -> None:
+        lock = self._locks.pop(key, None)
+        if lock is not None:
+            lock.released.set()
+
+
+class SharedCache(BaseCache):
+    """
+    Client of CacheServer
+    If server is unavailable, every lookup is a miss, so requests are still made directly
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: path of CacheServer Unix socket
+        """
+        self.path = path
+        self._connections: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+    async def get(self, key: str) -> Optional[str]:
+        response = await self._request({'op': 'get', 'key': key})
+        return response['value'] if response is not None else None
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        if await self._request({'op': 'set', 'key': key, 'value': value, 'ttl': ttl}) is None:
+            # Value wasn't stored, so lock is released, otherwise other workers wait for it until timeout
+            await self.release(key)
+
+    async def lock(self, key: str, timeout: float) -> Tuple[Optional[str], bool]:
+        response = await self._request({'op': 'lock', 'key': key, 'timeout': timeout})
+        return (response['value'], response['locked']) if response is not None else (None, True)
+
+    async def release(self, key: str) -> None:
+        await self._request({'op': 'release', 'key': key})
+
+    async def close(self) -> None:
+        while self._connections:
+            _, writer = self._connections.pop()
+            writer.close()
+
+    async def _request(self, request: dict) -> Optional[dict]:
+        """
+        :return: response of server, None if server is unavailable
+        """
+        # Each connection serves one request at a time, idle connections are reused
+        try:
+            if self._connections:
+                reader, writer = self._connections.pop()
+            else:
+                reader, writer = await asyncio.open_unix_connection(self.path, limit=MAX_LINE_SIZE)
+        except OSError as e:
+            log.warning('Shared cache "%s" is unavailable: %r', self.path, e)
+            return None
+
+        try:
+            writer.write(json.dumps(request).encode() + b'\n')
+            line = await reader.readline()
+            if not line:
+                raise ConnectionResetError('Cache server closed connection')
+        except (OSError, ValueError) as e:
+            # ValueError is raised by readline() if response is longer than limit
+            writer.close()
+            log.warning('Shared cache "%s" is unavailable: %r', self.path, e)
+            return None
+        except BaseException:
+            # Response of interrupted request would be read by the next one
+            writer.close()
+            raise
+
+        self._connections.append((reader, writer))
+        return json.loads(line)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG)
+    asyncio.get_event_loop().run_until_complete(CacheServer(sys.argv[1]).serve_forever())
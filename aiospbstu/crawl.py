@@ -0,0 +1,416 @@
+"""
+Sharded crawl of schedules by many workers
+
+Schedules to fetch are put into a SQLite work queue, every (owner, week) job gets a deterministic shard
+from hash of owner and week. Workers (processes of one host or machines sharing the file) lease jobs
+of their shards, leases of crashed workers expire and jobs are leased again, failed jobs are retried
+with backoff up to max_attempts. Responses of all workers are stored in the same database,
+so output is merged, and workers share one request rate budget.
+
+Example:
+.. code-block:: python3
+    queue = CrawlQueue('crawl.sqlite', shards=16)
+    queue.enqueue(owners, weeks)
+
+    # In every worker process, shards may be split between workers or shared by all of them
+    api = PolyScheduleAPI()
+    stats = await crawl(api, CrawlQueue('crawl.sqlite'), shards=range(0, 8), rate_limit=20)
+
+    for schedule in queue.schedules():
+        ...
+
+"""
+
+import asyncio
+import datetime
+import logging
+import os
+import socket
+import sqlite3
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, TYPE_CHECKING
+
+from . import types
+from .pipeline import Pipeline
+from .types import AnyDate
+from .utils import json
+from .utils.date import week_start
+
+if TYPE_CHECKING:
+    from .api import PolyScheduleAPI
+
+log = logging.getLogger('aiospbstu')
+
+__all__ = ['CrawlJob', 'CrawlQueue', 'SharedRateLimiter', 'crawl', 'shard_of']
+
+PENDING, LEASED, DONE, FAILED = 'pending', 'leased', 'done', 'failed'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS jobs (
+    kind TEXT NOT NULL,
+    owner_id INTEGER NOT NULL,
+    week TEXT NOT NULL,
+    shard INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_until REAL,
+    error TEXT,
+    PRIMARY KEY (kind, owner_id, week)
+);
+CREATE INDEX IF NOT EXISTS jobs_by_shard ON jobs (shard, state);
+CREATE TABLE IF NOT EXISTS results (
+    kind TEXT NOT NULL,
+    owner_id INTEGER NOT NULL,
+    week TEXT NOT NULL,
+    body TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (kind, owner_id, week)
+);
+CREATE TABLE IF NOT EXISTS budget (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL);
+'''
+
+# Max delay before retry of failed job, in seconds
+MAX_RETRY_DELAY = 300
+
+
+def shard_of(kind: str, owner_id: int, week: datetime.date, shards: int) -> int:
+    """
+    Shard of job, the same in all processes (unlike hash() of str)
+    """
+    return zlib.crc32(f'{kind}:{owner_id}:{week.isoformat()}'.encode()) % shards
+
+
+class CrawlJob(NamedTuple):
+    kind: str
+    owner_id: int
+    week: datetime.date
+    shard: int
+    attempts: int = 0
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    # Transactions are started explicitly, writers wait for each other up to timeout.
+    # Connection is used by one thread at a time, but crawl() uses it from executor thread
+    connection = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    connection.execute('PRAGMA journal_mode=WAL')
+    return connection
+
+
+class _Transaction:
+    """
+    BEGIN IMMEDIATE takes write lock at once, so leases of concurrent workers don't overlap
+    """
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.connection.execute('BEGIN IMMEDIATE')
+        return self.connection
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.connection.execute('ROLLBACK' if exc_type else 'COMMIT')
+
+
+class CrawlQueue:
+
+    def __init__(self,
+                 path: str,
+                 shards: Optional[int] = None,
+                 lease_seconds: float = 300,
+                 max_attempts: int = 3):
+        """
+        :param path: database file, shared by all workers
+        :param shards: count of shards, it's stored with the queue on creation, 16 by default
+        :param lease_seconds: time for worker to complete leased job, after it job can be leased by others
+        :param max_attempts: count of failures after which job is marked failed
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._connection = _connect(path)
+        self._connection.executescript(SCHEMA)
+
+        with _Transaction(self._connection) as connection:
+            row = connection.execute("SELECT value FROM meta WHERE key = 'shards'").fetchone()
+            if row is None:
+                self.shards = shards or 16
+                connection.execute("INSERT INTO meta VALUES ('shards', ?)", (str(self.shards),))
+            else:
+                self.shards = int(row[0])
+        if shards is not None and shards != self.shards:
+            raise ValueError(f'Queue {path} has {self.shards} shards, not {shards}')
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> 'CrawlQueue':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def enqueue(self, owners: Iterable[Tuple[str, int]], dates: Iterable[AnyDate]) -> int:
+        """
+        Add jobs for all weeks of all owners, jobs that are already in queue are kept as they are
+
+        :param owners: ('group' | 'teacher' | 'auditory', ID) pairs
+        :param dates: any dates of weeks
+        :return: count of added jobs
+        """
+        weeks = sorted({week_start(date) for date in dates})
+        rows = ((kind, owner_id, week.isoformat(), shard_of(kind, owner_id, week, self.shards))
+                for kind, owner_id in owners for week in weeks)
+        with _Transaction(self._connection) as connection:
+            before = connection.total_changes
+            connection.executemany('INSERT OR IGNORE INTO jobs (kind, owner_id, week, shard) VALUES (?, ?, ?, ?)',
+                                   rows)
+            return connection.total_changes - before
+
+    def lease(self, worker: str, count: int, shards: Optional[Iterable[int]] = None) -> List[CrawlJob]:
+        """
+        Take pending jobs, jobs with expired leases are returned to queue first
+
+        :param worker: unique name of worker
+        :param shards: shards to take jobs from, all by default
+        """
+        now = time.time()
+        query = 'SELECT kind, owner_id, week, shard, attempts FROM jobs WHERE state = ? AND available_at <= ?'
+        params: List[Any] = [PENDING, now]
+        if shards is not None:
+            query, params = self._filter_shards(query, params, shards)
+        query += ' ORDER BY shard, week LIMIT ?'
+        params.append(count)
+
+        with _Transaction(self._connection) as connection:
+            # Expired lease counts as attempt, so job that crashes workers is not leased forever
+            connection.execute(
+                "UPDATE jobs SET state = CASE WHEN attempts + 1 >= ? THEN ? ELSE ? END, attempts = attempts + 1, "
+                "available_at = ?, lease_owner = NULL, lease_until = NULL, error = 'Lease expired' "
+                "WHERE state = ? AND lease_until < ?",
+                (self.max_attempts, FAILED, PENDING, now, LEASED, now)
+            )
+            rows = connection.execute(query, params).fetchall()
+            connection.executemany(
+                'UPDATE jobs SET state = ?, lease_owner = ?, lease_until = ? '
+                'WHERE kind = ? AND owner_id = ? AND week = ?',
+                ((LEASED, worker, now + self.lease_seconds, kind, owner_id, week) for kind, owner_id, week, *_ in rows)
+            )
+        return [CrawlJob(kind, owner_id, datetime.date.fromisoformat(week), shard, attempts)
+                for kind, owner_id, week, shard, attempts in rows]
+
+    def complete(self, job: CrawlJob, body: str) -> None:
+        """
+        Store response of job, it's stored even if lease has expired, responses of the same job are interchangeable
+        """
+        key = job.kind, job.owner_id, job.week.isoformat()
+        with _Transaction(self._connection) as connection:
+            connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)', (*key, body, time.time()))
+            connection.execute("UPDATE jobs SET state = ?, lease_owner = NULL, lease_until = NULL, error = NULL "
+                               "WHERE kind = ? AND owner_id = ? AND week = ?", (DONE, *key))
+
+    def fail(self, job: CrawlJob, worker: str, error: BaseException) -> None:
+        """
+        Return job to queue with backoff, or mark it failed after max_attempts.
+        Does nothing if job is leased by another worker already
+        """
+        attempts = job.attempts + 1
+        state = FAILED if attempts >= self.max_attempts else PENDING
+        available_at = time.time() + min(2 ** attempts, MAX_RETRY_DELAY)
+        with _Transaction(self._connection) as connection:
+            connection.execute(
+                'UPDATE jobs SET state = ?, attempts = ?, available_at = ?, lease_owner = NULL, lease_until = NULL, '
+                'error = ? WHERE kind = ? AND owner_id = ? AND week = ? AND state = ? AND lease_owner = ?',
+                (state, attempts, available_at, repr(error), job.kind, job.owner_id, job.week.isoformat(),
+                 LEASED, worker)
+            )
+
+    def retry_failed(self) -> int:
+        """
+        Return failed jobs to queue with attempts reset
+
+        :return: count of returned jobs
+        """
+        with _Transaction(self._connection) as connection:
+            return connection.execute('UPDATE jobs SET state = ?, attempts = 0, available_at = 0 WHERE state = ?',
+                                      (PENDING, FAILED)).rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Count of jobs by state
+        """
+        counts = dict.fromkeys((PENDING, LEASED, DONE, FAILED), 0)
+        counts.update(self._connection.execute('SELECT state, COUNT(*) FROM jobs GROUP BY state'))
+        return counts
+
+    def unfinished(self, shards: Optional[Iterable[int]] = None) -> int:
+        """
+        Count of pending and leased jobs
+
+        :param shards: shards to count jobs of, all by default
+        """
+        query, params = 'SELECT COUNT(*) FROM jobs WHERE state IN (?, ?)', [PENDING, LEASED]
+        if shards is not None:
+            query, params = self._filter_shards(query, params, shards)
+        return self._connection.execute(query, params).fetchone()[0]
+
+    @staticmethod
+    def _filter_shards(query: str, params: List[Any], shards: Iterable[int]) -> Tuple[str, List[Any]]:
+        shards = list(shards)
+        return query + f' AND shard IN ({", ".join("?" * len(shards))})', params + shards
+
+    def failed(self) -> List[Tuple[CrawlJob, str]]:
+        rows = self._connection.execute('SELECT kind, owner_id, week, shard, attempts, error FROM jobs '
+                                        'WHERE state = ?', (FAILED,))
+        return [(CrawlJob(kind, owner_id, datetime.date.fromisoformat(week), shard, attempts), error)
+                for kind, owner_id, week, shard, attempts, error in rows]
+
+    def results(self) -> Iterator[Tuple[Tuple[str, int, datetime.date], str]]:
+        """
+        Stored responses of all workers: ((kind, owner ID, week start), body)
+        """
+        for kind, owner_id, week, body in self._connection.execute(
+                'SELECT kind, owner_id, week, body FROM results ORDER BY kind, owner_id, week'):
+            yield (kind, owner_id, datetime.date.fromisoformat(week)), body
+
+    def schedules(self, api: Optional['PolyScheduleAPI'] = None) -> Iterator[types.Schedule]:
+        """
+        Parse stored responses one by one
+
+        :param api: api to bind schedules to
+        """
+        for _, body in self.results():
+            data = json.loads(body)
+            yield api.parse(types.Schedule, **data) if api is not None else types.Schedule(**data)
+
+
+class SharedRateLimiter:
+    """
+    Token bucket stored in crawl database, so all workers together make at most `rate` requests per second.
+    Can be used as api.rate_limiter
+    """
+
+    def __init__(self, path: str, rate: float, burst: int = 1, name: str = 'requests'):
+        if rate <= 0:
+            raise ValueError(f'rate must be positive, got {rate}')
+        self.rate = rate
+        self.burst = burst
+        self.name = name
+        self._connection = _connect(path)
+        self._connection.executescript(SCHEMA)
+        # Transaction waits for locks of other workers, so it's made out of event loop
+        self._executor = ThreadPoolExecutor(1)
+
+    async def acquire(self) -> None:
+        tokens = await asyncio.get_running_loop().run_in_executor(self._executor, self._reserve)
+        if tokens < 0:
+            await asyncio.sleep(-tokens / self.rate)
+
+    def _reserve(self) -> float:
+        # Wall clock time, monotonic clocks of different processes aren't comparable
+        now = time.time()
+        with _Transaction(self._connection) as connection:
+            row = connection.execute('SELECT tokens, updated FROM budget WHERE name = ?', (self.name,)).fetchone()
+            tokens, updated = row if row is not None else (float(self.burst), now)
+            # Token is reserved right away, like in RateLimiter
+            tokens = min(self.burst, tokens + max(now - updated, 0) * self.rate) - 1
+            connection.execute('INSERT OR REPLACE INTO budget VALUES (?, ?, ?)', (self.name, tokens, now))
+        return tokens
+
+    def close(self) -> None:
+        self._executor.shutdown()
+        self._connection.close()
+
+
+async def crawl(api: 'PolyScheduleAPI',
+                queue: CrawlQueue,
+                worker: Optional[str] = None,
+                shards: Optional[Iterable[int]] = None,
+                concurrency: int = 10,
+                rate_limit: Optional[float] = None,
+                validate: bool = True,
+                poll_interval: float = 1.0) -> Dict[str, int]:
+    """
+    Process jobs of queue until all of them are done or failed
+
+    Jobs leased by other workers are waited for, so jobs of crashed workers are taken when their leases expire.
+
+    :param worker: unique name of worker, host name and process ID by default
+    :param shards: shards to take jobs from, all by default
+    :param concurrency: count of simultaneous requests of this worker
+    :param rate_limit: max count of requests per second of all workers together,
+           api.rate_limiter is replaced with SharedRateLimiter during crawl
+    :param validate: parse responses before storing, so invalid ones are retried
+    :param poll_interval: seconds to wait when there's nothing to lease, but other workers have unfinished jobs
+    :return: count of fetched and stored responses
+    """
+    worker = worker or f'{socket.gethostname()}:{os.getpid()}'
+    shards = list(shards) if shards is not None else None
+    previous_rate_limiter = api.rate_limiter
+    rate_limiter = SharedRateLimiter(queue.path, rate_limit) if rate_limit is not None else None
+    if rate_limiter is not None:
+        api.rate_limiter = rate_limiter
+
+    loop = asyncio.get_running_loop()
+    # Transactions wait for locks of other workers, so they are made out of event loop, one at a time
+    executor = ThreadPoolExecutor(1)
+    # Failures being recorded, they are waited for before return
+    failures = set()
+
+    def run(func, *args):
+        return loop.run_in_executor(executor, func, *args)
+
+    async def jobs() -> AsyncIterator[CrawlJob]:
+        while True:
+            leased = await run(queue.lease, worker, concurrency * 2, shards)
+            for job in leased:
+                yield job
+            if leased:
+                continue
+            if not await run(queue.unfinished, shards):
+                return
+            await asyncio.sleep(poll_interval)
+
+    async def fetch(job: CrawlJob) -> Tuple[CrawlJob, str]:
+        method = getattr(api.methods, f'GET_{job.kind.upper()}_SCHEDULE')
+        body = await api.request_body(method, check=not validate, **{f'{job.kind}_id': job.owner_id, 'date': job.week})
+        if validate:
+            schedule = await api.parse_body(body, types.Schedule, method=method)
+            if api.schedule_or_none(schedule) is None:
+                raise ValueError(f'Unexpected response: {schedule}')
+        return job, body
+
+    async def store(fetched: Tuple[CrawlJob, str]) -> None:
+        await run(queue.complete, *fetched)
+
+    async def record_failure(job: CrawlJob, error: Exception) -> None:
+        try:
+            await run(queue.fail, job, worker, error)
+        except Exception as e:
+            # Job is leased again when its lease expires
+            log.error('Unable to record failure of %s: %r', job, e)
+
+    def on_error(stage: str, item: Any, error: Exception):
+        job = item[0] if stage == 'store' else item
+        log.warning('Unable to %s %s: %r', stage, job, error)
+        failure = loop.create_task(record_failure(job, error))
+        failures.add(failure)
+        failure.add_done_callback(failures.discard)
+
+    pipeline = Pipeline(jobs(), queue_size=concurrency, on_error=on_error)
+    pipeline.stage(fetch, concurrency, name='fetch')
+    pipeline.stage(store, name='store')
+    try:
+        return await pipeline.run()
+    finally:
+        await asyncio.gather(*failures)
+        if rate_limiter is not None:
+            api.rate_limiter = previous_rate_limiter
+            await run(rate_limiter.close)
+        # All calls are awaited already, unless crawl is cancelled, then the running one isn't waited for
+        executor.shutdown(wait=False)
@@ -96,3 +96,15 @@ class LocalNotFoundError(NotFoundError):
 
 class DayNotFoundByDate(LocalNotFoundError):
     pass
+
+
+class ScheduleNotFoundInSnapshot(LocalNotFoundError):
+    pass
+
+
+class SnapshotError(BaseUniScheduleError):
+    pass
+
+
+class RequestDeadlineExceeded(BaseUniScheduleError):
+    pass
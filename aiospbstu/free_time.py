@@ -0,0 +1,186 @@
+"""
+Search of time when all given groups, teachers and auditories are free
+
+Schedules are fetched concurrently through api (so cache and coalescing apply),
+busy intervals of all owners are merged with a sweep line per day,
+and free windows long enough for a lesson are ranked:
+windows next to lessons participants already have on that day go first, then the earliest ones.
+
+Example:
+.. code-block:: python3
+    slots = await find_free_slots(api, group_ids=[29486, 29487], teacher_ids=[1234], auditory_ids=[5678],
+                                  date_from=datetime.date(2019, 10, 7), date_to=datetime.date(2019, 10, 20))
+    best = slots[0]
+    print(best.date, best.time_start, best.time_end)
+
+"""
+
+import asyncio
+import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, TYPE_CHECKING
+
+from .types import Weekday
+from .utils.date import WEEK, today, weeks
+
+if TYPE_CHECKING:
+    from .api import PolyScheduleAPI
+
+__all__ = ['FreeSlot', 'find_free_slots', 'free_intervals']
+
+Owner = Tuple[str, int]
+# Minutes since midnight
+Interval = Tuple[int, int]
+
+# Penalty for a participant that has no lessons on that day and has to come only for this one, in minutes
+EXTRA_TRIP_PENALTY = 4 * 60
+
+
+class FreeSlot(NamedTuple):
+    date: datetime.date
+    time_start: datetime.time
+    time_end: datetime.time
+    # Whole free window the slot is in
+    window_start: datetime.time
+    window_end: datetime.time
+    # Less is better, see find_free_slots()
+    score: int
+
+    @property
+    def weekday(self) -> Weekday:
+        return Weekday(self.date.weekday())
+
+
+def _minutes(time: datetime.time) -> int:
+    return time.hour * 60 + time.minute
+
+
+def _time(minutes: int) -> datetime.time:
+    return datetime.time(minutes // 60, minutes % 60)
+
+
+def free_intervals(busy: Iterable[Interval], start: int, end: int) -> List[Interval]:
+    """
+    Sweep line over busy intervals of all owners
+
+    :param busy: (start, end) intervals, may overlap
+    :param start: beginning of the period to search in
+    :param end: end of the period to search in
+    :return: sorted intervals of the period not covered by any busy interval
+    """
+    events = []
+    for busy_start, busy_end in busy:
+        if busy_start < busy_end:
+            events.append((busy_start, 1))
+            events.append((busy_end, -1))
+    # Ends go before starts at the same moment, so back-to-back lessons leave no gap
+    events.sort(key=lambda event: (event[0], event[1]))
+
+    free = []
+    active, cursor = 0, start
+    for moment, delta in events:
+        if active == 0 and delta == 1:
+            interval = max(cursor, start), min(moment, end)
+            if interval[0] < interval[1]:
+                free.append(interval)
+        active += delta
+        if active == 0:
+            cursor = max(cursor, moment)
+    if active == 0 and max(cursor, start) < end:
+        free.append((max(cursor, start), end))
+    return free
+
+
+async def _fetch_busy(api: 'PolyScheduleAPI',
+                      owner: Owner,
+                      weeks: List[datetime.date]) -> Dict[datetime.date, List[Interval]]:
+    kind, owner_id = owner
+    getter = getattr(api, f'get_{kind}_schedule')
+    schedules = await asyncio.gather(*(getter(owner_id, week) for week in weeks))
+
+    busy: Dict[datetime.date, List[Interval]] = {}
+    for schedule in filter(None, map(api.schedule_or_none, schedules)):
+        for day in schedule.days:
+            busy.setdefault(day.date, []).extend(
+                (_minutes(lesson.time_start), _minutes(lesson.time_end)) for lesson in day.lessons
+            )
+    return busy
+
+
+def _score(slot: Interval, owners_busy: List[List[Interval]]) -> int:
+    """
+    Sum of gaps between slot and the nearest lesson of every participant on that day
+    """
+    score = 0
+    for busy in owners_busy:
+        if not busy:
+            score += EXTRA_TRIP_PENALTY
+            continue
+        score += min(max(slot[0] - busy_end, busy_start - slot[1], 0) for busy_start, busy_end in busy)
+    return score
+
+
+async def find_free_slots(api: 'PolyScheduleAPI',
+                          group_ids: Iterable[int] = (),
+                          teacher_ids: Iterable[int] = (),
+                          auditory_ids: Iterable[int] = (),
+                          date_from: Optional[datetime.date] = None,
+                          date_to: Optional[datetime.date] = None,
+                          duration: datetime.timedelta = datetime.timedelta(minutes=100),
+                          day_start: datetime.time = datetime.time(8, 0),
+                          day_end: datetime.time = datetime.time(21, 0),
+                          weekdays: Iterable[Weekday] = tuple(Weekday)[:6],
+                          limit: Optional[int] = 10) -> List[FreeSlot]:
+    """
+    Find time when all owners are free
+
+    Every free window long enough gives one slot, placed at the edge of the window closer to lessons
+    of participants. Slots are ranked by sum of gaps between slot and participants' lessons on that day
+    (participant without lessons on that day adds EXTRA_TRIP_PENALTY), then by date and time.
+
+    :param date_from: first date to search, today by default
+    :param date_to: last date to search, a week after date_from by default
+    :param duration: length of slot
+    :param day_start: slots don't begin earlier
+    :param day_end: slots don't end later
+    :param weekdays: days of week to search
+    :param limit: max count of slots to return, None for all of them
+    """
+    owners: List[Owner] = [
+        *(('group', group_id) for group_id in group_ids),
+        *(('teacher', teacher_id) for teacher_id in teacher_ids),
+        *(('auditory', auditory_id) for auditory_id in auditory_ids),
+    ]
+    if not owners:
+        raise ValueError('At least one group, teacher or auditory is required')
+
+    date_from = date_from or today()
+    date_to = date_to or date_from + WEEK - datetime.timedelta(days=1)
+    if date_to < date_from:
+        raise ValueError(f'date_to ({date_to}) is earlier than date_from ({date_from})')
+
+    week_starts = list(weeks(date_from, date_to))
+    busy_by_owner = await asyncio.gather(*(_fetch_busy(api, owner, week_starts) for owner in owners))
+
+    weekdays = set(weekdays)
+    length = int(duration.total_seconds() // 60)
+    start, end = _minutes(day_start), _minutes(day_end)
+
+    slots = []
+    date = date_from
+    while date <= date_to:
+        if date.weekday() in weekdays:
+            owners_busy = [busy.get(date, []) for busy in busy_by_owner]
+            for window_start, window_end in free_intervals((interval for busy in owners_busy for interval in busy),
+                                                           start, end):
+                if window_end - window_start < length:
+                    continue
+                # Slot sticks to the end of window if lessons are after it
+                candidates = ((window_start, window_start + length), (window_end - length, window_end))
+                slot_start, slot_end = min(candidates, key=lambda slot: _score(slot, owners_busy))
+                slots.append(FreeSlot(date=date, time_start=_time(slot_start), time_end=_time(slot_end),
+                                      window_start=_time(window_start), window_end=_time(window_end),
+                                      score=_score((slot_start, slot_end), owners_busy)))
+        date += datetime.timedelta(days=1)
+
+    slots.sort(key=lambda slot: (slot.score, slot.date, slot.time_start))
+    return slots if limit is None else slots[:limit]
@@ -0,0 +1,259 @@
+"""
+Local iCalendar (RFC 5545) generation from schedules
+
+Unlike Schedule.ical_url, it needs no extra requests and works for auditories too.
+Every lesson gets UID that stays the same while lesson's owner, date, start time, subject and type
+are the same, so calendar clients update changed lessons instead of duplicating them.
+
+Calendars are generated line by line, so calendars of hundreds of owners are streamed
+without building them in memory, and CalendarState produces only changed events for subscription endpoints.
+
+Example:
+.. code-block:: python3
+    schedule = await api.get_group_schedule(29486)
+    text = schedule.to_ical()
+
+    # Calendar of many owners for several weeks
+    async for chunk in stream_calendar(api, [('group', 29486), ('auditory', 1234)], dates):
+        await response.write(chunk.encode())
+
+    # Only events that changed since previous call
+    state = CalendarState()
+    text = ''.join(state.update(schedules))
+
+"""
+
+import datetime
+import hashlib
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+from . import types
+from .types import AnyDate
+from .utils.date import week_start
+
+if TYPE_CHECKING:
+    from .api import PolyScheduleAPI
+
+__all__ = ['CalendarState', 'iter_calendar', 'iter_events', 'lesson_uid', 'stream_calendar']
+
+Owner = Tuple[str, int]
+
+PRODID = '-//aiospbstu//RUZ schedule//RU'
+TZID = 'Europe/Moscow'
+UID_DOMAIN = 'ruz.spbstu.ru'
+
+VTIMEZONE = (
+    'BEGIN:VTIMEZONE',
+    f'TZID:{TZID}',
+    'BEGIN:STANDARD',
+    'DTSTART:19700101T000000',
+    'TZOFFSETFROM:+0300',
+    'TZOFFSETTO:+0300',
+    'TZNAME:MSK',
+    'END:STANDARD',
+    'END:VTIMEZONE',
+)
+
+
+def _escape(text: str) -> str:
+    return (text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _fold(line: str) -> str:
+    """
+    Split content line into lines of at most 75 octets, continuation lines start with space
+    """
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + '\r\n'
+
+    parts = []
+    start, limit = 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Don't split multibyte utf-8 characters
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode())
+        start, limit = end, 74
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _datetime(date: datetime.date, time: datetime.time) -> str:
+    return datetime.datetime.combine(date, time).strftime('%Y%m%dT%H%M%S')
+
+
+def _owner(schedule: types.Schedule) -> Owner:
+    owner = schedule.owner
+    if owner is None:
+        raise ValueError(f'Schedule for week {schedule.week.date_start} has no owner')
+    kind = schedule.owner_type
+    return kind, owner.auditory_id if kind == 'auditory' else owner.id
+
+
+def lesson_uid(kind: str, owner_id: int, date: datetime.date, lesson: types.Lesson) -> str:
+    key = f'{kind}:{owner_id}:{date.isoformat()}:{lesson.time_start}:{lesson.subject}:{lesson.lesson_type}'
+    return f'{hashlib.sha1(key.encode()).hexdigest()}@{UID_DOMAIN}'
+
+
+def _event_lines(uid: str, date: datetime.date, lesson: types.Lesson) -> List[str]:
+    summary = lesson.subject
+    if lesson.type_obj is not None:
+        summary += f' ({lesson.type_obj.name})'
+
+    description = []
+    if lesson.teachers:
+        description.append(', '.join(teacher.full_name for teacher in lesson.teachers))
+    if lesson.groups:
+        description.append(', '.join(group.name for group in lesson.groups))
+    if lesson.additional_info:
+        description.append(lesson.additional_info)
+
+    lines = [
+        f'UID:{uid}',
+        f'DTSTART;TZID={TZID}:{_datetime(date, lesson.time_start)}',
+        f'DTEND;TZID={TZID}:{_datetime(date, lesson.time_end)}',
+        f'SUMMARY:{_escape(summary)}',
+    ]
+    if lesson.auditories:
+        location = '; '.join(f'{auditory.building.name}, {auditory.name}' for auditory in lesson.auditories)
+        lines.append(f'LOCATION:{_escape(location)}')
+    if description:
+        lines.append(f'DESCRIPTION:{_escape(chr(10).join(description))}')
+    return lines
+
+
+def _events(schedule: types.Schedule) -> Iterator[Tuple[str, List[str]]]:
+    kind, owner_id = _owner(schedule)
+    for day in schedule.days:
+        for lesson in day.lessons:
+            uid = lesson_uid(kind, owner_id, day.date, lesson)
+            yield uid, _event_lines(uid, day.date, lesson)
+
+
+def _vevent(lines: List[str], stamp: str, sequence: int = 0, cancelled: bool = False) -> str:
+    content = ['BEGIN:VEVENT', *lines, f'DTSTAMP:{stamp}']
+    if sequence:
+        content.append(f'SEQUENCE:{sequence}')
+    if cancelled:
+        content.append('STATUS:CANCELLED')
+    content.append('END:VEVENT')
+    return ''.join(map(_fold, content))
+
+
+def _stamp(now: Optional[datetime.datetime]) -> str:
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    return now.astimezone(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _header(name: Optional[str], method: Optional[str] = None) -> str:
+    lines = ['BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODID}', 'CALSCALE:GREGORIAN']
+    if method:
+        lines.append(f'METHOD:{method}')
+    if name:
+        lines.append(f'X-WR-CALNAME:{_escape(name)}')
+    lines.append(f'X-WR-TIMEZONE:{TZID}')
+    lines.extend(VTIMEZONE)
+    return ''.join(map(_fold, lines))
+
+
+FOOTER = 'END:VCALENDAR\r\n'
+
+
+def iter_events(schedules: Iterable[types.Schedule], now: Optional[datetime.datetime] = None) -> Iterator[str]:
+    """
+    Generate VEVENT components of lessons, one string per event
+    """
+    stamp = _stamp(now)
+    for schedule in schedules:
+        for _, lines in _events(schedule):
+            yield _vevent(lines, stamp)
+
+
+def iter_calendar(schedules: Iterable[types.Schedule],
+                  name: Optional[str] = None,
+                  now: Optional[datetime.datetime] = None) -> Iterator[str]:
+    """
+    Generate calendar with lessons of schedules chunk by chunk, schedules may be a lazy iterable
+
+    :param name: calendar name shown by clients
+    :param now: DTSTAMP of events, current time by default
+    """
+    yield _header(name)
+    yield from iter_events(schedules, now)
+    yield FOOTER
+
+
+async def stream_calendar(api: 'PolyScheduleAPI',
+                          owners: Iterable[Owner],
+                          dates: Iterable[AnyDate],
+                          name: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Fetch schedules owner by owner and generate one calendar from them,
+    only schedules of one owner are kept in memory at once
+
+    :param owners: ('group' | 'teacher' | 'auditory', ID) pairs
+    :param dates: any dates of weeks to include
+    """
+    dates = list(dates)
+    stamp = datetime.datetime.now(datetime.timezone.utc)
+    yield _header(name)
+    for kind, owner_id in owners:
+        getter = getattr(api, f'get_{kind}_schedule')
+        for date in dates:
+            schedule = api.schedule_or_none(await getter(owner_id, date))
+            if schedule is not None:
+                for event in iter_events((schedule,), stamp):
+                    yield event
+    yield FOOTER
+
+
+class CalendarState:
+    """
+    Remembers events sent to subscriber, so next time only changed ones are sent
+
+    State is a plain dict of UID to (content hash, sequence, DTSTART), it can be stored between requests.
+    """
+
+    def __init__(self, events: Optional[Dict[str, Tuple[str, int, str]]] = None):
+        self.events: Dict[str, Tuple[str, int, str]] = {uid: tuple(event) for uid, event in (events or {}).items()}
+
+    def update(self,
+               schedules: Iterable[types.Schedule],
+               name: Optional[str] = None,
+               now: Optional[datetime.datetime] = None) -> Iterator[str]:
+        """
+        Generate calendar with new and changed events and cancellations of removed ones,
+        removed events are searched only in weeks of given schedules
+
+        :return: calendar chunks, state is updated while they are consumed
+        """
+        stamp = _stamp(now)
+        yield _header(name, method='PUBLISH')
+
+        weeks = set()
+        seen = set()
+        for schedule in schedules:
+            weeks.add(schedule.week.date_start)
+            for uid, lines in _events(schedule):
+                seen.add(uid)
+                content_hash = hashlib.sha1(''.join(lines).encode()).hexdigest()
+                previous_hash, sequence, _ = self.events.get(uid, (None, -1, None))
+                if content_hash == previous_hash:
+                    continue
+                sequence += 1
+                self.events[uid] = content_hash, sequence, lines[1].partition(':')[2]
+                yield _vevent(lines, stamp, sequence)
+
+        for uid, (_, sequence, start) in list(self.events.items()):
+            if uid in seen:
+                continue
+            date = datetime.datetime.strptime(start, '%Y%m%dT%H%M%S').date()
+            if week_start(date) not in weeks:
+                continue
+            del self.events[uid]
+            lines = [f'UID:{uid}', f'DTSTART;TZID={TZID}:{start}']
+            yield _vevent(lines, stamp, sequence + 1, cancelled=True)
+
+        yield FOOTER
@@ -0,0 +1,214 @@
+"""
+Streaming pipelines with backpressure
+
+Pipeline passes items from source through stages, every stage has its own workers
+and a bounded queue in front of it, so a slow stage makes previous ones wait instead of
+piling results up in memory. Memory use depends on queue sizes and concurrency only,
+not on count of items.
+
+sync_schedules() is a ready pipeline: fetch response bodies → parse them to Schedule → user's sink.
+
+Example:
+.. code-block:: python3
+    async def save(schedule: Schedule):
+        await db.save(schedule)
+
+    stats = await sync_schedules(api, [('group', group_id) for group_id in group_ids], weeks, save,
+                                 fetch_concurrency=20)
+
+"""
+
+import asyncio
+import inspect
+import logging
+from typing import (Any, AsyncIterable, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple,
+                    Union, TYPE_CHECKING)
+
+from . import types
+from .types import AnyDate
+from .utils.date import week_start
+
+if TYPE_CHECKING:
+    from .api import PolyScheduleAPI
+
+log = logging.getLogger('aiospbstu')
+
+__all__ = ['Pipeline', 'ScheduleJob', 'sync_schedules']
+
+ErrorHandler = Callable[[str, Any, Exception], Any]
+
+
+class _Done:
+    """
+    Marks end of stage input
+    """
+
+
+class _Stage(NamedTuple):
+    name: str
+    func: Callable[[Any], Awaitable[Any]]
+    concurrency: int
+
+
+class Pipeline:
+
+    def __init__(self,
+                 source: Union[Iterable[Any], AsyncIterable[Any]],
+                 queue_size: int = 100,
+                 on_error: Optional[ErrorHandler] = None):
+        """
+        :param source: items to process, may be lazy
+        :param queue_size: max count of items waiting in front of every stage
+        :param on_error: called with stage name, item and exception when stage fails to process item,
+               the item is dropped then. By default the first exception stops pipeline and is raised
+        """
+        self.source = source
+        self.queue_size = queue_size
+        self.on_error = on_error
+        self._stages: List[_Stage] = []
+        self.processed: Dict[str, int] = {}
+        self.failed: Dict[str, int] = {}
+
+    def stage(self,
+              func: Callable[[Any], Awaitable[Any]],
+              concurrency: int = 1,
+              name: Optional[str] = None) -> 'Pipeline':
+        """
+        Add stage, its result is passed to the next stage, None results are dropped
+
+        :param func: coroutine function processing one item
+        :param concurrency: count of items processed at once
+        :param name: name for stats and errors, func name by default
+        """
+        if concurrency < 1:
+            raise ValueError(f'concurrency must be positive, got {concurrency}')
+        name = name or getattr(func, '__name__', f'stage_{len(self._stages)}')
+        self._stages.append(_Stage(name, func, concurrency))
+        self.processed[name] = self.failed[name] = 0
+        return self
+
+    async def run(self) -> Dict[str, int]:
+        """
+        Process all items of source
+
+        :return: count of items processed by every stage
+        """
+        if not self._stages:
+            raise ValueError('Pipeline has no stages')
+
+        queues = [asyncio.Queue(self.queue_size) for _ in self._stages]
+        tasks = [asyncio.ensure_future(self._feed(queues[0]))]
+        for index, stage in enumerate(self._stages):
+            output = queues[index + 1] if index + 1 < len(queues) else None
+            # Workers of stage finish together, the last of them tells the next stage that input is over
+            finished = [0]
+            tasks.extend(asyncio.ensure_future(self._work(index, queues[index], output, finished))
+                         for _ in range(stage.concurrency))
+
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return dict(self.processed)
+
+    async def _feed(self, queue: asyncio.Queue) -> None:
+        if inspect.isasyncgen(self.source) or hasattr(self.source, '__aiter__'):
+            async for item in self.source:
+                await queue.put(item)
+        else:
+            for item in self.source:
+                await queue.put(item)
+        for _ in range(self._stages[0].concurrency):
+            await queue.put(_Done)
+
+    async def _work(self, index: int, queue: asyncio.Queue, output: Optional[asyncio.Queue], finished: List[int]):
+        stage = self._stages[index]
+        while True:
+            item = await queue.get()
+            if item is _Done:
+                break
+
+            try:
+                result = await stage.func(item)
+            except Exception as e:
+                self.failed[stage.name] += 1
+                if self.on_error is None:
+                    raise
+                self.on_error(stage.name, item, e)
+                continue
+
+            self.processed[stage.name] += 1
+            if output is not None and result is not None:
+                await output.put(result)
+
+        finished[0] += 1
+        if output is not None and finished[0] == stage.concurrency:
+            for _ in range(self._stages[index + 1].concurrency):
+                await output.put(_Done)
+
+
+class ScheduleJob(NamedTuple):
+    kind: str
+    owner_id: int
+    date: AnyDate
+
+
+class _Fetched(NamedTuple):
+    job: ScheduleJob
+    body: str
+
+
+async def sync_schedules(api: 'PolyScheduleAPI',
+                         owners: Iterable[Tuple[str, int]],
+                         dates: Iterable[AnyDate],
+                         sink: Callable[[types.Schedule], Awaitable[Any]],
+                         fetch_concurrency: int = 10,
+                         parse_concurrency: int = 1,
+                         sink_concurrency: int = 1,
+                         queue_size: int = 100,
+                         on_error: Optional[ErrorHandler] = None) -> Dict[str, int]:
+    """
+    Fetch, parse and pass to sink schedules of all owners for all dates, stages run concurrently
+
+    Responses are fetched with api.request_body, so cache, coalescing and scheduler of api apply,
+    and parsed with api.parse_body, so large ones go to parse_executor if it's set
+    and are decoded only there. Such bodies are not cached.
+
+    :param owners: ('group' | 'teacher' | 'auditory', ID) pairs, may be lazy
+    :param dates: any dates of weeks to sync
+    :param sink: coroutine function that stores schedule
+    :param on_error: see Pipeline, by default errors are logged and failed schedules are skipped
+    :return: count of fetched, parsed and stored schedules
+    """
+    dates = [week_start(date) for date in dates]
+
+    def jobs():
+        for kind, owner_id in owners:
+            for date in dates:
+                yield ScheduleJob(kind, owner_id, date)
+
+    async def fetch(job: ScheduleJob) -> _Fetched:
+        method = getattr(api.methods, f'GET_{job.kind.upper()}_SCHEDULE')
+        params = {f'{job.kind}_id': job.owner_id, 'date': job.date}
+        # Body is checked by parse_body
+        return _Fetched(job, await api.request_body(method, check=False, **params))
+
+    async def parse(fetched: _Fetched) -> Optional[types.Schedule]:
+        method = getattr(api.methods, f'GET_{fetched.job.kind.upper()}_SCHEDULE')
+        return api.schedule_or_none(await api.parse_body(fetched.body, types.Schedule, method=method))
+
+    def log_error(stage: str, item: Any, error: Exception):
+        if isinstance(item, _Fetched):
+            item = item.job
+        elif isinstance(item, types.Schedule):
+            item = f'{item.owner_type} {item.owner} schedule for {item.week.date_start}'
+        log.warning('Unable to %s %s: %r', stage, item, error)
+
+    pipeline = Pipeline(jobs(), queue_size=queue_size, on_error=on_error or log_error)
+    pipeline.stage(fetch, fetch_concurrency, name='fetch')
+    pipeline.stage(parse, parse_concurrency, name='parse')
+    pipeline.stage(sink, sink_concurrency, name='sink')
+    return await pipeline.run()
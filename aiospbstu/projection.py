@@ -0,0 +1,139 @@
+"""
+Partial parsing of responses
+
+Projection names fields that are needed, only they (and fields of nested objects under them)
+are validated and turned into objects, everything else in response is skipped.
+Teacher schedules have dozens of groups with faculties in every lesson, so when only subjects
+and times are needed, most of parsing work and memory is saved.
+
+Projection is either a list of dotted paths or a nested mapping, ``...`` means the whole field:
+
+.. code-block:: python3
+    schedule = await api.get_teacher_schedule(teacher_id, fields=['week', 'days.date',
+                                                                  'days.lessons.subject',
+                                                                  'days.lessons.time_start',
+                                                                  'days.lessons.time_end'])
+    # The same
+    schedule = await api.get_teacher_schedule(teacher_id, fields={
+        'week': ...,
+        'days': {'date': ..., 'lessons': {'subject': ..., 'time_start': ..., 'time_end': ...}},
+    })
+
+Fields that are not in projection are not set, accessing them raises AttributeError.
+
+"""
+
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Type, TypeVar, Union, get_args, get_origin
+
+from pydantic import BaseModel, ValidationError
+
+from .types.base import BaseScheduleObject
+
+__all__ = ['Projection', 'normalize_projection', 'parse_projected']
+
+T = TypeVar('T', bound=BaseScheduleObject)
+
+Projection = Union[Iterable[str], Mapping[str, Any]]
+# Field name to projection of its nested object, None for the whole field
+NormalizedProjection = Dict[str, Optional['NormalizedProjection']]
+
+
+def _nested_model(annotation: Any) -> Tuple[Optional[Type[BaseModel]], bool]:
+    """
+    Model of object field and whether field is a list of such objects
+    """
+    origin = get_origin(annotation)
+    if origin is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        return _nested_model(args[0]) if len(args) == 1 else (None, False)
+    if origin in (list, List):
+        model, _ = _nested_model(get_args(annotation)[0])
+        return model, True
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    return None, False
+
+
+def normalize_projection(model: Type[BaseModel], fields: Projection) -> NormalizedProjection:
+    """
+    Convert projection to nested dict and check that all fields exist
+
+    :raises ValueError: if model has no such field or field isn't an object
+    """
+    if isinstance(fields, Mapping):
+        items = fields.items()
+    else:
+        tree: Dict[str, Any] = {}
+        for path in fields:
+            node = tree
+            *parents, name = path.split('.')
+            for parent in parents:
+                node = node.setdefault(parent, {})
+                if node is ...:
+                    break
+            else:
+                # Whole field wins over its nested fields
+                node[name] = ...
+        items = tree.items()
+
+    normalized: NormalizedProjection = {}
+    for name, nested in items:
+        field = model.model_fields.get(name)
+        if field is None:
+            raise ValueError(f'{model.__name__} has no field "{name}"')
+        if nested is ... or nested is True:
+            normalized[name] = None
+            continue
+        nested_model, _ = _nested_model(field.annotation)
+        if nested_model is None:
+            raise ValueError(f'Field "{name}" of {model.__name__} is not an object, it can be projected only whole')
+        normalized[name] = normalize_projection(nested_model, nested)
+    return normalized
+
+
+def parse_projected(model: Type[T], data: Mapping[str, Any], fields: Projection) -> T:
+    """
+    Create object only with fields of projection, without validating the rest of data
+
+    :raises pydantic.ValidationError: if projected fields are invalid
+    """
+    return _parse(model, data, normalize_projection(model, fields))
+
+
+def _parse(model: Type[T], data: Mapping[str, Any], projection: NormalizedProjection) -> T:
+    # Object is bound to parsing api by model_post_init, fields are set one by one
+    obj = model.model_construct()
+    obj.__dict__.clear()
+    validator = model.__pydantic_validator__
+
+    for name, nested in projection.items():
+        field = model.model_fields[name]
+        alias = field.alias or name
+        if alias not in data:
+            if field.is_required():
+                raise ValidationError.from_exception_data(
+                    model.__name__, [{'type': 'missing', 'loc': (alias,), 'input': data}]
+                )
+            obj.__dict__[name] = field.get_default(call_default_factory=True)
+            continue
+
+        value = data[alias]
+        if nested is None:
+            # Compiled validator of the field, with its validators
+            validator.validate_assignment(obj, name, value)
+            continue
+
+        if value is not None:
+            # Nested objects are created from projection, but validators of the field itself
+            # (e.g. merging of duplicated lessons) still need raw data
+            for decorator in model.__pydantic_decorators__.field_validators.values():
+                if name in decorator.info.fields and decorator.info.mode == 'before':
+                    value = decorator.func(value)
+            nested_model, is_list = _nested_model(field.annotation)
+            if is_list:
+                value = [_parse(nested_model, item, nested) for item in value]
+            else:
+                value = _parse(nested_model, value, nested)
+        obj.__dict__[name] = value
+        obj.__pydantic_fields_set__.add(name)
+    return obj
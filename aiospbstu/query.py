@@ -0,0 +1,293 @@
+"""
+In-memory store of lessons with secondary indexes
+
+Lessons of fetched schedules are stored once, even if they are in schedules of several owners,
+and indexed by date, type, type object, teacher, group, faculty, auditory, building and parity.
+Queries are composed from conditions and executed starting from the most selective index,
+so answering "all exams of faculty X next month" doesn't scan all lessons.
+
+Example:
+.. code-block:: python3
+    store = LessonStore()
+    for schedule in schedules:
+        store.add_schedule(schedule)
+
+    exams = store.query().where(faculty=95, lesson_type=LessonType.exam).between(date_from, date_to).all()
+    lectures = store.query().where(teacher=1234, building=11).filter(lambda record: record.lesson.parity == 1)
+
+"""
+
+import bisect
+import datetime
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from . import types
+from .utils.date import iso_date
+
+__all__ = ['LessonRecord', 'LessonStore', 'Query']
+
+Source = Tuple[str, int, datetime.date]
+
+
+class LessonRecord(NamedTuple):
+    date: datetime.date
+    lesson: types.Lesson
+
+    @property
+    def datetime_start(self) -> datetime.datetime:
+        return datetime.datetime.combine(self.date, self.lesson.time_start)
+
+    @property
+    def datetime_end(self) -> datetime.datetime:
+        return datetime.datetime.combine(self.date, self.lesson.time_end)
+
+
+FIELD_VALUES: Dict[str, Callable[[LessonRecord], Iterable[Hashable]]] = {
+    'date': lambda record: (record.date,),
+    'lesson_type': lambda record: (record.lesson.lesson_type,),
+    'type_obj': lambda record: (record.lesson.type_obj.id,) if record.lesson.type_obj is not None else (),
+    'teacher': lambda record: [teacher.id for teacher in record.lesson.teachers or ()],
+    'group': lambda record: [group.id for group in record.lesson.groups],
+    'faculty': lambda record: {group.faculty.id for group in record.lesson.groups},
+    'auditory': lambda record: [auditory.auditory_id for auditory in record.lesson.auditories],
+    'building': lambda record: {auditory.building.id for auditory in record.lesson.auditories},
+    'parity': lambda record: (record.lesson.parity,),
+}
+
+
+def _record_key(record: LessonRecord) -> Hashable:
+    # Different lessons may take place at the same time in the same room (e.g. PE of several groups),
+    # so participants are part of the key
+    lesson = record.lesson
+    return (record.date, lesson.time_start, lesson.time_end, lesson.subject, lesson.lesson_type,
+            lesson.type_obj.id if lesson.type_obj is not None else None,
+            tuple(sorted(auditory.auditory_id for auditory in lesson.auditories)),
+            tuple(sorted(group.id for group in lesson.groups)),
+            tuple(sorted(teacher.id for teacher in lesson.teachers or ())))
+
+
+class LessonStore:
+    """
+    Lessons of many schedules, adding a week of an owner again replaces its previous lessons
+    """
+    FIELDS = tuple(FIELD_VALUES)
+
+    def __init__(self):
+        self._records: Dict[int, LessonRecord] = {}
+        self._keys: Dict[Hashable, int] = {}
+        # Owner weeks lessons came from, lesson is removed when the last of them is removed
+        self._sources: Dict[int, Set[Source]] = {}
+        self._source_records: Dict[Source, Set[int]] = {}
+        self._indexes: Dict[str, Dict[Hashable, Set[int]]] = {field: {} for field in self.FIELDS}
+        # Sorted dates for range queries
+        self._dates: List[datetime.date] = []
+        self._next_id = 0
+        self._listeners: List[Any] = []
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[LessonRecord]:
+        return iter(self._records.values())
+
+    def add_schedule(self, schedule: types.Schedule) -> None:
+        owner = schedule.owner
+        if owner is None:
+            raise ValueError(f'Schedule for week {schedule.week.date_start} has no owner')
+        kind = schedule.owner_type
+        source = kind, owner.auditory_id if kind == 'auditory' else owner.id, schedule.week.date_start
+
+        self.remove_source(source)
+        records = self._source_records[source] = set()
+        for day in schedule.days:
+            for lesson in day.lessons:
+                records.add(self._add_record(LessonRecord(day.date, lesson), source))
+
+    def remove_source(self, source: Source) -> None:
+        """
+        Remove lessons added from week of owner, unless they are in other schedules too
+
+        :param source: ('group' | 'teacher' | 'auditory', owner ID, week start)
+        """
+        for record_id in self._source_records.pop(source, ()):
+            sources = self._sources[record_id]
+            sources.discard(source)
+            if not sources:
+                self._remove_record(record_id)
+
+    def query(self) -> 'Query':
+        return Query(self)
+
+    def add_listener(self, listener: Any) -> None:
+        """
+        Listener's record_added(record) and record_removed(record) are called on every change of stored lessons,
+        it gets all already stored lessons first
+        """
+        self._listeners.append(listener)
+        for record in self._records.values():
+            listener.record_added(record)
+
+    def remove_listener(self, listener: Any) -> None:
+        self._listeners.remove(listener)
+
+    def candidates(self, field: str, values: Iterable[Hashable]) -> Set[int]:
+        index = self._indexes[field]
+        found: Set[int] = set()
+        for value in values:
+            found |= index.get(value, set())
+        return found
+
+    def estimate(self, field: str, values: Iterable[Hashable]) -> int:
+        index = self._indexes[field]
+        return sum(len(index.get(value, ())) for value in values)
+
+    def dates_between(self,
+                      date_from: Optional[datetime.date],
+                      date_to: Optional[datetime.date]) -> List[datetime.date]:
+        start = 0 if date_from is None else bisect.bisect_left(self._dates, date_from)
+        end = len(self._dates) if date_to is None else bisect.bisect_right(self._dates, date_to)
+        return self._dates[start:end]
+
+    def get(self, record_id: int) -> LessonRecord:
+        return self._records[record_id]
+
+    def ids(self) -> Set[int]:
+        return set(self._records)
+
+    def _add_record(self, record: LessonRecord, source: Source) -> int:
+        key = _record_key(record)
+        record_id = self._keys.get(key)
+        if record_id is not None:
+            self._sources[record_id].add(source)
+            return record_id
+
+        record_id = self._next_id
+        self._next_id += 1
+        self._records[record_id] = record
+        self._keys[key] = record_id
+        self._sources[record_id] = {source}
+
+        if record.date not in self._indexes['date']:
+            bisect.insort(self._dates, record.date)
+        for field, get_values in FIELD_VALUES.items():
+            index = self._indexes[field]
+            for value in get_values(record):
+                index.setdefault(value, set()).add(record_id)
+        for listener in self._listeners:
+            listener.record_added(record)
+        return record_id
+
+    def _remove_record(self, record_id: int) -> None:
+        record = self._records.pop(record_id)
+        del self._keys[_record_key(record)]
+        del self._sources[record_id]
+
+        for field, get_values in FIELD_VALUES.items():
+            index = self._indexes[field]
+            for value in get_values(record):
+                ids = index.get(value)
+                if ids is not None:
+                    ids.discard(record_id)
+                    if not ids:
+                        del index[value]
+        if record.date not in self._indexes['date']:
+            del self._dates[bisect.bisect_left(self._dates, record.date)]
+        for listener in self._listeners:
+            listener.record_removed(record)
+
+
+class Query:
+    """
+    Conditions on lessons, all of them must be satisfied. Every method returns a new query
+    """
+
+    def __init__(self,
+                 store: LessonStore,
+                 conditions: Optional[Dict[str, frozenset]] = None,
+                 date_range: Tuple[Optional[datetime.date], Optional[datetime.date]] = (None, None),
+                 predicates: Tuple[Callable[[LessonRecord], bool], ...] = ()):
+        self.store = store
+        self.conditions = conditions or {}
+        self.date_range = date_range
+        self.predicates = predicates
+
+    def where(self, **conditions: Any) -> 'Query':
+        """
+        Add conditions by indexed fields, value may be a single value or a list/set/tuple of allowed ones
+
+        Fields: date, lesson_type, type_obj (ID), teacher (ID), group (ID), faculty (ID),
+        auditory (ID), building (ID), parity
+        """
+        merged = dict(self.conditions)
+        for field, value in conditions.items():
+            if field not in LessonStore.FIELDS:
+                raise ValueError(f'Unknown field "{field}", indexed fields: {LessonStore.FIELDS}')
+            values = frozenset(value) if isinstance(value, (list, set, frozenset, tuple)) else frozenset((value,))
+            # Repeated condition on field narrows allowed values
+            merged[field] = merged[field] & values if field in merged else values
+        return Query(self.store, merged, self.date_range, self.predicates)
+
+    def between(self, date_from: Optional[types.AnyDate] = None, date_to: Optional[types.AnyDate] = None) -> 'Query':
+        """
+        Lessons from date_from to date_to, both included
+        """
+        current_from, current_to = self.date_range
+        if date_from is not None:
+            date_from = iso_date(date_from)
+            current_from = date_from if current_from is None else max(current_from, date_from)
+        if date_to is not None:
+            date_to = iso_date(date_to)
+            current_to = date_to if current_to is None else min(current_to, date_to)
+        return Query(self.store, self.conditions, (current_from, current_to), self.predicates)
+
+    def filter(self, predicate: Callable[[LessonRecord], bool]) -> 'Query':
+        """
+        Condition that isn't indexed, it's checked only for lessons found by indexes
+        """
+        return Query(self.store, self.conditions, self.date_range, self.predicates + (predicate,))
+
+    def plan(self) -> List[Tuple[str, int]]:
+        """
+        Indexed conditions in order of execution with estimated count of lessons for every one
+        """
+        return sorted(((field, self.store.estimate(field, values)) for field, values in self._conditions().items()),
+                      key=lambda item: item[1])
+
+    def ids(self) -> Set[int]:
+        conditions = self._conditions()
+        plan = self.plan()
+        if not plan:
+            found = self.store.ids()
+        else:
+            # Only the most selective index is read, other conditions are checked on found lessons
+            field, _ = plan[0]
+            found = self.store.candidates(field, conditions[field])
+            for field, _ in plan[1:]:
+                values, get_values = conditions[field], FIELD_VALUES[field]
+                found = {record_id for record_id in found
+                         if not values.isdisjoint(get_values(self.store.get(record_id)))}
+        if self.predicates:
+            found = {record_id for record_id in found
+                     if all(predicate(self.store.get(record_id)) for predicate in self.predicates)}
+        return found
+
+    def _conditions(self) -> Dict[str, frozenset]:
+        conditions = dict(self.conditions)
+        if self.date_range != (None, None):
+            dates = frozenset(self.store.dates_between(*self.date_range))
+            conditions['date'] = conditions['date'] & dates if 'date' in conditions else dates
+        return conditions
+
+    def all(self) -> List[LessonRecord]:
+        """
+        Found lessons sorted by date and start time
+        """
+        records = [self.store.get(record_id) for record_id in self.ids()]
+        records.sort(key=lambda record: (record.date, record.lesson.time_start))
+        return records
+
+    def count(self) -> int:
+        return len(self.ids())
+
+    def __iter__(self) -> Iterator[LessonRecord]:
+        return iter(self.all())
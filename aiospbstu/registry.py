@@ -0,0 +1,113 @@
+"""
+Local knowledge about existing and non-existing IDs, so unknown IDs are rejected without requests
+
+NegativeCache remembers IDs that server reported as not found.
+IdRegistry keeps all valid IDs of groups, teachers and buildings, collected from full lists
+(get_faculties + get_faculty_groups for groups, get_teachers and get_buildings).
+
+Example:
+.. code-block:: python3
+    api = PolyScheduleAPI(negative_cache=NegativeCache(), id_registry=IdRegistry())
+    await api.get_teachers()
+    await api.get_teacher(1)  # raises TeacherNotFoundByIDError without request
+
+"""
+
+import time
+from typing import Dict, Hashable, Iterable, Optional, Set, Tuple
+
+__all__ = ['NegativeCache', 'IdRegistry']
+
+
+class NegativeCache:
+    """
+    Keeps "not found" responses for a while
+    """
+
+    def __init__(self, ttl: float = 10 * 60, max_size: int = 100000):
+        """
+        :param ttl: seconds to remember that ID is not found
+        :param max_size: max count of stored IDs, the oldest ones are evicted first
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._storage: Dict[Hashable, Tuple[float, dict]] = {}
+
+    def __len__(self):
+        return len(self._storage)
+
+    def get(self, key: Hashable) -> Optional[dict]:
+        """
+        :return: server response for not found key
+        """
+        expires, response = self._storage.get(key, (None, None))
+        if expires is not None and expires < time.monotonic():
+            del self._storage[key]
+            return None
+        return response
+
+    def add(self, key: Hashable, response: dict) -> None:
+        self._storage.pop(key, None)
+        self._storage[key] = time.monotonic() + self.ttl, response
+        while len(self._storage) > self.max_size:
+            del self._storage[next(iter(self._storage))]
+
+    def discard(self, key: Hashable) -> None:
+        self._storage.pop(key, None)
+
+
+class IdRegistry:
+    """
+    Valid IDs of groups, teachers and buildings
+    Registry of a kind answers only while it's complete and fresh
+    """
+    KINDS = 'group', 'teacher', 'building'
+
+    def __init__(self, ttl: float = 24 * 60 * 60):
+        """
+        :param ttl: seconds after which full list of IDs is considered outdated
+        """
+        self.ttl = ttl
+        self._ids: Dict[str, Set[int]] = {kind: set() for kind in self.KINDS}
+        self._updated: Dict[str, Optional[float]] = dict.fromkeys(self.KINDS)
+
+        self._faculties: Optional[Set[int]] = None
+        self._faculty_groups: Dict[int, Set[int]] = {}
+
+    def is_known(self, kind: str, entity_id: int) -> Optional[bool]:
+        """
+        :return: whether ID is valid, or None if registry of this kind is incomplete or outdated
+        """
+        updated = self._updated[kind]
+        if updated is None or updated + self.ttl < time.monotonic():
+            return None
+        return entity_id in self._ids[kind]
+
+    def set_ids(self, kind: str, ids: Iterable[int]) -> None:
+        """
+        Replace IDs of the kind with full list of them
+        """
+        self._ids[kind] = set(ids)
+        self._updated[kind] = time.monotonic()
+
+    def add(self, kind: str, entity_id: int) -> None:
+        """
+        Remember single valid ID, e.g. from successful response
+        """
+        self._ids[kind].add(entity_id)
+
+    def set_faculties(self, faculty_ids: Iterable[int]) -> None:
+        self._faculties = set(faculty_ids)
+        self._update_groups()
+
+    def set_faculty_groups(self, faculty_id: int, group_ids: Iterable[int]) -> None:
+        self._faculty_groups[faculty_id] = set(group_ids)
+        self._update_groups()
+
+    def _update_groups(self) -> None:
+        # List of groups is complete only when groups of all faculties are known
+        if self._faculties is None or not self._faculties.issubset(self._faculty_groups):
+            self._ids['group'].update(*self._faculty_groups.values())
+            return
+        self.set_ids('group', (group_id for faculty_id in self._faculties
+                               for group_id in self._faculty_groups[faculty_id]))
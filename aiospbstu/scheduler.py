@@ -0,0 +1,309 @@
+"""
+Priority scheduling of requests that reach the network
+
+Every request that is not served from cache takes a slot of :class:`RequestScheduler`.
+Waiting requests are queued by priority class and dispatched with weighted fair queueing,
+so interactive lookups are not stuck behind thousands of background requests,
+while background requests still get their share of slots.
+
+Priority and deadline are taken from context, so they apply to all requests made inside of it.
+Callers that share one request (see :class:`SlotTicket`) raise its priority to the highest of theirs,
+while each of them waits until its own deadline only.
+With :class:`AdaptiveLimit` count of slots follows server latency instead of being fixed.
+
+Example:
+.. code-block:: python3
+    api = PolyScheduleAPI(scheduler=RequestScheduler(concurrency=10))
+    # or, to find the highest safe concurrency automatically:
+    api = PolyScheduleAPI(scheduler=RequestScheduler(adaptive_limit=AdaptiveLimit(max_limit=50)))
+
+    # Background crawl
+    with request_options(priority=Priority.bulk):
+        await asyncio.gather(*(api.get_group_schedule(group_id) for group_id in group_ids))
+
+    # User lookup, fails if it's not started in 5 seconds
+    with request_options(timeout=5):
+        await api.get_group_schedule(group_id)
+
+"""
+
+import asyncio
+import collections
+import contextlib
+import contextvars
+import time
+from typing import Deque, Dict, Iterator, Optional
+
+from . import exceptions as exc
+from .utils.adaptive_limit import AdaptiveLimit
+from .utils.strenum import StrEnum
+
+__all__ = ['Priority', 'RequestScheduler', 'SlotTicket', 'AdaptiveLimit', 'request_options']
+
+
+class Priority(StrEnum):
+    interactive: str
+    prefetch: str
+    bulk: str
+
+
+DEFAULT_WEIGHTS = {
+    Priority.interactive: 8,
+    Priority.prefetch: 2,
+    Priority.bulk: 1,
+}
+
+# Position of priority class, the lower is served first when classes are compared
+_RANKS = {priority: rank for rank, priority in enumerate(Priority)}
+
+_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar('priority', default=Priority.interactive)
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar('deadline', default=None)
+
+
+@contextlib.contextmanager
+def request_options(priority: Optional[Priority] = None, timeout: Optional[float] = None) -> Iterator[None]:
+    """
+    Set priority and deadline of requests made inside of context
+
+    :param priority: priority class of requests
+    :param timeout: seconds requests may wait in queue, nested timeouts can only make deadline earlier
+    """
+    tokens = []
+    if priority is not None:
+        tokens.append((_priority, _priority.set(Priority(priority))))
+    if timeout is not None:
+        deadline = time.monotonic() + timeout
+        current = _deadline.get()
+        if current is not None:
+            deadline = min(deadline, current)
+        tokens.append((_deadline, _deadline.set(deadline)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class SlotTicket:
+    """
+    Place in queue of request that may be shared by several callers, its priority can be raised while it waits
+    """
+    __slots__ = 'priority', 'started', '_waiter'
+
+    def __init__(self, priority: Priority, started: asyncio.Future):
+        """
+        :param started: future that is set when request gets slot
+        """
+        self.priority = priority
+        self.started = started
+        self._waiter: Optional[asyncio.Future] = None
+
+
+class RequestScheduler:
+    """
+    Limits count of simultaneous requests and decides which of waiting requests goes next
+    """
+
+    # Errors meaning that server doesn't keep up with requests
+    OVERLOAD_ERRORS = exc.NetworkError, exc.ApiInternalError, asyncio.TimeoutError
+
+    def __init__(self,
+                 concurrency: int = 10,
+                 weights: Optional[Dict[Priority, float]] = None,
+                 adaptive_limit: Optional[AdaptiveLimit] = None):
+        """
+        :param concurrency: max count of simultaneous requests
+        :param weights: share of slots of every priority class when all of them are waiting
+        :param adaptive_limit: changes concurrency by observed latency and errors, its initial limit is used
+        """
+        self.adaptive_limit = adaptive_limit
+        if adaptive_limit is not None:
+            concurrency = round(adaptive_limit.limit)
+        if concurrency < 1:
+            raise ValueError(f'concurrency must be positive, got {concurrency}')
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        for priority, weight in self.weights.items():
+            if weight <= 0:
+                raise ValueError(f'Weight of {priority} must be positive, got {weight}')
+
+        self._concurrency = concurrency
+        self.in_flight = 0
+        self._queues: Dict[Priority, Deque[asyncio.Future]] = {priority: collections.deque() for priority in Priority}
+        # Virtual time of weighted fair queueing: class with the least one is served next
+        self._virtual_time: Dict[Priority, float] = dict.fromkeys(Priority, 0.0)
+
+        self.dispatched: Dict[Priority, int] = dict.fromkeys(Priority, 0)
+        self.expired: Dict[Priority, int] = dict.fromkeys(Priority, 0)
+        self.max_depths: Dict[Priority, int] = dict.fromkeys(Priority, 0)
+
+    @property
+    def concurrency(self) -> int:
+        return self._concurrency
+
+    @concurrency.setter
+    def concurrency(self, value: int) -> None:
+        self._concurrency = max(1, value)
+        self._dispatch()
+
+    @property
+    def depths(self) -> Dict[Priority, int]:
+        """
+        Count of requests waiting in queue of every priority class
+        """
+        return {priority: len(queue) for priority, queue in self._queues.items()}
+
+    def ticket(self) -> SlotTicket:
+        """
+        Create ticket of request with priority from context, see slot()
+        """
+        return SlotTicket(_priority.get(), asyncio.get_event_loop().create_future())
+
+    def join(self, ticket: SlotTicket) -> None:
+        """
+        Raise priority of shared request to priority from context, if it's still waiting
+        """
+        priority = _priority.get()
+        if _RANKS[priority] >= _RANKS[ticket.priority]:
+            return
+
+        waiter = ticket._waiter
+        if waiter is not None and not waiter.done():
+            self._remove(ticket.priority, waiter)
+            self._enqueue(priority, waiter)
+        ticket.priority = priority
+
+    async def wait(self, ticket: SlotTicket, request: asyncio.Future, url: Optional[str] = None) -> None:
+        """
+        Wait until shared request gets slot or is done, using deadline from context,
+        so every caller of shared request has its own deadline
+
+        :param request: task of shared request
+        :param url: used in error message only
+        :raises RequestDeadlineExceeded
+        """
+        deadline = _deadline.get()
+        if deadline is None or ticket.started.done() or request.done():
+            return
+
+        timeout = deadline - time.monotonic()
+        if timeout > 0:
+            await asyncio.wait([ticket.started, request], timeout=timeout)
+            if ticket.started.done() or request.done():
+                return
+
+        self.expired[ticket.priority] += 1
+        raise exc.RequestDeadlineExceeded('Request deadline exceeded while it was queued', url=url)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, url: Optional[str] = None, ticket: Optional[SlotTicket] = None):
+        """
+        Wait for a free slot using priority and deadline from context
+
+        :param url: used in error message only
+        :param ticket: ticket of shared request, its priority is used instead and deadlines are left to its callers
+        :raises RequestDeadlineExceeded
+        """
+        if ticket is None:
+            await self.acquire(_priority.get(), _deadline.get(), url)
+        else:
+            await self._acquire(ticket, None, url)
+            ticket.started.set_result(None)
+        if self.adaptive_limit is None:
+            try:
+                yield
+            finally:
+                self.release()
+            return
+
+        started, in_flight = time.monotonic(), self.in_flight
+        try:
+            yield
+        except self.OVERLOAD_ERRORS:
+            self.adaptive_limit.on_overload()
+            raise
+        except exc.BaseUniScheduleError:
+            # Server answered with error, it's still a valid latency sample
+            self.adaptive_limit.on_sample(time.monotonic() - started, in_flight)
+            raise
+        else:
+            self.adaptive_limit.on_sample(time.monotonic() - started, in_flight)
+        finally:
+            self.release()
+
+    async def acquire(self, priority: Priority, deadline: Optional[float] = None, url: Optional[str] = None) -> None:
+        """
+        :param priority: priority class of request
+        :param deadline: time.monotonic() value after which request is not started
+        :param url: used in error message only
+        :raises RequestDeadlineExceeded
+        """
+        await self._acquire(SlotTicket(priority, asyncio.get_event_loop().create_future()), deadline, url)
+
+    async def _acquire(self, ticket: SlotTicket, deadline: Optional[float], url: Optional[str]) -> None:
+        if self.in_flight < self._concurrency and not any(self._queues.values()):
+            self._start(ticket.priority)
+            return
+
+        timeout = None
+        if deadline is not None:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                self.expired[ticket.priority] += 1
+                raise exc.RequestDeadlineExceeded('Request deadline exceeded before it was queued', url=url)
+
+        waiter = ticket._waiter = asyncio.get_event_loop().create_future()
+        self._enqueue(ticket.priority, waiter)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was given right before cancellation, pass it to the next waiter
+                self.release()
+            else:
+                waiter.cancel()
+                # Priority of ticket is the current queue of waiter, it may be raised while waiting
+                self._remove(ticket.priority, waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self.expired[ticket.priority] += 1
+                raise exc.RequestDeadlineExceeded('Request deadline exceeded while it was queued', url=url)
+            raise
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        if self.adaptive_limit is not None:
+            self._concurrency = max(1, round(self.adaptive_limit.limit))
+        self._dispatch()
+
+    def _start(self, priority: Priority) -> None:
+        self.in_flight += 1
+        self.dispatched[priority] += 1
+        self._virtual_time[priority] += 1 / self.weights[priority]
+
+    def _enqueue(self, priority: Priority, waiter: asyncio.Future) -> None:
+        queue = self._queues[priority]
+        active = [self._virtual_time[other] for other, other_queue in self._queues.items() if other_queue]
+        if not queue and active:
+            # Idle class doesn't get credit for the time it wasn't waiting
+            self._virtual_time[priority] = max(self._virtual_time[priority], min(active))
+        queue.append(waiter)
+        self.max_depths[priority] = max(self.max_depths[priority], len(queue))
+
+    def _remove(self, priority: Priority, waiter: asyncio.Future) -> None:
+        try:
+            self._queues[priority].remove(waiter)
+        except ValueError:
+            pass
+
+    def _dispatch(self) -> None:
+        while self.in_flight < self._concurrency:
+            waiting = [priority for priority, queue in self._queues.items() if queue]
+            if not waiting:
+                return
+            priority = min(waiting, key=self._virtual_time.__getitem__)
+            waiter = self._queues[priority].popleft()
+            if waiter.done():
+                # Waiter is cancelled or its deadline is exceeded
+                continue
+            self._start(priority)
+            waiter.set_result(None)
@@ -0,0 +1,136 @@
+"""
+RUZ-compatible caching proxy server
+
+Serves the same paths as RUZ API (e.g. /api/v1/ruz/faculties, /api/v1/ruz/scheduler/{group_id}?date=...),
+requests are made through one PolyScheduleAPI instance, so responses are cached,
+concurrent requests of the same url are coalesced and requests rate is limited.
+
+Run it with:
+.. code-block:: bash
+    $ python -m aiospbstu --port 8080 --rate-limit 5 --cache-socket /tmp/aiospbstu.sock
+
+"""
+
+import datetime
+import functools
+import re
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from aiohttp import web
+
+from . import exceptions as exc
+from .api import PolyScheduleAPI
+from .types import Method
+from .utils import json
+from .utils.date import week_start
+
+__all__ = ['create_app', 'run_server']
+
+API_KEY = 'api'
+
+
+def _parse_template(method: Method) -> Tuple[str, Dict[str, str]]:
+    """
+    Split method endpoint into aiohttp route path and map of query argument to method parameter
+
+    '/search/groups?q={group_name}' -> '/search/groups', {'q': 'group_name'}
+    """
+    path, _, query = (method.endpoint or method.endpoint_template).partition('?')
+    query_params = {}
+    for argument, value in parse_qsl(query):
+        param = re.fullmatch(r'{(.*?)}', value)
+        if param:
+            query_params[argument] = param.group(1)
+    return path, query_params
+
+
+def _normalize_date(value: Optional[str]) -> str:
+    """
+    Any date of week gets the same response, so all of them are requested and cached as week start
+    """
+    if value is None:
+        # Same as RUZ API, schedule for current week is returned if date is not passed
+        return week_start(None).isoformat()
+    try:
+        return week_start(datetime.date.fromisoformat(value)).isoformat()
+    except ValueError:
+        # Let RUZ answer to dates it doesn't understand
+        return value
+
+
+def _error_response(error: exc.BaseUniScheduleError) -> web.Response:
+    if isinstance(error, exc.ApiNotFoundError):
+        status = 404
+    elif isinstance(error, exc.NetworkError):
+        status = 502
+    else:
+        status = 500
+
+    response = error.response if isinstance(error.response, dict) else {'error': True, 'text': str(error)}
+    return web.json_response(response, status=status, dumps=json.dumps)
+
+
+def _make_handler(method: Method, query_params: Dict[str, str]):
+    async def handler(request: web.Request) -> web.Response:
+        api: PolyScheduleAPI = request.app[API_KEY]
+
+        params = dict(request.match_info)
+        for argument, param in query_params.items():
+            value = request.query.get(argument)
+            if param == 'date':
+                value = _normalize_date(value)
+            if value is None:
+                return web.json_response({'error': True, 'text': f'Parameter "{argument}" is required'},
+                                         status=400, dumps=json.dumps)
+            params[param] = value
+
+        try:
+            body = await api.request_body(method, **params)
+        except exc.BaseUniScheduleError as e:
+            return _error_response(e)
+
+        return web.Response(text=body, content_type='application/json')
+
+    return handler
+
+
+async def _create_api(app: web.Application, options: Dict[str, Any]) -> None:
+    app[API_KEY] = PolyScheduleAPI(**options)
+
+
+async def _close_api(app: web.Application) -> None:
+    await app[API_KEY].close()
+
+
+def create_app(api: Optional[PolyScheduleAPI] = None, **api_options) -> web.Application:
+    """
+    :param api: api instance that makes requests to RUZ, configure its cache and rate_limit as needed
+    :param api_options: arguments of PolyScheduleAPI, if api is not passed,
+                        it's created with them on startup inside of the loop that runs the server
+    """
+    app = web.Application()
+    if api is not None:
+        app[API_KEY] = api
+    else:
+        app.on_startup.append(functools.partial(_create_api, options=api_options))
+    app.on_cleanup.append(_close_api)
+
+    for name, method in vars(type(PolyScheduleAPI.methods)).items():
+        # Site endpoints are not part of API
+        if not isinstance(method, Method) or name.startswith('SITE_'):
+            continue
+        path, query_params = _parse_template(method)
+        app.router.add_get(PolyScheduleAPI.API_ENDPOINT + path, _make_handler(method, query_params), name=name)
+
+    return app
+
+
+def run_server(api: Optional[PolyScheduleAPI] = None,
+               host: str = '127.0.0.1',
+               port: int = 8080,
+               **api_options) -> None:
+    """
+    :param api_options: arguments of PolyScheduleAPI, used if api is not passed
+    """
+    web.run_app(create_app(api, **api_options), host=host, port=port)
@@ -0,0 +1,492 @@
+"""
+Compact read-only binary snapshot of fetched schedules.
+
+Snapshot file layout (little-endian):
+
+    header      magic, version and (offset, count) of every section
+    strings     string table: offsets array + utf-8 blob, every text field is stored once
+    faculties, groups, teachers, buildings, auditories, type_objs
+                fixed-size entity records sorted by id, text fields are string table indexes
+    index       fixed-size (owner kind, owner id, week start, record offset) records
+                sorted by owner and week, searched with binary search
+    records     packed schedules: week, days and lessons referencing entities by index,
+                dates are stored as ordinals and times as minutes since midnight
+
+File is opened with mmap, so only pages touched by lookups are read and
+many processes opening the same snapshot share it through the page cache.
+
+Example:
+.. code-block:: python3
+    writer = SnapshotWriter()
+    for schedule in schedules:
+        writer.add_schedule(schedule)
+    writer.write('schedules.snapshot')
+
+    with Snapshot('schedules.snapshot') as snapshot:
+        schedule = snapshot.get_schedule(OwnerKind.group, 29486, datetime.date(2019, 9, 4))
+
+"""
+
+import datetime
+import mmap
+import struct
+from enum import IntEnum
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from . import exceptions as exc, types
+from .types import AnyDate
+from .utils.date import iso_date
+
+__all__ = ['OwnerKind', 'Snapshot', 'SnapshotWriter']
+
+MAGIC = b'SPBS'
+VERSION = 1
+
+NONE_INDEX = 0xFFFFFFFF
+NONE_COUNT = 0xFFFF
+NONE_INT = -2 ** 31
+
+SECTIONS = ('strings', 'faculties', 'groups', 'teachers', 'buildings', 'auditories', 'type_objs', 'index', 'records')
+
+HEADER = struct.Struct('<4sHH' + 'II' * len(SECTIONS))
+STRING_OFFSET = struct.Struct('<I')
+ENTITY_INDEX = struct.Struct('<I')
+
+FACULTY = struct.Struct('<iII')  # id, name, abbr
+GROUP = struct.Struct('<iIIIIBB')  # id, name, type, spec, faculty, level, kind
+TEACHER = struct.Struct('<iiIIIIII')  # id, oid, full_name, first_name, middle_name, last_name, grade, chair
+BUILDING = struct.Struct('<iIII')  # id, name, abbr, address
+AUDITORY = struct.Struct('<iII')  # id, name, building
+TYPE_OBJ = struct.Struct('<iII')  # id, name, abbr
+ENTITY_RECORDS = {
+    'faculties': FACULTY, 'groups': GROUP, 'teachers': TEACHER,
+    'buildings': BUILDING, 'auditories': AUDITORY, 'type_objs': TYPE_OBJ
+}
+
+INDEX = struct.Struct('<BiII')  # owner kind, owner id, week start, record offset
+SCHEDULE = struct.Struct('<IIBIH')  # week start, week end, is odd, owner, days count
+DAY = struct.Struct('<BIH')  # weekday, date, lessons count
+# subject, subject_short, type, additional_info, time_start, time_end, parity, type_obj,
+# groups count, teachers count, auditories count
+LESSON = struct.Struct('<IIiIHHiIHHH')
+
+
+class OwnerKind(IntEnum):
+    group = 0
+    teacher = 1
+    auditory = 2
+
+
+def _minutes(time: datetime.time) -> int:
+    return time.hour * 60 + time.minute
+
+
+def _time(minutes: int) -> str:
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+
+def _optional_int(value: Optional[int]) -> int:
+    return NONE_INT if value is None else int(value)
+
+
+class SnapshotWriter:
+    """
+    Collects schedules and writes them as a snapshot file
+    """
+
+    def __init__(self):
+        self._strings: Dict[str, int] = {}
+        self._entities: Dict[str, Dict[int, Any]] = {
+            'faculties': {}, 'groups': {}, 'teachers': {}, 'buildings': {}, 'auditories': {}, 'type_objs': {}
+        }
+        self._schedules: Dict[Tuple[int, int, int], types.Schedule] = {}
+
+    def add_schedule(self, schedule: types.Schedule) -> None:
+        owner = schedule.owner
+        if owner is None:
+            raise ValueError(f'Schedule for week {schedule.week.date_start} has no owner')
+
+        kind = OwnerKind[schedule.owner_type]
+        owner_id = owner.auditory_id if kind == OwnerKind.auditory else owner.id
+        self._schedules[kind, owner_id, schedule.week.date_start.toordinal()] = schedule
+
+        self._add_owner(kind, owner)
+        for day in schedule.days:
+            for lesson in day.lessons:
+                if lesson.type_obj is not None:
+                    self._entities['type_objs'][lesson.type_obj.id] = lesson.type_obj
+                for group in lesson.groups:
+                    self._add_group(group)
+                for teacher in lesson.teachers or ():
+                    self._entities['teachers'][teacher.id] = teacher
+                for auditory in lesson.auditories:
+                    self._add_auditory(auditory)
+
+    def _add_owner(self, kind: OwnerKind, owner) -> None:
+        if kind == OwnerKind.group:
+            self._add_group(owner)
+        elif kind == OwnerKind.teacher:
+            self._entities['teachers'][owner.id] = owner
+        else:
+            self._add_auditory(owner)
+
+    def _add_group(self, group: types.Group) -> None:
+        self._entities['groups'][group.id] = group
+        self._entities['faculties'][group.faculty.id] = group.faculty
+
+    def _add_auditory(self, auditory: types.Auditory) -> None:
+        self._entities['auditories'][auditory.auditory_id] = auditory
+        self._entities['buildings'][auditory.building.id] = auditory.building
+
+    def _string(self, value: Optional[str]) -> int:
+        if value is None:
+            return NONE_INDEX
+        value = str(value)
+        index = self._strings.get(value)
+        if index is None:
+            index = self._strings[value] = len(self._strings)
+        return index
+
+    def to_bytes(self) -> bytes:
+        # Entities are sorted by id, so their position is used as reference and to search by id
+        positions = {
+            section: {entity_id: position for position, entity_id in enumerate(sorted(entities))}
+            for section, entities in self._entities.items()
+        }
+
+        def position(section: str, entity_id: Optional[int]) -> int:
+            return NONE_INDEX if entity_id is None else positions[section][entity_id]
+
+        entities = {section: bytearray() for section in self._entities}
+        for faculty_id in positions['faculties']:
+            faculty = self._entities['faculties'][faculty_id]
+            entities['faculties'] += FACULTY.pack(faculty.id, self._string(faculty.name), self._string(faculty.abbr))
+        for group_id in positions['groups']:
+            group = self._entities['groups'][group_id]
+            entities['groups'] += GROUP.pack(
+                group.id, self._string(group.name), self._string(group.group_type), self._string(group.spec),
+                position('faculties', group.faculty.id), group.level, group.kind
+            )
+        for teacher_id in positions['teachers']:
+            teacher = self._entities['teachers'][teacher_id]
+            entities['teachers'] += TEACHER.pack(
+                teacher.id, teacher.oid, *map(self._string, (
+                    teacher.full_name, teacher.first_name, teacher.middle_name,
+                    teacher.last_name, teacher.grade, teacher.chair
+                ))
+            )
+        for building_id in positions['buildings']:
+            building = self._entities['buildings'][building_id]
+            entities['buildings'] += BUILDING.pack(
+                building.id, self._string(building.name), self._string(building.abbr), self._string(building.address)
+            )
+        for auditory_id in positions['auditories']:
+            auditory = self._entities['auditories'][auditory_id]
+            entities['auditories'] += AUDITORY.pack(
+                auditory.auditory_id, self._string(auditory.name), position('buildings', auditory.building.id)
+            )
+        for type_obj_id in positions['type_objs']:
+            type_obj = self._entities['type_objs'][type_obj_id]
+            entities['type_objs'] += TYPE_OBJ.pack(
+                type_obj.id, self._string(type_obj.name), self._string(type_obj.abbr)
+            )
+
+        owner_sections = {OwnerKind.group: 'groups', OwnerKind.teacher: 'teachers', OwnerKind.auditory: 'auditories'}
+        index, records = bytearray(), bytearray()
+        for key in sorted(self._schedules):
+            kind, owner_id, week_start = key
+            schedule = self._schedules[key]
+            index += INDEX.pack(kind, owner_id, week_start, len(records))
+            records += SCHEDULE.pack(
+                week_start, schedule.week.date_end.toordinal(), schedule.week.is_odd,
+                position(owner_sections[kind], owner_id), len(schedule.days)
+            )
+            for day in schedule.days:
+                records += DAY.pack(day.weekday, day.date.toordinal(), len(day.lessons))
+                for lesson in day.lessons:
+                    records += LESSON.pack(
+                        self._string(lesson.subject), self._string(lesson.subject_short),
+                        _optional_int(lesson.lesson_type), self._string(lesson.additional_info),
+                        _minutes(lesson.time_start), _minutes(lesson.time_end), _optional_int(lesson.parity),
+                        position('type_objs', lesson.type_obj.id if lesson.type_obj else None),
+                        len(lesson.groups),
+                        NONE_COUNT if lesson.teachers is None else len(lesson.teachers),
+                        len(lesson.auditories)
+                    )
+                    references = [position('groups', group.id) for group in lesson.groups]
+                    references += [position('teachers', teacher.id) for teacher in lesson.teachers or ()]
+                    references += [position('auditories', auditory.auditory_id) for auditory in lesson.auditories]
+                    records += struct.pack(f'<{len(references)}I', *references)
+
+        # String table is complete only after all records are packed
+        strings = sorted(self._strings, key=self._strings.get)
+        encoded = [string.encode() for string in strings]
+        string_offsets, offset = [], 0
+        for string in encoded:
+            string_offsets.append(offset)
+            offset += len(string)
+        string_offsets.append(offset)
+        string_table = struct.pack(f'<{len(string_offsets)}I', *string_offsets) + b''.join(encoded)
+
+        sections = [
+            (string_table, len(strings)),
+            *((entities[section], len(self._entities[section])) for section in self._entities),
+            (index, len(self._schedules)),
+            (records, len(self._schedules)),
+        ]
+        header_values, offset = [], HEADER.size
+        for data, count in sections:
+            header_values += [offset, count]
+            offset += len(data)
+
+        return HEADER.pack(MAGIC, VERSION, 0, *header_values) + b''.join(data for data, _ in sections)
+
+    def write(self, path: str) -> None:
+        with open(path, 'wb') as file:
+            file.write(self.to_bytes())
+
+
+class Snapshot:
+    """
+    Memory-mapped snapshot reader, decodes only requested schedules and entities
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as file:
+            self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, *header_values = HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            self.close()
+            raise exc.SnapshotError(f'File {path} is not an aiospbstu snapshot')
+        if version != VERSION:
+            self.close()
+            raise exc.SnapshotError(f'Unsupported snapshot version {version}, expected {VERSION}')
+
+        self._sections: Dict[str, Tuple[int, int]] = {
+            name: (header_values[i * 2], header_values[i * 2 + 1]) for i, name in enumerate(SECTIONS)
+        }
+        strings_offset, strings_count = self._sections['strings']
+        self._strings_blob = strings_offset + STRING_OFFSET.size * (strings_count + 1)
+
+    def close(self) -> None:
+        self._buffer.close()
+
+    def __enter__(self) -> 'Snapshot':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._sections['index'][1]
+
+    def __iter__(self) -> Iterator[Tuple[OwnerKind, int, datetime.date]]:
+        """
+        Iterate over (owner kind, owner id, week start) of all stored schedules
+        """
+        for position in range(len(self)):
+            kind, owner_id, week_start, _ = self._index_entry(position)
+            yield OwnerKind(kind), owner_id, datetime.date.fromordinal(week_start)
+
+    def owners(self, kind: OwnerKind) -> List[int]:
+        owners = []
+        for owner_kind, owner_id, _ in self:
+            if owner_kind == kind and (not owners or owners[-1] != owner_id):
+                owners.append(owner_id)
+        return owners
+
+    def weeks(self, kind: OwnerKind, owner_id: int) -> List[datetime.date]:
+        position = self._search_index((kind, owner_id, 0))
+        weeks = []
+        while position < len(self):
+            entry_kind, entry_owner_id, week_start, _ = self._index_entry(position)
+            if (entry_kind, entry_owner_id) != (kind, owner_id):
+                break
+            weeks.append(datetime.date.fromordinal(week_start))
+            position += 1
+        return weeks
+
+    def get_raw_schedule(self, kind: OwnerKind, owner_id: int, date: Optional[AnyDate] = None) -> dict:
+        """
+        Get schedule in the same format as RUZ API returns it
+
+        :raises ScheduleNotFoundInSnapshot
+        """
+        kind = OwnerKind(kind)
+        date = iso_date(date).toordinal()
+
+        # Last week that starts not later than requested date
+        position = self._search_index((kind, owner_id, date + 1)) - 1
+        if position >= 0:
+            entry_kind, entry_owner_id, _, record_offset = self._index_entry(position)
+            if (entry_kind, entry_owner_id) == (kind, owner_id):
+                schedule = self._read_schedule(kind, record_offset)
+                if date <= datetime.date.fromisoformat(schedule['week']['date_end']).toordinal():
+                    return schedule
+
+        raise exc.ScheduleNotFoundInSnapshot(
+            f'Schedule of {kind.name} {owner_id} for {datetime.date.fromordinal(date)} not found in {self.path}'
+        )
+
+    def get_schedule(self, kind: OwnerKind, owner_id: int, date: Optional[AnyDate] = None) -> types.Schedule:
+        return types.Schedule(**self.get_raw_schedule(kind, owner_id, date))
+
+    def get_group(self, group_id: int) -> Optional[types.Group]:
+        return self._get_entity('groups', group_id, self._read_group, types.Group)
+
+    def get_teacher(self, teacher_id: int) -> Optional[types.Teacher]:
+        return self._get_entity('teachers', teacher_id, self._read_teacher, types.Teacher)
+
+    def get_auditory(self, auditory_id: int) -> Optional[types.Auditory]:
+        return self._get_entity('auditories', auditory_id, self._read_auditory, types.Auditory)
+
+    def get_faculty(self, faculty_id: int) -> Optional[types.Faculty]:
+        return self._get_entity('faculties', faculty_id, self._read_faculty, types.Faculty)
+
+    def get_building(self, building_id: int) -> Optional[types.Building]:
+        return self._get_entity('buildings', building_id, self._read_building, types.Building)
+
+    def _string(self, index: int) -> Optional[str]:
+        if index == NONE_INDEX:
+            return None
+        strings_offset, _ = self._sections['strings']
+        start, end = struct.unpack_from('<II', self._buffer, strings_offset + index * STRING_OFFSET.size)
+        return self._buffer[self._strings_blob + start:self._strings_blob + end].decode()
+
+    def _index_entry(self, position: int) -> Tuple[int, int, int, int]:
+        offset, _ = self._sections['index']
+        return INDEX.unpack_from(self._buffer, offset + position * INDEX.size)
+
+    def _search_index(self, key: Tuple[int, int, int]) -> int:
+        """
+        Position of the first index entry that is not less than key
+        """
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self._index_entry(middle)[:3] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _get_entity(self, section: str, entity_id: int, reader, model):
+        offset, count = self._sections[section]
+        record_size = ENTITY_RECORDS[section].size
+        low, high = 0, count
+        # Entity id is always the first field of record
+        while low < high:
+            middle = (low + high) // 2
+            middle_id, = struct.unpack_from('<i', self._buffer, offset + middle * record_size)
+            if middle_id < entity_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < count:
+            raw = reader(low)
+            if raw['id'] == entity_id:
+                return model(**raw)
+        return None
+
+    def _unpack_entity(self, section: str, record: struct.Struct, position: int) -> tuple:
+        offset, _ = self._sections[section]
+        return record.unpack_from(self._buffer, offset + position * record.size)
+
+    def _read_faculty(self, position: int) -> dict:
+        faculty_id, name, abbr = self._unpack_entity('faculties', FACULTY, position)
+        return {'id': faculty_id, 'name': self._string(name), 'abbr': self._string(abbr)}
+
+    def _read_group(self, position: int) -> dict:
+        group_id, name, group_type, spec, faculty, level, kind = self._unpack_entity('groups', GROUP, position)
+        return {
+            'id': group_id, 'name': self._string(name), 'level': level, 'type': self._string(group_type),
+            'kind': kind, 'spec': self._string(spec), 'faculty': self._read_faculty(faculty)
+        }
+
+    def _read_teacher(self, position: int) -> dict:
+        teacher_id, oid, *strings = self._unpack_entity('teachers', TEACHER, position)
+        full_name, first_name, middle_name, last_name, grade, chair = map(self._string, strings)
+        return {
+            'id': teacher_id, 'oid': oid, 'full_name': full_name, 'first_name': first_name,
+            'middle_name': middle_name, 'last_name': last_name, 'grade': grade, 'chair': chair
+        }
+
+    def _read_building(self, position: int) -> dict:
+        building_id, name, abbr, address = self._unpack_entity('buildings', BUILDING, position)
+        return {
+            'id': building_id, 'name': self._string(name), 'abbr': self._string(abbr), 'address': self._string(address)
+        }
+
+    def _read_auditory(self, position: int) -> dict:
+        auditory_id, name, building = self._unpack_entity('auditories', AUDITORY, position)
+        return {'id': auditory_id, 'name': self._string(name), 'building': self._read_building(building)}
+
+    def _read_type_obj(self, position: int) -> dict:
+        type_obj_id, name, abbr = self._unpack_entity('type_objs', TYPE_OBJ, position)
+        return {'id': type_obj_id, 'name': self._string(name), 'abbr': self._string(abbr)}
+
+    def _read_schedule(self, kind: OwnerKind, offset: int) -> dict:
+        offset += self._sections['records'][0]
+        week_start, week_end, is_odd, owner, days_count = SCHEDULE.unpack_from(self._buffer, offset)
+        offset += SCHEDULE.size
+
+        days = []
+        for _ in range(days_count):
+            weekday, date, lessons_count = DAY.unpack_from(self._buffer, offset)
+            offset += DAY.size
+            lessons = []
+            for _ in range(lessons_count):
+                lesson, offset = self._read_lesson(offset)
+                lessons.append(lesson)
+            # RUZ API counts weekdays from 1
+            days.append({'weekday': weekday + 1, 'date': datetime.date.fromordinal(date).isoformat(),
+                         'lessons': lessons})
+
+        schedule = {
+            'week': {
+                'date_start': datetime.date.fromordinal(week_start).isoformat(),
+                'date_end': datetime.date.fromordinal(week_end).isoformat(),
+                'is_odd': bool(is_odd)
+            },
+            'days': days
+        }
+        if kind == OwnerKind.group:
+            schedule['group'] = self._read_group(owner)
+        elif kind == OwnerKind.teacher:
+            schedule['teacher'] = self._read_teacher(owner)
+        else:
+            schedule['room'] = self._read_auditory(owner)
+        return schedule
+
+    def _read_lesson(self, offset: int) -> Tuple[dict, int]:
+        (subject, subject_short, lesson_type, additional_info, time_start, time_end, parity, type_obj,
+         groups_count, teachers_count, auditories_count) = LESSON.unpack_from(self._buffer, offset)
+        offset += LESSON.size
+
+        references_count = groups_count + auditories_count + (0 if teachers_count == NONE_COUNT else teachers_count)
+        references = struct.unpack_from(f'<{references_count}I', self._buffer, offset)
+        offset += references_count * ENTITY_INDEX.size
+
+        groups = [self._read_group(position) for position in references[:groups_count]]
+        auditories = [self._read_auditory(position) for position in references[references_count - auditories_count:]]
+        teachers = None
+        if teachers_count != NONE_COUNT:
+            teachers = [self._read_teacher(position)
+                        for position in references[groups_count:groups_count + teachers_count]]
+
+        lesson = {
+            'subject': self._string(subject),
+            'subject_short': self._string(subject_short),
+            'type': None if lesson_type == NONE_INT else lesson_type,
+            'additional_info': self._string(additional_info),
+            'time_start': _time(time_start),
+            'time_end': _time(time_end),
+            'parity': None if parity == NONE_INT else parity,
+            'typeObj': None if type_obj == NONE_INDEX else self._read_type_obj(type_obj),
+            'groups': groups,
+            'teachers': teachers,
+            'auditories': auditories,
+        }
+        return lesson, offset
@@ -0,0 +1,344 @@
+"""
+Odd/even week templates of schedules
+
+Most weeks of an owner repeat the previous week of the same parity, so instead of storing every week,
+ScheduleTemplates keeps two templates per owner (lessons of odd and even week by weekday)
+and every concrete week as a delta against the template of its parity: only removed and added lessons.
+Weeks are stored as RUZ API responses, so templates can be serialized with to_dict() and synced as JSON.
+
+Owners whose recent weeks all matched templates are predictable: their next weeks
+are expanded from templates instead of being requested.
+
+Example:
+.. code-block:: python3
+    templates = ScheduleTemplates()
+    for date in semester_weeks:
+        await templates.fetch(api, 'group', 29486, date)
+
+    schedule = templates.get_schedule('group', 29486, datetime.date(2019, 10, 7))
+
+"""
+
+import copy
+import datetime
+import json
+from typing import Dict, List, NamedTuple, Optional, Tuple, TYPE_CHECKING
+
+from . import types
+from .types import AnyDate
+from .utils.date import week_start
+
+if TYPE_CHECKING:
+    from .api import PolyScheduleAPI
+
+__all__ = ['ScheduleTemplates', 'WeekDelta']
+
+Owner = Tuple[str, int]
+# Lessons by RUZ weekday, 1 is Monday
+Lessons = Dict[int, List[dict]]
+# (weekday, lesson key) to count of weeks with lesson and lesson itself
+LessonCounts = Dict[Tuple[int, str], list]
+
+OWNER_KEYS = {'group': 'group', 'teacher': 'teacher', 'auditory': 'room'}
+
+
+def _lesson_key(lesson: dict) -> str:
+    return json.dumps(lesson, sort_keys=True, ensure_ascii=False)
+
+
+def _parse_date(value: str) -> datetime.date:
+    return datetime.date.fromisoformat(value.replace('.', '-'))
+
+
+def _lessons(response: dict) -> Lessons:
+    return {day['weekday']: day['lessons'] for day in response['days'] if day['lessons']}
+
+
+class WeekDelta(NamedTuple):
+    week: dict
+    # Indexes of template lessons that are missing in week, by weekday
+    removed: Dict[int, List[int]]
+    # Lessons that are not in template, by weekday
+    added: Lessons
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.removed and not self.added
+
+    @property
+    def size(self) -> int:
+        """
+        Count of stored lessons and references to them
+        """
+        return sum(map(len, self.removed.values())) + sum(map(len, self.added.values()))
+
+
+class _OwnerTemplates:
+    __slots__ = 'owner', 'templates', 'weeks', 'counts'
+
+    def __init__(self, owner: Optional[dict]):
+        self.owner = owner
+        self.templates: Dict[bool, Lessons] = {True: {}, False: {}}
+        self.weeks: Dict[datetime.date, WeekDelta] = {}
+        # Templates are built from counts, so adding a week doesn't expand all stored weeks
+        self.counts: Dict[bool, LessonCounts] = {True: {}, False: {}}
+
+
+class ScheduleTemplates:
+    """
+    Schedules of many owners stored as odd/even week templates and deltas against them
+    """
+
+    def __init__(self, stable_weeks: int = 2):
+        """
+        :param stable_weeks: count of the latest weeks of each parity that must match templates
+                             to predict the next weeks without requests
+        """
+        self.stable_weeks = stable_weeks
+        self._owners: Dict[Owner, _OwnerTemplates] = {}
+
+    def __contains__(self, owner: Owner) -> bool:
+        return owner in self._owners
+
+    def owners(self) -> List[Owner]:
+        return list(self._owners)
+
+    def weeks(self, kind: str, owner_id: int) -> List[datetime.date]:
+        return sorted(self._get(kind, owner_id).weeks)
+
+    def add(self, kind: str, owner_id: int, response: dict) -> WeekDelta:
+        """
+        Store week schedule, template of its parity is updated, so every new week refines it
+
+        :param kind: 'group', 'teacher' or 'auditory'
+        :param response: RUZ API response with schedule
+        :return: delta of added week
+        """
+        # Parsing mutates lessons of response, so stored ones are copied
+        response = copy.deepcopy(response)
+        owner = self._owners.get((kind, owner_id))
+        if owner is None:
+            owner = self._owners[kind, owner_id] = _OwnerTemplates(response.get(OWNER_KEYS[kind]))
+
+        start, week, lessons = _parse_date(response['week']['date_start']), response['week'], _lessons(response)
+        parities = {week['is_odd']}
+        replaced = owner.weeks.get(start)
+        if replaced is not None:
+            parities.add(replaced.week['is_odd'])
+            self._count(owner.counts[replaced.week['is_odd']], self._expand_lessons(owner, replaced), -1)
+        self._count(owner.counts[week['is_odd']], lessons, 1)
+
+        for is_odd in parities:
+            weeks_count = sum(delta.week['is_odd'] == is_odd for other, delta in owner.weeks.items() if other != start)
+            self._update_template(owner, is_odd, weeks_count + (week['is_odd'] == is_odd), start)
+        owner.weeks[start] = self._make_delta(owner.templates[week['is_odd']], week, lessons)
+        return owner.weeks[start]
+
+    def get_delta(self, kind: str, owner_id: int, date: AnyDate) -> Optional[WeekDelta]:
+        """
+        :return: delta of stored week, None if week isn't stored
+        """
+        return self._get(kind, owner_id).weeks.get(week_start(date))
+
+    def is_predictable(self, kind: str, owner_id: int) -> bool:
+        """
+        Whether the latest weeks of both parities match templates exactly
+        """
+        owner = self._owners.get((kind, owner_id))
+        if owner is None:
+            return False
+        for is_odd in (True, False):
+            latest = sorted((start for start, delta in owner.weeks.items() if delta.week['is_odd'] == is_odd),
+                            reverse=True)[:self.stable_weeks]
+            if len(latest) < self.stable_weeks or any(not owner.weeks[start].is_empty for start in latest):
+                return False
+        return True
+
+    def expand(self, kind: str, owner_id: int, date: AnyDate, predict: bool = True) -> Optional[dict]:
+        """
+        Restore RUZ API response with week schedule
+
+        :param date: any date of week
+        :param predict: if week isn't stored, build it from template of its parity
+        :return: response, or None if week isn't stored and predict is False
+        """
+        owner = self._get(kind, owner_id)
+        start = week_start(date)
+
+        delta = owner.weeks.get(start)
+        if delta is not None:
+            week, lessons = delta.week, self._expand_lessons(owner, delta)
+        elif predict:
+            is_odd = self._predict_parity(owner, start)
+            week = {'date_start': start.strftime('%Y.%m.%d'),
+                    'date_end': (start + datetime.timedelta(days=6)).strftime('%Y.%m.%d'),
+                    'is_odd': is_odd}
+            lessons = owner.templates[is_odd]
+        else:
+            return None
+
+        response = {
+            'week': week,
+            'days': [{'weekday': weekday,
+                      'date': (start + datetime.timedelta(days=weekday - 1)).isoformat(),
+                      'lessons': lessons[weekday]}
+                     for weekday in sorted(lessons)],
+        }
+        if owner.owner is not None:
+            response[OWNER_KEYS[kind]] = owner.owner
+        return copy.deepcopy(response)
+
+    def get_schedule(self, kind: str, owner_id: int, date: AnyDate, predict: bool = True) -> Optional[types.Schedule]:
+        """
+        Same as expand(), but returns Schedule
+        """
+        response = self.expand(kind, owner_id, date, predict=predict)
+        if response is None:
+            return None
+        return types.Schedule(**response)
+
+    async def fetch(self,
+                    api: 'PolyScheduleAPI',
+                    kind: str,
+                    owner_id: int,
+                    date: Optional[AnyDate] = None) -> types.Schedule:
+        """
+        Get week schedule, week isn't requested if it's stored or owner is predictable
+        """
+        # Requested as week start, like schedule getters of api, so shared cache and coalescing apply
+        date = week_start(date)
+        if (kind, owner_id) in self._owners:
+            schedule = self.get_schedule(kind, owner_id, date, predict=self.is_predictable(kind, owner_id))
+            if schedule is not None:
+                schedule.bind(api)
+                return schedule
+
+        method = getattr(api.methods, f'GET_{kind.upper()}_SCHEDULE')
+        response = await api.request(method, **{f'{kind}_id': owner_id, 'date': date})
+        self.add(kind, owner_id, response)
+        return api.parse(types.Schedule, **response)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Count of lessons in all stored weeks and count of lessons actually stored in templates and deltas
+        """
+        total = stored = 0
+        for owner in self._owners.values():
+            stored += sum(len(lessons) for template in owner.templates.values() for lessons in template.values())
+            for delta in owner.weeks.values():
+                stored += delta.size
+                total += sum(map(len, self._expand_lessons(owner, delta).values()))
+        return {'lessons': total, 'stored': stored}
+
+    def to_dict(self) -> dict:
+        return {
+            'stable_weeks': self.stable_weeks,
+            'owners': [
+                {
+                    'kind': kind,
+                    'id': owner_id,
+                    'owner': owner.owner,
+                    'templates': {'odd': owner.templates[True], 'even': owner.templates[False]},
+                    'weeks': [{'week': delta.week, 'removed': delta.removed, 'added': delta.added}
+                              for delta in owner.weeks.values()],
+                }
+                for (kind, owner_id), owner in self._owners.items()
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ScheduleTemplates':
+        templates = cls(stable_weeks=data['stable_weeks'])
+        for item in data['owners']:
+            owner = templates._owners[item['kind'], item['id']] = _OwnerTemplates(item['owner'])
+            # JSON object keys are strings, weekdays are ints
+            owner.templates = {is_odd: {int(weekday): lessons for weekday, lessons in item['templates'][key].items()}
+                               for is_odd, key in ((True, 'odd'), (False, 'even'))}
+            for week in item['weeks']:
+                delta = WeekDelta(week=week['week'],
+                                  removed={int(weekday): indexes for weekday, indexes in week['removed'].items()},
+                                  added={int(weekday): lessons for weekday, lessons in week['added'].items()})
+                owner.weeks[_parse_date(delta.week['date_start'])] = delta
+            for delta in owner.weeks.values():
+                templates._count(owner.counts[delta.week['is_odd']], templates._expand_lessons(owner, delta), 1)
+        return templates
+
+    def _get(self, kind: str, owner_id: int) -> _OwnerTemplates:
+        try:
+            return self._owners[kind, owner_id]
+        except KeyError:
+            raise KeyError(f'No weeks of {kind} {owner_id} are stored') from None
+
+    @staticmethod
+    def _predict_parity(owner: _OwnerTemplates, date: datetime.date) -> bool:
+        # Parity alternates every week, so it's taken from the nearest stored week
+        nearest = min(owner.weeks, key=lambda start: abs(start - date))
+        weeks_between = (date - nearest).days // 7
+        return owner.weeks[nearest].week['is_odd'] == (weeks_between % 2 == 0)
+
+    @staticmethod
+    def _count(counts: LessonCounts, lessons: Lessons, sign: int) -> None:
+        for weekday, day_lessons in lessons.items():
+            for lesson in day_lessons:
+                key = weekday, _lesson_key(lesson)
+                entry = counts.setdefault(key, [0, lesson])
+                entry[0] += sign
+                if not entry[0]:
+                    del counts[key]
+
+    @staticmethod
+    def _build_template(counts: LessonCounts, weeks_count: int) -> Lessons:
+        """
+        Template has lessons that are present in at least half of the weeks
+        """
+        template: Lessons = {}
+        for (weekday, _), (count, lesson) in counts.items():
+            if count * 2 >= weeks_count:
+                template.setdefault(weekday, []).append(lesson)
+        for day_lessons in template.values():
+            day_lessons.sort(key=lambda lesson: lesson['time_start'])
+        return template
+
+    def _update_template(self, owner: _OwnerTemplates, is_odd: bool, weeks_count: int, added: datetime.date) -> None:
+        """
+        Build template of parity from counts, deltas of its weeks are made again only if template has changed
+        """
+        template = self._build_template(owner.counts[is_odd], weeks_count)
+        if template == owner.templates[is_odd]:
+            return
+        # Deltas reference lessons of template, so weeks are expanded with the previous one
+        weeks = {start: self._expand_lessons(owner, delta) for start, delta in owner.weeks.items()
+                 if delta.week['is_odd'] == is_odd and start != added}
+        owner.templates[is_odd] = template
+        for start, lessons in weeks.items():
+            owner.weeks[start] = self._make_delta(template, owner.weeks[start].week, lessons)
+
+    @staticmethod
+    def _make_delta(template: Lessons, week: dict, lessons: Lessons) -> WeekDelta:
+        removed: Dict[int, List[int]] = {}
+        added: Lessons = {}
+        for weekday in set(template) | set(lessons):
+            template_keys = [_lesson_key(lesson) for lesson in template.get(weekday, ())]
+            week_lessons = lessons.get(weekday, [])
+            week_keys = [_lesson_key(lesson) for lesson in week_lessons]
+
+            day_removed = [index for index, key in enumerate(template_keys) if key not in week_keys]
+            day_added = [lesson for lesson, key in zip(week_lessons, week_keys) if key not in template_keys]
+            if day_removed:
+                removed[weekday] = day_removed
+            if day_added:
+                added[weekday] = day_added
+        return WeekDelta(week=week, removed=removed, added=added)
+
+    @staticmethod
+    def _expand_lessons(owner: _OwnerTemplates, delta: WeekDelta) -> Lessons:
+        template = owner.templates[delta.week['is_odd']]
+        lessons: Lessons = {}
+        for weekday in set(template) | set(delta.added):
+            removed = set(delta.removed.get(weekday, ()))
+            day_lessons = [lesson for index, lesson in enumerate(template.get(weekday, ())) if index not in removed]
+            day_lessons += delta.added.get(weekday, [])
+            if day_lessons:
+                # Stable sort keeps order of lessons starting at the same time
+                lessons[weekday] = sorted(day_lessons, key=lambda lesson: lesson['time_start'])
+        return lessons
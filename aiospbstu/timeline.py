@@ -0,0 +1,163 @@
+"""
+Current and next lessons of owners
+
+Timeline keeps lessons of one owner from all added weeks in a list sorted by start,
+so "what's now" and "what's next" are answered with binary search instead of scanning schedules,
+and next lessons are found across week boundaries. Adding a week again replaces only lessons of that week.
+
+Example:
+.. code-block:: python3
+    timelines = TimelineIndex()
+    await timelines.load(api, ('group', 29486))
+
+    record = timelines.current_lesson(('group', 29486))
+    if record is not None:
+        print(record.lesson.subject, record.datetime_end)
+    for record in timelines.next_lessons(('group', 29486), n=3):
+        print(record.datetime_start, record.lesson.subject)
+
+"""
+
+import asyncio
+import bisect
+import datetime
+from typing import Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+
+from . import types
+from .query import LessonRecord
+from .types import AnyDate
+from .utils.date import WEEK, moscow_now, week_start
+
+if TYPE_CHECKING:
+    from .api import PolyScheduleAPI
+
+__all__ = ['Timeline', 'TimelineIndex']
+
+Owner = Tuple[str, int]
+
+
+class Timeline:
+    """
+    Lessons of one owner sorted by start
+    """
+
+    def __init__(self):
+        self._records: List[LessonRecord] = []
+        self._starts: List[datetime.datetime] = []
+
+    def __len__(self):
+        return len(self._records)
+
+    def add_schedule(self, schedule: types.Schedule) -> None:
+        """
+        Add or replace week of lessons
+        """
+        start = schedule.week.date_start
+        records = sorted((LessonRecord(day.date, lesson) for day in schedule.days for lesson in day.lessons),
+                         key=lambda record: record.datetime_start)
+
+        # Lessons of the week are a contiguous part of timeline
+        first = bisect.bisect_left(self._starts, datetime.datetime.combine(start, datetime.time()))
+        last = bisect.bisect_left(self._starts, datetime.datetime.combine(start + WEEK, datetime.time()))
+        self._records[first:last] = records
+        self._starts[first:last] = [record.datetime_start for record in records]
+
+    def current_lessons(self, at: Optional[datetime.datetime] = None) -> List[LessonRecord]:
+        """
+        Lessons going on at the moment, Moscow time now by default
+        """
+        at = at or moscow_now()
+        index = bisect.bisect_right(self._starts, at)
+        found = []
+        # Lessons don't cross midnight, so only started lessons of the same day are checked
+        while index > 0 and self._records[index - 1].date == at.date():
+            index -= 1
+            if self._records[index].datetime_end > at:
+                found.append(self._records[index])
+        found.reverse()
+        return found
+
+    def current_lesson(self, at: Optional[datetime.datetime] = None) -> Optional[LessonRecord]:
+        lessons = self.current_lessons(at)
+        return lessons[0] if lessons else None
+
+    def next_lessons(self, at: Optional[datetime.datetime] = None, n: int = 1) -> List[LessonRecord]:
+        """
+        Lessons that start after the moment, only from added weeks
+        """
+        index = bisect.bisect_right(self._starts, at or moscow_now())
+        return self._records[index:index + n]
+
+    def between(self, start: datetime.datetime, end: datetime.datetime) -> List[LessonRecord]:
+        """
+        Lessons that start from start (included) to end (excluded)
+        """
+        return self._records[bisect.bisect_left(self._starts, start):bisect.bisect_left(self._starts, end)]
+
+
+class TimelineIndex:
+    """
+    Timelines of many owners
+    """
+
+    def __init__(self):
+        self._timelines: Dict[Owner, Timeline] = {}
+        self._weeks: Dict[Owner, set] = {}
+
+    def __contains__(self, owner: Owner) -> bool:
+        return owner in self._timelines
+
+    def get(self, owner: Owner) -> Timeline:
+        return self._timelines.get(owner) or Timeline()
+
+    def add_schedule(self, schedule: types.Schedule) -> None:
+        owner = schedule.owner
+        if owner is None:
+            raise ValueError(f'Schedule for week {schedule.week.date_start} has no owner')
+        kind = schedule.owner_type
+        key = kind, owner.auditory_id if kind == 'auditory' else owner.id
+
+        self._timelines.setdefault(key, Timeline()).add_schedule(schedule)
+        self._weeks.setdefault(key, set()).add(schedule.week.date_start)
+
+    def add_schedules(self, schedules: Iterable[types.Schedule]) -> None:
+        for schedule in schedules:
+            self.add_schedule(schedule)
+
+    def has_week(self, owner: Owner, date: AnyDate) -> bool:
+        return week_start(date) in self._weeks.get(owner, ())
+
+    async def load(self,
+                   api: 'PolyScheduleAPI',
+                   owner: Owner,
+                   date: Optional[AnyDate] = None,
+                   weeks: int = 2,
+                   refresh: bool = False) -> None:
+        """
+        Fetch weeks of owner starting from week of date, so next lessons are found across week boundary
+
+        :param owner: ('group' | 'teacher' | 'auditory', ID)
+        :param date: any date of the first week, today by default
+        :param weeks: count of weeks to fetch
+        :param refresh: fetch weeks that are already added too, schedules come from api cache if they're fresh
+        """
+        kind, owner_id = owner
+        getter = getattr(api, f'get_{kind}_schedule')
+        first = week_start(date)
+        dates = [first + WEEK * number for number in range(weeks)]
+        if not refresh:
+            dates = [date for date in dates if not self.has_week(owner, date)]
+
+        for schedule in await asyncio.gather(*(getter(owner_id, date) for date in dates)):
+            schedule = api.schedule_or_none(schedule)
+            if schedule is not None:
+                self.add_schedule(schedule)
+
+    def current_lesson(self, owner: Owner, at: Optional[datetime.datetime] = None) -> Optional[LessonRecord]:
+        return self.get(owner).current_lesson(at)
+
+    def current_lessons(self, owner: Owner, at: Optional[datetime.datetime] = None) -> List[LessonRecord]:
+        return self.get(owner).current_lessons(at)
+
+    def next_lessons(self, owner: Owner, at: Optional[datetime.datetime] = None, n: int = 1) -> List[LessonRecord]:
+        return self.get(owner).next_lessons(at, n)
@@ -0,0 +1,213 @@
+"""
+HTTP transports used by :class:`aiospbstu.base.BaseScheduleApi` to get responses
+
+AiohttpTransport makes real requests, FakeTransport answers from memory,
+CassetteTransport records responses of another transport to a file and replays them,
+so benchmarks and load tests can run offline and deterministically.
+
+Example:
+.. code-block:: python3
+    # Record responses once
+    api = PolyScheduleAPI(transport=CassetteTransport('ruz.cassette', mode='record'))
+    ...
+    await api.close()  # writes recorded responses
+
+    # Replay them without network
+    api = PolyScheduleAPI(transport=CassetteTransport('ruz.cassette'))
+
+"""
+
+import abc
+import asyncio
+import functools
+import os
+import ssl
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Union
+
+import aiohttp
+import certifi
+
+from . import exceptions as exc
+from .utils import json
+
+__all__ = ['TransportResponse', 'BaseTransport', 'AiohttpTransport', 'FakeTransport', 'CassetteTransport']
+
+
+@functools.lru_cache(maxsize=None)
+def ssl_context() -> ssl.SSLContext:
+    """
+    SSL context with certifi CA bundle, loading it is slow, so it's created once and shared by all sessions
+    """
+    return ssl.create_default_context(cafile=certifi.where())
+
+
+class TransportResponse(NamedTuple):
+    status: int
+    content_type: str
+    body: str
+
+
+class BaseTransport(abc.ABC):
+
+    @abc.abstractmethod
+    async def get(self, url: str) -> TransportResponse:
+        """
+        :raises NetworkError
+        """
+
+    async def close(self) -> None:
+        ...
+
+
+class AiohttpTransport(BaseTransport):
+
+    def __init__(self,
+                 loop: Optional[asyncio.AbstractEventLoop] = None,
+                 session: Optional[aiohttp.ClientSession] = None):
+        """
+        :param loop: asyncio event loop
+        :param session: session to use instead of the default one
+        """
+        if session is None:
+            connector = aiohttp.TCPConnector(ssl=ssl_context(), loop=loop)
+            session = aiohttp.ClientSession(connector=connector, loop=loop, json_serialize=json.dumps)
+        self.session = session
+
+    async def get(self, url: str) -> TransportResponse:
+        try:
+            async with self.session.get(url) as response:
+                body = await response.text()
+        except aiohttp.ClientError as e:
+            raise exc.NetworkError(url=url, cause=e)
+
+        return TransportResponse(status=response.status, content_type=response.content_type, body=body)
+
+    async def close(self) -> None:
+        await self.session.close()
+
+
+FakeResponse = Union[TransportResponse, dict, list, str]
+
+
+class FakeTransport(BaseTransport):
+    """
+    Transport that answers with predefined responses, unknown urls get RUZ-like "not found" error
+    """
+
+    def __init__(self,
+                 responses: Optional[Dict[str, FakeResponse]] = None,
+                 handler: Optional[Callable[[str], Awaitable[Optional[FakeResponse]]]] = None,
+                 latency: float = 0):
+        """
+        :param responses: response by url, dicts and lists are encoded to JSON
+        :param handler: coroutine function that gets response for url, used when url is not in responses
+        :param latency: seconds to wait before every response
+        """
+        self.responses: Dict[str, TransportResponse] = {}
+        for url, response in (responses or {}).items():
+            self.add(url, response)
+        self.handler = handler
+        self.latency = latency
+        self.requests: List[str] = []
+
+    def add(self, url: str, response: FakeResponse, status: int = 200) -> None:
+        self.responses[url] = self._make_response(response, status)
+
+    async def get(self, url: str) -> TransportResponse:
+        self.requests.append(url)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        response = self.responses.get(url)
+        if response is None and self.handler is not None:
+            response = await self.handler(url)
+            if response is not None:
+                response = self._make_response(response)
+        if response is None:
+            response = self._make_response({'error': True, 'text': f'Ресурс {url} не найден'}, status=404)
+        return response
+
+    @staticmethod
+    def _make_response(response: FakeResponse, status: int = 200) -> TransportResponse:
+        if isinstance(response, TransportResponse):
+            return response
+        if not isinstance(response, str):
+            response = json.dumps(response)
+        return TransportResponse(status=status, content_type='application/json', body=response)
+
+
+class CassetteTransport(BaseTransport):
+    """
+    Records responses of another transport to a file or replays them from it
+
+    File has one JSON object per line: {"url": ..., "status": ..., "content_type": ..., "body": ...}
+    Recorded responses are buffered and written on flush() or close()
+    """
+    RECORD, REPLAY, AUTO = 'record', 'replay', 'auto'
+
+    def __init__(self, path: str, mode: str = REPLAY, transport: Optional[BaseTransport] = None):
+        """
+        :param path: cassette file
+        :param mode: "replay" only reads cassette, "record" makes requests and writes all responses,
+                     "auto" replays known urls and records unknown ones
+        :param transport: transport making real requests in "record" and "auto" modes, AiohttpTransport by default
+        """
+        if mode not in (self.RECORD, self.REPLAY, self.AUTO):
+            raise ValueError(f'Unknown cassette mode: {mode}')
+
+        self.path = path
+        self.mode = mode
+        # Default transport is created on first request, since aiohttp session needs running loop
+        self._transport = transport
+        self._recorded: List[str] = []
+
+        self.responses: Dict[str, TransportResponse] = {}
+        if mode != self.RECORD and os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                for line in file:
+                    record = json.loads(line)
+                    url = record.pop('url')
+                    self.responses[url] = TransportResponse(**record)
+        elif mode == self.RECORD and os.path.exists(path):
+            os.remove(path)
+
+    @property
+    def transport(self) -> Optional[BaseTransport]:
+        if self._transport is None and self.mode != self.REPLAY:
+            self._transport = AiohttpTransport()
+        return self._transport
+
+    @transport.setter
+    def transport(self, transport: Optional[BaseTransport]) -> None:
+        self._transport = transport
+
+    async def get(self, url: str) -> TransportResponse:
+        if self.mode != self.RECORD:
+            response = self.responses.get(url)
+            if response is not None:
+                return response
+            if self.mode == self.REPLAY:
+                raise exc.NetworkError(f'Response is not recorded in cassette {self.path}', url=url)
+
+        response = await self.transport.get(url)
+        self.responses[url] = response
+        self._recorded.append(json.dumps({'url': url, **response._asdict()}) + '\n')
+        return response
+
+    async def flush(self) -> None:
+        """
+        Write recorded responses to cassette, file is written in executor to not block event loop
+        """
+        if not self._recorded:
+            return
+        lines, self._recorded = self._recorded, []
+        await asyncio.get_event_loop().run_in_executor(None, self._write, lines)
+
+    def _write(self, lines: List[str]) -> None:
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.writelines(lines)
+
+    async def close(self) -> None:
+        await self.flush()
+        if self._transport is not None:
+            await self._transport.close()
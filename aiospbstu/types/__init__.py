@@ -1,16 +1,20 @@
-from . import base
-from .base import AnyDate
-from .auditory import Auditory
-from .building import Building
-from .day import Day, Weekday
-from .faculty import Faculty
-from .group import Group, GroupKind, GroupType, GroupLevel
-from .lesson import Lesson
-from .method import Method
-from .schedule import Schedule
-from .teacher import Teacher
-from .week import Week
-from .type_obj import LessonTypeName, TypeObj
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from . import base
+    from .base import AnyDate
+    from .auditory import Auditory
+    from .building import Building
+    from .day import Day, Weekday
+    from .faculty import Faculty
+    from .group import Group, GroupKind, GroupType, GroupLevel
+    from .lesson import Lesson
+    from .method import Method
+    from .schedule import Schedule
+    from .teacher import Teacher
+    from .week import Week
+    from .type_obj import LessonTypeName, TypeObj
 
 __all__ = [
     'AnyDate',
@@ -28,3 +32,38 @@ __all__ = [
     'TypeObj',
     'Week'
 ]
+
+# Models are built on first access, so only used ones are paid for
+_LAZY_ATTRIBUTES = {
+    'AnyDate': 'base',
+    'Auditory': 'auditory',
+    'Building': 'building',
+    'Day': 'day',
+    'Weekday': 'day',
+    'Faculty': 'faculty',
+    'Group': 'group',
+    'GroupKind': 'group',
+    'GroupType': 'group',
+    'GroupLevel': 'group',
+    'Lesson': 'lesson',
+    'Method': 'method',
+    'Schedule': 'schedule',
+    'Teacher': 'teacher',
+    'Week': 'week',
+    'LessonTypeName': 'type_obj',
+    'TypeObj': 'type_obj',
+}
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
@@ -1,9 +1,10 @@
 import abc
 import datetime
-from typing import Optional, Union, TypeVar, TYPE_CHECKING
+import weakref
+from contextvars import ContextVar
+from typing import Any, ClassVar, Optional, Union, TypeVar, TYPE_CHECKING
 
-import pydantic
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 
 __all__ = [
     'AnyDate',
@@ -11,7 +12,8 @@ __all__ = [
     'StrScheduleObject',
     'ObjectWithSchedule',
     'cached_property',
-    'cached_class_property'
+    'cached_class_property',
+    'parsing_api'
 ]
 
 UniScheduleModel = TypeVar('UniScheduleModel', bound='BaseScheduleObject')
@@ -39,6 +41,8 @@ class _CachedProperty:
         cached = self._cached.get(instance_id, _Missing)
         if cached is _Missing:
             cached = self._cached[instance_id] = self.getter(instance)
+            # Id may be reused by another object once instance is collected
+            weakref.finalize(instance, self._cached.pop, instance_id, None)
         return cached
 
 
@@ -55,39 +59,81 @@ class _CachedClassProperty:
         return self._cached
 
 
-cached_property = _CachedProperty
-cached_class_property = _CachedClassProperty
+class _BoundApi:
+    """
+    Api instance that produced the object.
+    Objects created not by api and object classes get current api instance from context
+    """
+    __slots__ = ()
 
+    def __get__(self, instance, owner) -> 'PolyScheduleAPI':
+        api = instance._api if instance is not None else None
+        if api is None:
+            from .. import PolyScheduleAPI
+            api = PolyScheduleAPI.get_current()
+            if api is None:
+                raise RuntimeError("Can't get api instance from context. "
+                                   "You can fix it with setting current instance: "
+                                   "'PolyScheduleAPI.set_current(api_instance)'")
+        return api
 
-def patch_pydantic():
-    # We need it until this gets released: https://github.com/samuelcolvin/pydantic/pull/679
-    pydantic.main.TYPE_BLACKLIST = pydantic.main.TYPE_BLACKLIST + (cached_class_property, cached_property)
 
+cached_property = _CachedProperty
+cached_class_property = _CachedClassProperty
 
-patch_pydantic()
+# Api instance that is parsing response at the moment, objects created while parsing are bound to it
+parsing_api: ContextVar[Optional['PolyScheduleAPI']] = ContextVar('parsing_api', default=None)
 
 
 class BaseScheduleObject(BaseModel):
-    class Config:
-        arbitrary_types_allowed = True
-
-    @cached_class_property
-    def api(self) -> 'PolyScheduleAPI':
-        from .. import PolyScheduleAPI
-        api = PolyScheduleAPI.get_current()
-        if api is None:
-            raise RuntimeError("Can't get api instance from context. "
-                               "You can fix it with setting current instance: "
-                               "'PolyScheduleAPI.set_current(api_instance)'")
-        return api
-
-    @cached_class_property
+    model_config = ConfigDict(
+        arbitrary_types_allowed=True,
+        # Descriptors of the class, not fields
+        ignored_types=(cached_class_property, cached_property, _BoundApi),
+        # RUZ API sometimes sends numbers in text fields
+        coerce_numbers_to_str=True,
+    )
+
+    api = _BoundApi()
+    _api: Optional[Any] = PrivateAttr(None)
+
+    def model_post_init(self, __context: Any) -> None:
+        # Called for nested objects too, so all objects created while parsing are bound
+        self._bind(parsing_api.get())
+
+    def __eq__(self, other):
+        # Objects bound to different api instances are still equal
+        if isinstance(other, BaseModel):
+            return type(self) is type(other) and self.__dict__ == other.__dict__
+        return NotImplemented
+
+    def __getstate__(self):
+        # Api instance can't be pickled, objects are bound again with bind()
+        state = super().__getstate__()
+        state['__pydantic_private__'] = {**state['__pydantic_private__'], '_api': None}
+        return state
+
+    def _bind(self, api: Optional['PolyScheduleAPI']):
+        if api is not None:
+            self._api = api
+
+    def bind(self, api: 'PolyScheduleAPI'):
+        """
+        Bind object and all nested objects to api instance, e.g. after unpickling
+        """
+        self._bind(api)
+        for value in self.__dict__.values():
+            for item in value if isinstance(value, list) else (value,):
+                if isinstance(item, BaseScheduleObject):
+                    item.bind(api)
+
+    @property
     def skip_exceptions(self):
         return self.api.skip_exceptions
 
 
 class StrScheduleObject(BaseScheduleObject):
-    _str = 'name'
+    _str: ClassVar[str] = 'name'
 
     def __str__(self):
         return getattr(self, self._str, super().__str__())
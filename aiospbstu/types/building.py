@@ -1,6 +1,6 @@
 from typing import List, Optional
 
-from pydantic import Schema
+from pydantic import Field
 
 from .base import StrScheduleObject, ObjectWithSchedule, AnyDate
 
@@ -12,7 +12,7 @@ class Building(StrScheduleObject):
     name: str
     abbr: str
     address: str
-    rooms: Optional[List['Auditory']]
+    rooms: Optional[List['Auditory']] = None
 
     async def get_auditories(self) -> List['Auditory']:
         if not self.rooms:
@@ -21,7 +21,7 @@ class Building(StrScheduleObject):
 
 
 class Auditory(ObjectWithSchedule):
-    auditory_id: int = Schema(None, alias='id')
+    auditory_id: Optional[int] = Field(None, alias='id')
     name: str
     building: Building
 
@@ -29,4 +29,4 @@ class Auditory(ObjectWithSchedule):
         return await self.api.get_auditory_schedule(self.auditory_id, date)
 
 
-Building.update_forward_refs()
+Building.model_rebuild()
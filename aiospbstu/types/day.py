@@ -2,7 +2,7 @@ import datetime
 from enum import IntEnum
 from typing import List
 
-from pydantic import validator
+from pydantic import field_validator
 
 from .base import BaseScheduleObject
 from .lesson import Lesson
@@ -33,11 +33,13 @@ class Day(BaseScheduleObject):
         for lesson in self.lessons:
             yield lesson
 
-    @validator('weekday', pre=True)
+    @field_validator('weekday', mode='before')
+    @classmethod
     def _format_weekday(cls, weekday):
         return weekday - 1
 
-    @validator('lessons', pre=True, whole=True)
+    @field_validator('lessons', mode='before')
+    @classmethod
     def _filter_lessons_duplicates(cls, lessons: list):
         filtered_lessons = []
         is_duplicate = False
@@ -1,6 +1,6 @@
 from typing import Optional, List, TYPE_CHECKING
 
-from pydantic import Schema
+from pydantic import Field
 
 from .base import BaseScheduleObject
 
@@ -11,12 +11,16 @@ if TYPE_CHECKING:
 
 
 class Faculty(BaseScheduleObject):
-    id: int = Schema(None, alias='id')
+    id: Optional[int] = Field(None, alias='id')
     name: str
     abbr: str
-    groups: Optional[List['Group']]
+    groups: Optional[List['Group']] = None
 
     async def get_groups(self):
         if not self.groups:
             self.groups = await self.api.get_faculty_groups(self.id)
         return self.groups
+
+
+# Group module rebuilds Faculty when Group is defined
+from . import group  # noqa: E402,F401
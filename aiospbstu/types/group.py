@@ -1,7 +1,7 @@
 from enum import IntEnum
 from typing import Optional, List
 
-from pydantic import Schema
+from pydantic import Field
 
 from .base import ObjectWithSchedule, AnyDate
 from .faculty import Faculty
@@ -39,7 +39,7 @@ class Group(ObjectWithSchedule):
     id: int
     name: str
     level: GroupLevel
-    group_type: str = Schema(None, alias='type')
+    group_type: Optional[str] = Field(None, alias='type')
     kind: GroupKind
     spec: str
     faculty: Faculty
@@ -50,3 +50,7 @@ class Group(ObjectWithSchedule):
     @classmethod
     async def search(cls, name: str) -> List['Group']:
         return await cls.api.search_group(teacher_name=name)
+
+
+# Faculty.groups refers to Group
+Faculty.model_rebuild()
@@ -1,8 +1,8 @@
 import datetime
 from enum import IntEnum
-from typing import List, Optional
+from typing import ClassVar, List, Optional
 
-from pydantic import Schema
+from pydantic import Field
 
 from .auditory import Auditory
 from .base import StrScheduleObject
@@ -43,14 +43,14 @@ class LessonType(IntEnum):
 class Lesson(StrScheduleObject):
     subject: str
     subject_short: str
-    lesson_type: int = Schema(None, alias='type')
+    lesson_type: Optional[int] = Field(None, alias='type')
     additional_info: str
     time_start: datetime.time
     time_end: datetime.time
     parity: int
-    type_obj: TypeObj = Schema(None, alias='typeObj')
+    type_obj: Optional[TypeObj] = Field(None, alias='typeObj')
     groups: List[Group]
-    teachers: Optional[List[Teacher]]
+    teachers: Optional[List[Teacher]] = None
     auditories: List[Auditory]
 
-    _str = 'subject_short'
+    _str: ClassVar[str] = 'subject_short'
@@ -2,7 +2,7 @@ import re
 from typing import Union, List, Optional, Dict, Tuple
 from urllib.parse import urlencode
 
-from pydantic import validator
+from pydantic import field_validator
 
 from .base import BaseScheduleObject, cached_property
 from ..utils.case import to_snake
@@ -11,13 +11,14 @@ __all__ = ['Method', ]
 
 
 class Method(BaseScheduleObject):
-    name: str = None
-    endpoint: str = None
-    endpoint_template: str = None
+    name: Optional[str] = None
+    endpoint: Optional[str] = None
+    endpoint_template: Optional[str] = None
     expected_keys: Union[str, Dict[str, str]] = {}
     no_data_on_success: bool = False
     url_params_allowed: bool = False
-    on_api_error: Optional[type]
+    on_api_error: Optional[type] = None
+    cache_ttl: Optional[float] = None
 
     @cached_property
     def needed_endpoint_params(self) -> List[str]:
@@ -83,11 +84,13 @@ class Method(BaseScheduleObject):
             return BaseScheduleObject.__getattr__(self, item)
         except AttributeError as e:
             try:
-                return self.expected_keys[item]
+                # Not self.expected_keys, it's looked up here again while object isn't initialized
+                return self.__dict__['expected_keys'][item]
             except (KeyError, TypeError):
                 raise e
 
-    @validator('expected_keys', whole=True, pre=True)
+    @field_validator('expected_keys', mode='before')
+    @classmethod
     def _make_keys_dict(cls, keys) -> dict:
         if isinstance(keys, str):
             return {f'{to_snake(keys)}_key': keys}
@@ -1,6 +1,7 @@
+import time
 from typing import List, Optional
 
-from pydantic import Schema
+from pydantic import Field, PrivateAttr
 
 from .auditory import Auditory
 from .base import BaseScheduleObject, AnyDate, cached_property
@@ -15,9 +16,11 @@ __all__ = ['Schedule']
 class Schedule(BaseScheduleObject):
     week: Week
     days: List[Day]
-    group: Optional[Group]
-    teacher: Optional[Teacher]
-    auditory: Optional[Auditory] = Schema(None, alias='room')
+    group: Optional[Group] = None
+    teacher: Optional[Teacher] = None
+    auditory: Optional[Auditory] = Field(None, alias='room')
+
+    _fetched_at: Optional[float] = PrivateAttr(None)
 
     @classmethod
     async def get(cls, group_id=None, teacher_id=None, auditory_id=None, date: Optional[AnyDate] = None):
@@ -45,6 +48,18 @@ class Schedule(BaseScheduleObject):
                 return day
         return None
 
+    @property
+    def age(self) -> Optional[float]:
+        """
+        Seconds since schedule was received from server, None if it's unknown
+        """
+        if self._fetched_at is None:
+            return None
+        return time.time() - self._fetched_at
+
+    def _set_fetched_at(self, timestamp: float):
+        self._fetched_at = timestamp
+
     @property
     def first_day(self):
         if self.days:
@@ -78,6 +93,13 @@ class Schedule(BaseScheduleObject):
     def owner(self):
         return self.group or self.teacher or self.auditory
 
+    def to_ical(self, name: Optional[str] = None) -> str:
+        """
+        iCalendar with lessons of schedule, generated locally, see aiospbstu.ical
+        """
+        from ..ical import iter_calendar
+        return ''.join(iter_calendar((self,), name=name))
+
     def __iter__(self) -> Day:
         for day in self.days:
             yield day
@@ -1,4 +1,4 @@
-from pydantic import validator
+from pydantic import field_validator
 
 from ..types.base import StrScheduleObject
 from ..utils.strenum import StrEnum
@@ -36,7 +36,8 @@ class TypeObj(StrScheduleObject):
     name: LessonTypeName
     abbr: str
 
-    @validator('name')
+    @field_validator('name')
+    @classmethod
     def _fix_name(cls, enum_field: LessonTypeName):
         # RUZ API return some names in the plural form, fixing it
         if enum_field.name.startswith('api_'):
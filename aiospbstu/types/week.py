@@ -1,6 +1,6 @@
 import datetime
 
-from pydantic import validator
+from pydantic import field_validator
 
 from .base import BaseScheduleObject
 
@@ -12,10 +12,12 @@ class Week(BaseScheduleObject):
     date_end: datetime.date
     is_odd: bool
 
-    @validator('date_start', pre=True)
+    @field_validator('date_start', mode='before')
+    @classmethod
     def _set_proper_start_date(cls, v: str):
         return v.replace('.', '-')
 
-    @validator('date_end', pre=True)
+    @field_validator('date_end', mode='before')
+    @classmethod
     def _set_proper_end_date(cls, v: str):
         return v.replace('.', '-')
@@ -0,0 +1,82 @@
+class AdaptiveLimit:
+    """
+    Concurrency limit that follows server latency, AIMD driven by latency gradient
+
+    Limit grows by one per `limit` successful requests while latency stays close to the lowest observed one,
+    it's multiplied by the gradient (lowest latency / current latency) when latency grows,
+    and by `backoff` when server is overloaded (timeouts and internal errors).
+    Limit is decreased at most once per `limit` requests, so a burst of slow responses counts once.
+    """
+
+    def __init__(self,
+                 initial: float = 10,
+                 min_limit: float = 1,
+                 max_limit: float = 100,
+                 backoff: float = 0.5,
+                 tolerance: float = 2.0,
+                 smoothing: float = 0.1,
+                 reset_every: int = 1000):
+        """
+        :param initial: limit to start with
+        :param min_limit: limit never goes lower
+        :param max_limit: limit never goes higher
+        :param backoff: multiplier of limit on overload, also the strongest decrease on latency growth
+        :param tolerance: how many times latency may exceed the lowest one before limit is decreased
+        :param smoothing: weight of new latency sample in moving average
+        :param reset_every: the lowest latency is forgotten every this many samples, so it follows server changes
+        """
+        if not 0 < min_limit <= initial <= max_limit:
+            raise ValueError(f'Expected 0 < min_limit <= initial <= max_limit, '
+                             f'got {min_limit}, {initial}, {max_limit}')
+        if not 0 < backoff < 1:
+            raise ValueError(f'backoff must be between 0 and 1, got {backoff}')
+
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.reset_every = reset_every
+
+        self.latency = None
+        self.min_latency = None
+        self._samples = 0
+        self._last_decrease = 0
+
+    def on_sample(self, latency: float, in_flight: int) -> None:
+        """
+        Record latency of completed request
+
+        :param latency: seconds request took
+        :param in_flight: count of requests running along with it, limit isn't raised if it's not used anyway
+        """
+        self._samples += 1
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.smoothing * (latency - self.latency)
+
+        if self.min_latency is None or latency < self.min_latency:
+            self.min_latency = latency
+        if self._samples % self.reset_every == 0:
+            self.min_latency = self.latency
+
+        gradient = self.tolerance * self.min_latency / self.latency if self.latency else 1
+        if gradient < 1:
+            self._decrease(max(gradient, self.backoff))
+        elif in_flight * 2 >= self.limit:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def on_overload(self) -> None:
+        """
+        Record request that failed because server is overloaded
+        """
+        self._samples += 1
+        self._decrease(self.backoff)
+
+    def _decrease(self, multiplier: float) -> None:
+        if self._samples - self._last_decrease < self.limit:
+            return
+        self._last_decrease = self._samples
+        self.limit = max(self.min_limit, self.limit * multiplier)
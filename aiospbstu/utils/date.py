@@ -1,13 +1,90 @@
+"""
+Dates as RUZ sees them
+
+RUZ works in Moscow time and returns the same week for any date inside of it,
+so schedules are requested and cached by week start, and "today" is Moscow today, not the local one.
+Week parity is counted from the first academic week of September, like Week.is_odd of RUZ.
+"""
+
 import datetime
-from typing import Union
+import functools
+from typing import Iterator, Union
+
+__all__ = ['MOSCOW_TZ', 'WEEK', 'iso_date', 'moscow_now', 'today', 'week_start', 'weeks',
+           'academic_year_start', 'week_number', 'is_odd_week']
+
+# Moscow has no DST since 2014
+MOSCOW_TZ = datetime.timezone(datetime.timedelta(hours=3), 'MSK')
+WEEK = datetime.timedelta(days=7)
+
+
+def moscow_now() -> datetime.datetime:
+    """
+    Current Moscow time as naive datetime, so it can be compared with lesson times
+    """
+    return datetime.datetime.now(MOSCOW_TZ).replace(tzinfo=None)
+
+
+def today() -> datetime.date:
+    return moscow_now().date()
 
 
 def iso_date(date: Union[datetime.datetime, datetime.date, None]) -> datetime.date:
     if date is None:
-        return datetime.datetime.now().date()
+        return today()
     if isinstance(date, datetime.datetime):
         return date.date()
     elif isinstance(date, datetime.date):
         return date
     else:
         raise ValueError(f'Object {date} ({type(date)}) is not an instance of datetime.datetime or datetime.date')
+
+
+def week_start(date: Union[datetime.datetime, datetime.date, None]) -> datetime.date:
+    """
+    Monday of the week of date, today's week if date is None
+    """
+    date = iso_date(date)
+    return date - datetime.timedelta(days=date.weekday())
+
+
+def weeks(date_from: datetime.date, date_to: datetime.date) -> Iterator[datetime.date]:
+    """
+    Starts of all weeks between dates, including weeks of date_from and date_to
+    """
+    start = week_start(date_from)
+    while start <= date_to:
+        yield start
+        start += WEEK
+
+
+@functools.lru_cache(maxsize=None)
+def _academic_year_start(year: int) -> datetime.date:
+    first = datetime.date(year, 9, 1)
+    # Studies don't begin on Sunday, then the first week is the next one
+    if first.weekday() == 6:
+        first += datetime.timedelta(days=1)
+    return week_start(first)
+
+
+def academic_year_start(date: Union[datetime.datetime, datetime.date, None]) -> datetime.date:
+    """
+    Start of the first week of academic year that date belongs to
+    """
+    date = iso_date(date)
+    start = _academic_year_start(date.year)
+    if date < start:
+        start = _academic_year_start(date.year - 1)
+    return start
+
+
+def week_number(date: Union[datetime.datetime, datetime.date, None]) -> int:
+    """
+    Number of week in academic year, the first one is 1
+    """
+    date = iso_date(date)
+    return (week_start(date) - academic_year_start(date)).days // 7 + 1
+
+
+def is_odd_week(date: Union[datetime.datetime, datetime.date, None]) -> bool:
+    return week_number(date) % 2 == 1
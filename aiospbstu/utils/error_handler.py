@@ -1,6 +1,8 @@
+import asyncio
 import functools
 import inspect
 import logging
+from typing import Any, Awaitable, Generic, List, Optional, Tuple, Type, TypeVar, Union
 
 import pydantic
 
@@ -8,31 +10,134 @@ from .. import exceptions
 
 log = logging.getLogger('aiospbstu')
 
+T = TypeVar('T')
+
+
+class ErrorPolicy:
+    """
+    Defines which exceptions are skipped and how skipped exceptions are logged
+    """
+
+    def __init__(self,
+                 skip_exceptions: Union[Tuple[Type[BaseException], ...], Type[BaseException]] = (),
+                 log_level: Optional[int] = logging.WARNING,
+                 log_every: int = 1,
+                 log_traceback: bool = False):
+        """
+        :param skip_exceptions: exceptions that will be suppressed, instead response of server is returned
+        :param log_level: level of skipped exceptions messages, None to not log them at all
+        :param log_every: log only every n-th skipped exception
+        :param log_traceback: add traceback to messages, it's expensive, so it's disabled by default
+        """
+        if not isinstance(skip_exceptions, tuple):
+            skip_exceptions = (skip_exceptions,)
+        for exception in skip_exceptions:
+            if not issubclass(exception, BaseException):
+                raise ValueError(f'Unexpected type of exception in skip_exceptions: {exception}')
+            elif not issubclass(exception, exceptions.BaseUniScheduleError):
+                log.warning(f'Expected subclass of {exceptions.BaseUniScheduleError} in skip_exceptions, '
+                            f'got {exception}')
+        if log_every < 1:
+            raise ValueError(f'log_every must be positive, got {log_every}')
+
+        self.skip_exceptions = skip_exceptions
+        self.log_level = log_level
+        self.log_every = log_every
+        self.log_traceback = log_traceback
+        self.skipped_count = 0
+
+    def handle(self, error: BaseException, func_name: str) -> Any:
+        """
+        Raise error if it's not skipped, otherwise log it and return server response
+        """
+        if not isinstance(error, self.skip_exceptions):
+            raise error
+
+        self.skipped_count += 1
+        if (self.log_level is not None and self.skipped_count % self.log_every == 0
+                and log.isEnabledFor(self.log_level)):
+            log.log(self.log_level, 'Skipped %s in %s: %s', type(error).__name__, func_name, error,
+                    exc_info=error if self.log_traceback else None)
+        return getattr(error, 'response', None)
+
+
+class Result(Generic[T]):
+    """
+    Value or error of a single call, for batches where some calls are expected to fail
+    """
+    __slots__ = 'value', 'error'
+
+    def __init__(self, value: Optional[T] = None, error: Optional[BaseException] = None):
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def unwrap(self) -> T:
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    def __repr__(self):
+        if self.error is not None:
+            return f'<Result error={self.error!r}>'
+        return f'<Result value={self.value!r}>'
+
+
+async def capture(awaitable: Awaitable[T],
+                  catch: Tuple[Type[BaseException], ...] = (exceptions.BaseUniScheduleError,)) -> Result[T]:
+    """
+    Await and wrap its value or raised exception in Result
+
+    :param awaitable: call to wrap, e.g. api.get_group(group_id)
+    :param catch: exceptions to put in Result, other exceptions are raised
+    """
+    try:
+        return Result(value=await awaitable)
+    except catch as e:
+        return Result(error=e)
+
+
+async def gather_results(*awaitables: Awaitable[T],
+                         catch: Tuple[Type[BaseException], ...] = (exceptions.BaseUniScheduleError,)
+                         ) -> List[Result[T]]:
+    """
+    Run awaitables concurrently, see capture()
+
+    Example:
+    .. code-block:: python3
+        results = await gather_results(*(api.get_group(group_id) for group_id in range(30000, 31000)))
+        groups = [result.value for result in results if result.ok]
+
+    """
+    return list(await asyncio.gather(*(capture(awaitable, catch) for awaitable in awaitables)))
+
 
 def handle_exceptions(func):
+    func_name = func.__name__
+
     @functools.wraps(func)
     async def inner(class_instance, *args, **kwargs):
+        # Nothing is looked up until exception is raised
         try:
-            skip_exceptions = class_instance.skip_exceptions
-        except AttributeError:
-            skip_exceptions = ()
-            log.warning(f'Unable to get skip_exceptions for {func.__name__} from class {type(class_instance).__name__}')
+            return await func(class_instance, *args, **kwargs)
+        except pydantic.ValidationError as e:
+            error = exceptions.ResponseValueError(cause=e)
+            error.__cause__ = e
+        except Exception as e:
+            error = e
 
-        # TODO: figure out better way of catching pydantic.ValidationError
-        try:
-            try:
-                return await func(class_instance, *args, **kwargs)
-            except pydantic.ValidationError as e:
-                raise exceptions.ResponseValueError(cause=e)
-        except skip_exceptions as e:
-            log.exception('Skipped exception in request:', exc_info=e)
-            return getattr(e, 'response', None)
+        return class_instance.error_policy.handle(error, func_name)
 
     return inner
 
 
 def error_handler(cls: type) -> type:
-    for coroutine in (obj for obj in cls.__dict__.values() if inspect.iscoroutinefunction(obj)):
-        setattr(cls, coroutine.__name__, handle_exceptions(coroutine))
+    # Private coroutines are called by public ones, so their errors reach the public ones as they are
+    for name, coroutine in list(cls.__dict__.items()):
+        if inspect.iscoroutinefunction(coroutine) and not name.startswith('_'):
+            setattr(cls, name, handle_exceptions(coroutine))
 
     return cls
@@ -2,7 +2,7 @@
 Based on: https://github.com/MrMrRobat/AnyStrEnum
 """
 
-from enum import Enum, EnumMeta, _EnumDict, auto
+from enum import Enum, EnumMeta, auto
 from types import FunctionType
 from typing import List, Callable, AnyStr, Set, Type, Any
 import logging
@@ -95,6 +95,12 @@ class BaseStrEnum(str, Enum):
     def __str__(self):
         return self.value
 
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source, handler):
+        # Validate by calling enum, so __return_missing__ works in models too
+        from pydantic_core import core_schema
+        return core_schema.no_info_plain_validator_function(cls)
+
 
 class StrEnumMeta(EnumMeta):
     # It's here to avoid 'got an unexpected keyword argument' TypeError
@@ -103,7 +109,7 @@ class StrEnumMeta(EnumMeta):
         return super().__prepare__(*args, **kwargs)
 
     def __new__(mcs, cls, bases, class_dict, sep: AnyStr = None, converter: Callable[[str], str] = None):
-        mixin_type, base_enum = mcs._get_mixins_(bases)
+        mixin_type, base_enum = mcs._get_mixins_(cls, bases)
         if not issubclass(base_enum, BaseStrEnum):
             raise TypeError(f'Unexpected Enum type \'{base_enum.__name__}\'. '
                             f'Only {BaseStrEnum.__name__} and its subclasses are allowed')
@@ -118,7 +124,7 @@ class StrEnumMeta(EnumMeta):
             converter = class_dict.get(CONVERTER_ATTR) or base_enum.__converter__
 
         item = StrItem(sep=sep, converter=converter)
-        new_class_dict = _EnumDict()
+        new_class_dict = super().__prepare__(cls, bases)
         for name, type_hint in class_dict.get('__annotations__', {}).items():
             if name.startswith('_') or name in class_dict:
                 continue
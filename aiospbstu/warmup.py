@@ -0,0 +1,178 @@
+"""
+Background cache warm-up for :class:`aiospbstu.PolyScheduleAPI`
+
+Next week schedules of hot owners are prefetched once a week (Sunday night by default),
+and current week schedules are refreshed shortly before the first lesson of the day begins,
+so the first requests of a week and of a day are served from cache.
+
+Example:
+.. code-block:: python3
+    api = PolyScheduleAPI(cache=MemoryCache())
+    warm_up = api.warm_up(group_ids=[29486, 29487])
+    ...
+    await warm_up.stop()
+
+"""
+
+import asyncio
+import datetime
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+
+from . import exceptions as exc, types
+from .scheduler import Priority, request_options
+from .types import Weekday
+from .utils.date import WEEK, moscow_now, today, week_start
+
+if TYPE_CHECKING:
+    from .api import PolyScheduleAPI
+
+log = logging.getLogger('aiospbstu')
+
+__all__ = ['WarmUpScheduler']
+
+Owner = Tuple[str, int]
+
+
+class WarmUpScheduler:
+
+    def __init__(self,
+                 api: 'PolyScheduleAPI',
+                 group_ids: Iterable[int] = (),
+                 teacher_ids: Iterable[int] = (),
+                 auditory_ids: Iterable[int] = (),
+                 learn: bool = True,
+                 learned_limit: int = 100,
+                 prefetch_weekday: Weekday = Weekday.sunday,
+                 prefetch_time: datetime.time = datetime.time(22, 0),
+                 refresh_before: datetime.timedelta = datetime.timedelta(minutes=30),
+                 default_day_start: datetime.time = datetime.time(8, 0),
+                 concurrency: int = 5):
+        """
+        :param api: api instance with cache
+        :param group_ids: IDs of groups whose schedules should be always warm
+        :param teacher_ids: IDs of teachers whose schedules should be always warm
+        :param auditory_ids: IDs of auditories whose schedules should be always warm
+        :param learn: also warm up schedules of owners recently requested through api
+        :param learned_limit: max count of recently requested owners to warm up
+        :param prefetch_weekday: day of week when next week schedules are prefetched
+        :param prefetch_time: time of day when next week schedules are prefetched
+        :param refresh_before: how long before the first lesson of the day schedules are refreshed
+        :param default_day_start: time of the first lesson if it's unknown yet
+        :param concurrency: max count of simultaneous warm-up requests
+        """
+        if api.cache is None:
+            raise ValueError('Warm-up is useless without cache, pass cache to api first')
+
+        self.api = api
+        self.owners: List[Owner] = [
+            *(('group', group_id) for group_id in group_ids),
+            *(('teacher', teacher_id) for teacher_id in teacher_ids),
+            *(('auditory', auditory_id) for auditory_id in auditory_ids),
+        ]
+        self.learn = learn
+        self.learned_limit = learned_limit
+        self.prefetch_weekday = prefetch_weekday
+        self.prefetch_time = prefetch_time
+        self.refresh_before = refresh_before
+        self.default_day_start = default_day_start
+
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._first_lessons: Dict[datetime.date, datetime.time] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def hot_owners(self) -> List[Owner]:
+        owners = dict.fromkeys(self.owners)
+        if self.learn:
+            # The most recently requested owners go first
+            recent_owners = list(reversed(self.api.recent_owners))[:self.learned_limit]
+            owners.update(dict.fromkeys(recent_owners))
+        return list(owners)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = self.api.loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def prefetch_next_week(self) -> None:
+        """
+        Fetch next week schedules of hot owners, replacing the cached ones
+        """
+        async def prefetch(kind: str, owner_id: int):
+            schedule = await self._get_schedule(kind, owner_id, today())
+            if schedule is not None:
+                await self._get_schedule(kind, owner_id, schedule.week.date_start + WEEK, refresh=True)
+
+        await asyncio.gather(*(prefetch(kind, owner_id) for kind, owner_id in self.hot_owners))
+
+    async def refresh_today(self) -> None:
+        """
+        Fetch current week schedules of hot owners, replacing the cached ones
+        """
+        await asyncio.gather(*(self._get_schedule(kind, owner_id, today(), refresh=True)
+                               for kind, owner_id in self.hot_owners))
+
+    def next_prefetch(self, now: datetime.datetime) -> datetime.datetime:
+        days_ahead = (self.prefetch_weekday - now.weekday()) % 7
+        prefetch = datetime.datetime.combine(now.date() + datetime.timedelta(days=days_ahead), self.prefetch_time)
+        if prefetch <= now:
+            prefetch += WEEK
+        return prefetch
+
+    def next_refresh(self, now: datetime.datetime) -> datetime.datetime:
+        for days_ahead in range(8):
+            date = now.date() + datetime.timedelta(days=days_ahead)
+            first_lesson = self._first_lessons.get(date, self.default_day_start)
+            refresh = datetime.datetime.combine(date, first_lesson) - self.refresh_before
+            if refresh > now:
+                return refresh
+        return now + WEEK
+
+    async def _run(self) -> None:
+        while True:
+            now = moscow_now()
+            self._first_lessons = {date: time for date, time in self._first_lessons.items() if date >= now.date()}
+            next_prefetch, next_refresh = self.next_prefetch(now), self.next_refresh(now)
+
+            await asyncio.sleep((min(next_prefetch, next_refresh) - now).total_seconds())
+
+            if next_prefetch <= next_refresh:
+                log.debug('Prefetching next week schedules')
+                await self.prefetch_next_week()
+            else:
+                log.debug('Refreshing today schedules')
+                await self.refresh_today()
+
+    async def _get_schedule(self,
+                            kind: str,
+                            owner_id: int,
+                            date: datetime.date,
+                            refresh: bool = False) -> Optional[types.Schedule]:
+        method = getattr(self.api.methods, f'GET_{kind.upper()}_SCHEDULE')
+        async with self._semaphore:
+            try:
+                with request_options(priority=Priority.prefetch):
+                    response = await self.api.request(method, refresh=refresh,
+                                                      **{f'{kind}_id': owner_id, 'date': week_start(date)})
+                schedule = self.api.parse(types.Schedule, **response)
+            except (exc.BaseUniScheduleError, ValueError) as e:
+                log.warning('Unable to warm up %s %s schedule for %s: %r', kind, owner_id, date, e)
+                return None
+
+        self._remember_first_lessons(schedule)
+        return schedule
+
+    def _remember_first_lessons(self, schedule: types.Schedule) -> None:
+        for day in schedule.days:
+            if day.lessons:
+                first_lesson = min(lesson.time_start for lesson in day.lessons)
+                self._first_lessons[day.date] = min(first_lesson, self._first_lessons.get(day.date, first_lesson))
@@ -27,9 +27,11 @@ setup(
     author_email='appkiller16@gmail.com',
     packages=['aiospbstu', 'aiospbstu.types', 'aiospbstu.utils'],
     package_data={},
+    python_requires='>=3.10',
     install_requires=[
-        'aiohttp==3.7.4', 'async-timeout==3.0.1', 'attrs==19.1.0',
-        'certifi==2019.3.9', 'chardet==3.0.4', 'idna==2.8', 'multidict==4.5.2',
-        'pydantic==0.30', 'yarl==1.3.0'
+        'aiohappyeyeballs==2.7.1', 'aiohttp==3.14.5', 'aiosignal==1.4.0', 'annotated-types==0.8.0',
+        'attrs==26.1.0', 'certifi==2026.7.22', 'frozenlist==1.8.0', 'idna==3.20', 'multidict==7.1.0',
+        'propcache==0.5.4', 'pydantic==2.14.1', 'pydantic-core==2.50.1', 'typing-extensions==4.16.0',
+        'typing-inspection==0.4.4', 'yarl==1.25.1'
     ],
 )
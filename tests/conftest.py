@@ -0,0 +1,51 @@
+import datetime
+
+import pytest
+
+FACULTY = {'id': 95, 'name': 'Институт компьютерных наук и технологий', 'abbr': 'ИКНТ'}
+BUILDING = {'id': 11, 'name': 'Главный учебный корпус', 'abbr': 'ГУК', 'address': 'Политехническая, 29'}
+TEACHER = {'id': 5000, 'oid': 5000, 'full_name': 'Петров Петр Петрович', 'first_name': 'Петр',
+           'middle_name': 'Петрович', 'last_name': 'Петров', 'grade': 'доцент', 'chair': 'ВШПИ'}
+
+
+def make_group(group_id: int) -> dict:
+    return {'id': group_id, 'name': f'3530901/{group_id:05}', 'level': 2, 'type': 'common', 'kind': 0,
+            'spec': '09.03.01 Информатика и вычислительная техника', 'faculty': dict(FACULTY)}
+
+
+def make_lesson(subject: str, time_start: str, time_end: str, groups_count: int = 1, auditory_id: int = 100) -> dict:
+    return {
+        'subject': subject, 'subject_short': subject[:10], 'type': 0, 'additional_info': '',
+        'time_start': time_start, 'time_end': time_end, 'parity': 0,
+        'typeObj': {'id': 2, 'name': 'Лекции', 'abbr': 'Лек'},
+        'groups': [make_group(group_id) for group_id in range(30000, 30000 + groups_count)],
+        'teachers': [dict(TEACHER)],
+        'auditories': [{'id': auditory_id, 'name': str(auditory_id), 'building': dict(BUILDING)}],
+    }
+
+
+def make_teacher_schedule(week_start: datetime.date = datetime.date(2019, 9, 2),
+                          lessons_per_day: int = 6,
+                          groups_count: int = 40) -> dict:
+    """
+    RUZ response with teacher schedule of week, lectures of teachers have dozens of groups
+    """
+    times = [('08:00', '09:40'), ('10:00', '11:40'), ('12:00', '13:40'),
+             ('14:00', '15:40'), ('16:00', '17:40'), ('18:00', '19:40')]
+    week_end = week_start + datetime.timedelta(days=6)
+    return {
+        'week': {'date_start': week_start.strftime('%Y.%m.%d'), 'date_end': week_end.strftime('%Y.%m.%d'),
+                 'is_odd': week_start.isocalendar()[1] % 2 == 1},
+        'days': [
+            {'weekday': weekday, 'date': (week_start + datetime.timedelta(days=weekday - 1)).isoformat(),
+             'lessons': [make_lesson(f'Дисциплина {weekday}-{number}', *times[number % len(times)], groups_count)
+                         for number in range(lessons_per_day)]}
+            for weekday in range(1, 7)
+        ],
+        'teacher': dict(TEACHER),
+    }
+
+
+@pytest.fixture
+def teacher_schedule() -> dict:
+    return make_teacher_schedule()
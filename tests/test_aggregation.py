@@ -0,0 +1,52 @@
+import datetime
+
+from aiospbstu import types
+from aiospbstu.aggregation import WorkloadAggregator
+
+WEEK = datetime.date(2019, 9, 2)
+
+SPORTS_COMPLEX = {
+    'id': 100,
+    'name': 'Спорткомплекс',
+    'building': {'id': 11, 'name': 'Спортивный комплекс', 'abbr': 'СК', 'address': 'Политехническая, 27'},
+}
+
+
+def _group(group_id: int) -> dict:
+    return {'id': group_id, 'name': f'3530901/8000{group_id}', 'level': 2, 'type': 'common', 'kind': 0,
+            'spec': '09.03.01', 'faculty': {'id': 95, 'name': 'Институт компьютерных наук', 'abbr': 'ИКНТ'}}
+
+
+def _schedule(group_id: int, teacher_id: int) -> types.Schedule:
+    lesson = {
+        'subject': 'Физическая культура', 'subject_short': 'Физ-ра', 'type': 0, 'additional_info': '',
+        'time_start': '10:00', 'time_end': '11:40', 'parity': 0,
+        'typeObj': {'id': 3, 'name': 'Практика', 'abbr': 'Пр'},
+        'groups': [_group(group_id)],
+        'teachers': [{'id': teacher_id, 'oid': teacher_id, 'full_name': 'Петров Петр Петрович',
+                      'first_name': 'Петр', 'middle_name': 'Петрович', 'last_name': 'Петров',
+                      'grade': 'доцент', 'chair': 'ФВиС'}],
+        'auditories': [SPORTS_COMPLEX],
+    }
+    return types.Schedule(
+        week={'date_start': '2019.09.02', 'date_end': '2019.09.08', 'is_odd': True},
+        group=_group(group_id),
+        days=[{'weekday': 1, 'date': WEEK.isoformat(), 'lessons': [lesson]}],
+    )
+
+
+def test_lessons_sharing_room_are_counted_separately():
+    schedules = [_schedule(1, 5000), _schedule(2, 6000)]
+    aggregator = WorkloadAggregator()
+    for schedule in schedules:
+        aggregator.add_schedule(schedule)
+
+    assert len(aggregator.store) == 2
+    assert aggregator.store.query().where(group=2).count() == 1
+    assert aggregator.store.query().where(teacher=6000).count() == 1
+    assert aggregator.teacher_hours(WEEK) == {5000: 100 / 60, 6000: 100 / 60}
+    assert aggregator.group_hours(WEEK) == {1: 100 / 60, 2: 100 / 60}
+
+    # Adding the same week again doesn't change counters
+    aggregator.add_schedule(schedules[0])
+    assert aggregator.teacher_hours(WEEK) == {5000: 100 / 60, 6000: 100 / 60}
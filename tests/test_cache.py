@@ -0,0 +1,196 @@
+import asyncio
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from aiospbstu import exceptions as exc
+from aiospbstu import PolyScheduleAPI
+from aiospbstu.cache import CacheServer, MemoryCache, SharedCache
+from aiospbstu.transport import FakeTransport
+
+
+def _make_api(latency: float = 0.01) -> PolyScheduleAPI:
+    versions = iter(range(1, 100))
+
+    async def handler(url: str) -> dict:
+        return {'id': 95, 'name': f'version {next(versions)}', 'abbr': 'ИКНТ'}
+
+    return PolyScheduleAPI(transport=FakeTransport(handler=handler, latency=latency), cache=MemoryCache())
+
+
+def test_concurrent_requests_are_made_once():
+    async def main():
+        api = _make_api()
+        responses = await asyncio.gather(*(api.request(api.methods.GET_FACULTY, faculty_id=95) for _ in range(5)))
+        await api.close()
+        return responses, api.transport.requests
+
+    responses, requests = asyncio.run(main())
+    assert len(requests) == 1
+    assert all(response == responses[0] for response in responses)
+    # Every caller gets its own response object
+    assert len({id(response) for response in responses}) == 5
+
+
+def test_refresh_does_not_join_cached_request():
+    async def main():
+        api = _make_api()
+        method = api.methods.GET_FACULTY
+        await api.request(method, faculty_id=95)
+        cached, refreshed = await asyncio.gather(api.request(method, faculty_id=95),
+                                                 api.request(method, faculty_id=95, refresh=True))
+        after = await api.request(method, faculty_id=95)
+        await api.close()
+        return cached, refreshed, after
+
+    cached, refreshed, after = asyncio.run(main())
+    assert cached['name'] == 'version 1'
+    assert refreshed['name'] == after['name'] == 'version 2'
+
+
+def test_request_joins_pending_refresh():
+    async def main():
+        api = _make_api()
+        method = api.methods.GET_FACULTY
+        await api.request(method, faculty_id=95)
+        refreshed, joined = await asyncio.gather(api.request(method, faculty_id=95, refresh=True),
+                                                 api.request(method, faculty_id=95))
+        await api.close()
+        return refreshed, joined, api.transport.requests
+
+    refreshed, joined, requests = asyncio.run(main())
+    assert refreshed['name'] == joined['name'] == 'version 2'
+    assert len(requests) == 2
+
+
+def _schedule_api(response: dict) -> PolyScheduleAPI:
+    async def handler(url: str) -> dict:
+        return response
+
+    # Every body is decoded and checked in parse_executor
+    return PolyScheduleAPI(transport=FakeTransport(handler=handler), cache=MemoryCache(),
+                           parse_executor=ThreadPoolExecutor(1), parse_threshold=0)
+
+
+def test_large_error_body_is_not_cached():
+    async def main():
+        api = _schedule_api({'text': 'Группа не найдена', 'error': True})
+        for _ in range(2):
+            with pytest.raises(exc.GroupNotFoundByIDError):
+                await api.get_group_schedule(1, datetime.date(2019, 9, 2))
+        await api.close()
+        return api.transport.requests, len(api.cache)
+
+    requests, cached = asyncio.run(main())
+    assert len(requests) == 2
+    assert cached == 0
+
+
+def test_large_body_is_cached_once_checked():
+    async def main():
+        api = _schedule_api({'week': {'date_start': '2019.09.02', 'date_end': '2019.09.08', 'is_odd': True},
+                             'days': []})
+        for _ in range(2):
+            await api.get_group_schedule(1, datetime.date(2019, 9, 2))
+        await api.close()
+        return api.transport.requests
+
+    assert len(asyncio.run(main())) == 1
+
+
+def test_memory_cache_expires_values():
+    async def main():
+        cache = MemoryCache()
+        await cache.set('fresh', 'value', ttl=60)
+        await cache.set('expired', 'value', ttl=-1)
+        return await cache.get('fresh'), await cache.get('expired'), len(cache)
+
+    assert asyncio.run(main()) == ('value', None, 1)
+
+
+def test_memory_cache_purges_values_that_are_never_read():
+    async def main():
+        cache = MemoryCache()
+        for week in range(1000):
+            await cache.set(f'week {week}', 'value', ttl=-1)
+        await cache.set('current week', 'value', ttl=60)
+        return len(cache)
+
+    assert asyncio.run(main()) <= 2
+
+
+def test_memory_cache_evicts_the_oldest_values():
+    async def main():
+        cache = MemoryCache(max_size=2)
+        for key in 'abc':
+            await cache.set(key, key, ttl=60)
+        return [await cache.get(key) for key in 'abc']
+
+    assert asyncio.run(main()) == [None, 'b', 'c']
+
+
+def _with_server(tmp_path, test):
+    async def main():
+        server = CacheServer(str(tmp_path / 'cache.sock'))
+        await server.start()
+        clients = [SharedCache(server.path), SharedCache(server.path)]
+        try:
+            return await test(*clients)
+        finally:
+            for client in clients:
+                await client.close()
+            await server.close()
+
+    return asyncio.run(main())
+
+
+def test_shared_cache_stores_large_values(tmp_path):
+    value = 'расписание' * 100_000
+
+    async def test(first: SharedCache, second: SharedCache):
+        await first.set('key', value, ttl=60)
+        return await second.get('key'), await second.get('missing')
+
+    assert _with_server(tmp_path, test) == (value, None)
+
+
+def test_shared_cache_lock_is_exclusive(tmp_path):
+    async def test(first: SharedCache, second: SharedCache):
+        assert await first.lock('key', timeout=10) == (None, True)
+        waiting = asyncio.ensure_future(second.lock('key', timeout=10))
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        await first.set('key', 'value', ttl=60)
+        return await waiting
+
+    # The second worker gets value stored by the first one instead of lock
+    assert _with_server(tmp_path, test) == ('value', False)
+
+
+def test_shared_cache_lock_is_passed_on_release(tmp_path):
+    async def test(first: SharedCache, second: SharedCache):
+        await first.lock('key', timeout=10)
+        waiting = asyncio.ensure_future(second.lock('key', timeout=10))
+        await asyncio.sleep(0.05)
+        await first.release('key')
+        return await waiting
+
+    assert _with_server(tmp_path, test) == (None, True)
+
+
+def test_shared_cache_lock_expires(tmp_path):
+    async def test(first: SharedCache, second: SharedCache):
+        await first.lock('key', timeout=0.05)
+        return await asyncio.wait_for(second.lock('key', timeout=10), 1)
+
+    assert _with_server(tmp_path, test) == (None, True)
+
+
+def test_unavailable_shared_cache_misses(tmp_path):
+    async def main():
+        cache = SharedCache(str(tmp_path / 'missing.sock'))
+        await cache.set('key', 'value', ttl=60)
+        return await cache.get('key'), await cache.lock('key', timeout=10)
+
+    assert asyncio.run(main()) == (None, (None, True))
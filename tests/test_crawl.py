@@ -0,0 +1,117 @@
+import asyncio
+import datetime
+
+import pytest
+
+from aiospbstu import PolyScheduleAPI
+from aiospbstu.crawl import DONE, FAILED, LEASED, PENDING, CrawlQueue, crawl, shard_of
+from aiospbstu.transport import FakeTransport
+from aiospbstu.utils import json
+from aiospbstu.utils.rate_limit import RateLimiter
+
+WEEKS = [datetime.date(2019, 9, 2), datetime.date(2019, 9, 9)]
+SCHEDULE = {'week': {'date_start': '2019.09.02', 'date_end': '2019.09.08', 'is_odd': True}, 'days': []}
+
+
+@pytest.fixture
+def queue(tmp_path):
+    with CrawlQueue(str(tmp_path / 'crawl.sqlite'), shards=4, lease_seconds=60, max_attempts=2) as queue:
+        yield queue
+
+
+def test_enqueue_normalizes_weeks_and_ignores_duplicates(queue):
+    assert queue.enqueue([('group', 1), ('teacher', 2)], WEEKS + [datetime.date(2019, 9, 4)]) == 4
+    assert queue.enqueue([('group', 1)], WEEKS) == 0
+    assert queue.stats()[PENDING] == 4
+
+
+def test_shards_are_stored_with_queue(queue):
+    with pytest.raises(ValueError):
+        CrawlQueue(queue.path, shards=8)
+    with CrawlQueue(queue.path) as reopened:
+        assert reopened.shards == 4
+
+
+def test_lease_takes_only_requested_shards(queue):
+    owners = [('group', owner_id) for owner_id in range(20)]
+    queue.enqueue(owners, WEEKS)
+    jobs = queue.lease('worker', count=100, shards=[1])
+
+    assert jobs and all(job.shard == 1 for job in jobs)
+    assert all(job.shard == shard_of(job.kind, job.owner_id, job.week, 4) for job in jobs)
+    assert queue.unfinished(shards=[1]) == len(jobs)
+    assert queue.lease('other', count=100, shards=[1]) == []
+
+
+def test_complete_stores_result(queue):
+    queue.enqueue([('group', 1)], WEEKS[:1])
+    job, = queue.lease('worker', count=1)
+    queue.complete(job, '{"body": true}')
+
+    assert queue.stats()[DONE] == 1
+    assert list(queue.results()) == [(('group', 1, WEEKS[0]), '{"body": true}')]
+
+
+def test_failed_job_is_retried_until_max_attempts(queue):
+    queue.enqueue([('group', 1)], WEEKS[:1])
+    job, = queue.lease('worker', count=1)
+    queue.fail(job, 'worker', ValueError('first'))
+    # Retry is delayed
+    assert queue.lease('worker', count=1) == []
+
+    queue._connection.execute('UPDATE jobs SET available_at = 0')
+    job, = queue.lease('worker', count=1)
+    assert job.attempts == 1
+    queue.fail(job, 'worker', ValueError('second'))
+
+    (failed_job, error), = queue.failed()
+    assert failed_job.attempts == 2 and 'second' in error
+    assert queue.retry_failed() == 1
+    assert queue.lease('worker', count=1)[0].attempts == 0
+
+
+def test_failure_of_another_workers_lease_is_ignored(queue):
+    queue.enqueue([('group', 1)], WEEKS[:1])
+    job, = queue.lease('worker', count=1)
+    queue.fail(job, 'other', ValueError())
+    assert queue.stats()[LEASED] == 1
+
+
+def test_expired_lease_counts_as_attempt(queue):
+    queue.enqueue([('group', 1)], WEEKS[:1])
+    queue.lease_seconds = -1
+
+    job, = queue.lease('crashed', count=1)
+    assert job.attempts == 0
+    job, = queue.lease('worker', count=1)
+    assert job.attempts == 1
+    # Second expiration reaches max_attempts
+    assert queue.lease('worker', count=1) == []
+    (_, error), = queue.failed()
+    assert error == 'Lease expired'
+
+
+def test_crawl_stores_responses_and_records_failures(tmp_path):
+    queue = CrawlQueue(str(tmp_path / 'crawl.sqlite'), max_attempts=1)
+    queue.enqueue([('group', 1), ('group', 2)], WEEKS)
+    previous_rate_limiter = RateLimiter(1000)
+
+    async def handler(url: str):
+        # Group 2 is not found
+        return SCHEDULE if '/scheduler/1?' in url else None
+
+    async def main():
+        api = PolyScheduleAPI(transport=FakeTransport(handler=handler))
+        api.rate_limiter = previous_rate_limiter
+        stats = await crawl(api, queue, worker='worker', rate_limit=1000, poll_interval=0.01)
+        await api.close()
+        return api, stats
+
+    api, stats = asyncio.run(main())
+    assert api.rate_limiter is previous_rate_limiter
+    assert stats['store'] == 2
+    # Failures are recorded before crawl returns
+    assert queue.stats() == {PENDING: 0, LEASED: 0, DONE: 2, FAILED: 2}
+    assert {job.owner_id for job, _ in queue.failed()} == {2}
+    assert [body for _, body in queue.results()] == [json.dumps(SCHEDULE)] * 2
+    queue.close()
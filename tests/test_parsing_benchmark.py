@@ -0,0 +1,71 @@
+"""
+Parsing time of schedules, before and after models were ported to pydantic v2
+
+"Before" can't be measured in this environment, since pydantic 0.30 doesn't install on Python 3.9+,
+so it's kept as reference: time of Schedule(**json.loads(body)) minus json.loads(body) for the same payloads
+with compiled pydantic 0.30 on Python 3.7, best of 5 runs of 300 iterations.
+"""
+
+import copy
+import json
+import timeit
+
+from aiospbstu import types
+
+BEFORE_US = {
+    'group week': 698,
+    'teacher week': 6732,
+}
+
+FACULTY = {'id': 95, 'name': 'Институт компьютерных наук', 'abbr': 'ИКНТ'}
+GROUP = {'id': 29486, 'name': '3530901/80001', 'level': 2, 'type': 'common', 'kind': 0, 'spec': '09.03.01',
+         'faculty': FACULTY}
+TEACHER = {'id': 5, 'oid': 55, 'full_name': 'Иванов Иван Иванович', 'first_name': 'Иван',
+           'middle_name': 'Иванович', 'last_name': 'Иванов', 'grade': 'доцент', 'chair': 'ВТ'}
+BUILDING = {'id': 11, 'name': 'Главный учебный корпус', 'abbr': 'ГЗ', 'address': 'Политехническая, 29'}
+
+
+def _lesson(subject: str, time_start: str, time_end: str, type_id: int, type_name: str,
+            teachers, auditory: dict, groups: list) -> dict:
+    return {'subject': subject, 'subject_short': subject[:5], 'type': 0, 'additional_info': '',
+            'time_start': time_start, 'time_end': time_end, 'parity': 0,
+            'typeObj': {'id': type_id, 'name': type_name, 'abbr': type_name[:3]},
+            'groups': groups, 'teachers': teachers, 'auditories': [auditory]}
+
+
+def _week(lecture_groups: int, lab_groups: int) -> dict:
+    groups = [dict(GROUP, id=GROUP['id'] + number) for number in range(max(lecture_groups, lab_groups))]
+    days = [
+        {'weekday': weekday, 'date': date, 'lessons': [
+            _lesson('Математика', '10:00', '11:40', 2, 'Лекции', [TEACHER],
+                    {'id': 100, 'name': '101', 'building': BUILDING}, groups[:lecture_groups]),
+            _lesson('Физика', '12:00', '13:40', 1, 'Лабораторные', None,
+                    {'id': 101, 'name': '102', 'building': BUILDING}, groups[:lab_groups]),
+        ]}
+        for weekday, date in ((1, '2019-09-02'), (3, '2019-09-04'))
+    ]
+    return {'week': {'date_start': '2019.09.02', 'date_end': '2019.09.08', 'is_odd': True}, 'days': days}
+
+
+PAYLOADS = {
+    'group week': dict(_week(lecture_groups=2, lab_groups=1), group=GROUP),
+    'teacher week': dict(_week(lecture_groups=40, lab_groups=40), teacher=TEACHER),
+}
+
+
+def _parse_time_us(body: str, number: int = 100) -> float:
+    parse = min(timeit.repeat(lambda: types.Schedule(**json.loads(body)), number=number, repeat=5)) / number
+    decode = min(timeit.repeat(lambda: json.loads(body), number=number, repeat=5)) / number
+    return (parse - decode) * 1e6
+
+
+def test_payloads_are_parsed():
+    for payload in PAYLOADS.values():
+        schedule = types.Schedule(**copy.deepcopy(payload))
+        assert [len(day.lessons) for day in schedule.days] == [2, 2]
+
+
+def test_parsing_is_faster_than_before_port():
+    after = {name: _parse_time_us(json.dumps(payload)) for name, payload in PAYLOADS.items()}
+    for name, before in BEFORE_US.items():
+        assert after[name] < before, f'{name}: {after[name]:.0f} us, {before} us before port to pydantic v2'
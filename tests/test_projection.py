@@ -0,0 +1,102 @@
+import copy
+import datetime
+import time
+import tracemalloc
+
+import pydantic
+import pytest
+
+from aiospbstu import types
+from aiospbstu.projection import normalize_projection, parse_projected
+
+SUBJECTS_AND_TIMES = ['week', 'days.date', 'days.lessons.subject', 'days.lessons.time_start',
+                      'days.lessons.time_end']
+
+
+def test_projected_fields_equal_full_parsing(teacher_schedule):
+    full = types.Schedule(**copy.deepcopy(teacher_schedule))
+    projected = parse_projected(types.Schedule, teacher_schedule, SUBJECTS_AND_TIMES + ['days.lessons.auditories'])
+
+    assert projected.week == full.week
+    assert [day.date for day in projected.days] == [day.date for day in full.days]
+    for projected_day, full_day in zip(projected.days, full.days):
+        for projected_lesson, full_lesson in zip(projected_day.lessons, full_day.lessons):
+            assert projected_lesson.subject == full_lesson.subject
+            assert projected_lesson.time_start == full_lesson.time_start
+            assert projected_lesson.auditories == full_lesson.auditories
+
+
+def test_fields_outside_of_projection_are_not_set(teacher_schedule):
+    schedule = parse_projected(types.Schedule, teacher_schedule, SUBJECTS_AND_TIMES)
+    lesson = schedule.days[0].lessons[0]
+    with pytest.raises(AttributeError):
+        lesson.groups
+    with pytest.raises(AttributeError):
+        schedule.teacher
+
+
+def test_missing_required_field_raises_validation_error(teacher_schedule):
+    del teacher_schedule['days'][0]['lessons'][0]['time_end']
+    with pytest.raises(pydantic.ValidationError):
+        parse_projected(types.Schedule, teacher_schedule, SUBJECTS_AND_TIMES)
+
+
+def test_invalid_field_raises_validation_error(teacher_schedule):
+    teacher_schedule['days'][0]['lessons'][0]['time_start'] = 'noon'
+    with pytest.raises(pydantic.ValidationError):
+        parse_projected(types.Schedule, teacher_schedule, SUBJECTS_AND_TIMES)
+
+
+def test_before_validators_run(teacher_schedule):
+    lessons = teacher_schedule['days'][0]['lessons']
+    # Lesson of the same subject, time and type in another auditory is merged by Day validator
+    duplicate = copy.deepcopy(lessons[0])
+    duplicate['auditories'][0].update(id=200, name='200')
+    lessons.insert(1, duplicate)
+
+    schedule = parse_projected(types.Schedule, teacher_schedule,
+                               ['week.date_start', 'days.weekday', 'days.lessons.subject', 'days.lessons.auditories'])
+    # Week dates are converted from "2019.09.02"
+    assert schedule.week.date_start == datetime.date(2019, 9, 2)
+    assert schedule.days[0].weekday == types.Weekday.monday
+    assert len(schedule.days[0].lessons) == 6
+    assert [auditory.auditory_id for auditory in schedule.days[0].lessons[0].auditories] == [100, 200]
+
+
+def test_unknown_field_is_rejected():
+    with pytest.raises(ValueError):
+        normalize_projection(types.Schedule, ['days.lessons.room'])
+    with pytest.raises(ValueError):
+        normalize_projection(types.Schedule, ['days.date.year'])
+
+
+def _measure(parse, data: dict, runs: int = 5):
+    """
+    Best time and peak memory of parsing, copies of data are made before measuring
+    """
+    copies = [copy.deepcopy(data) for _ in range(runs)]
+    best = float('inf')
+    for item in copies[1:]:
+        started = time.perf_counter()
+        parse(item)
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        parsed = parse(copies[0])
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del parsed
+    return best, peak
+
+
+def test_projection_saves_time_and_memory(teacher_schedule):
+    full_time, full_memory = _measure(lambda data: types.Schedule(**data), teacher_schedule)
+    projected_time, projected_memory = _measure(
+        lambda data: parse_projected(types.Schedule, data, SUBJECTS_AND_TIMES), teacher_schedule
+    )
+
+    # Lectures with 40 groups each: groups and faculties are most of the work
+    assert projected_time < full_time / 2
+    assert projected_memory < full_memory / 2
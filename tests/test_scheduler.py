@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+
+from aiospbstu import PolyScheduleAPI, exceptions as exc
+from aiospbstu.scheduler import Priority, RequestScheduler, request_options
+from aiospbstu.transport import FakeTransport
+
+FACULTY = {'id': 95, 'name': 'Институт компьютерных наук', 'abbr': 'ИКНТ'}
+
+
+def _make_api(concurrency: int = 1, latency: float = 0.05) -> PolyScheduleAPI:
+    async def handler(url: str) -> dict:
+        return FACULTY
+
+    return PolyScheduleAPI(transport=FakeTransport(handler=handler, latency=latency),
+                           scheduler=RequestScheduler(concurrency=concurrency))
+
+
+async def _get_faculty(api: PolyScheduleAPI, faculty_id, priority=None, timeout=None) -> dict:
+    with request_options(priority=priority, timeout=timeout):
+        return await api.request(api.methods.GET_FACULTY, faculty_id=faculty_id)
+
+
+def test_higher_priority_is_served_first():
+    async def main():
+        api = _make_api()
+        bulk = [asyncio.ensure_future(_get_faculty(api, f'b{i}', Priority.bulk)) for i in range(10)]
+        await asyncio.sleep(0.01)
+        started = time.monotonic()
+        await _get_faculty(api, 'interactive')
+        waited = time.monotonic() - started
+        await asyncio.gather(*bulk)
+        await api.close()
+        return waited, api.scheduler
+
+    waited, scheduler = asyncio.run(main())
+    assert waited < 0.2
+    assert scheduler.dispatched == {Priority.interactive: 1, Priority.prefetch: 0, Priority.bulk: 10}
+
+
+def test_queued_request_exceeds_deadline():
+    async def main():
+        api = _make_api()
+        bulk = [asyncio.ensure_future(_get_faculty(api, f'b{i}', Priority.bulk)) for i in range(5)]
+        await asyncio.sleep(0.01)
+        with pytest.raises(exc.RequestDeadlineExceeded):
+            await _get_faculty(api, 'interactive', Priority.bulk, timeout=0.02)
+        await asyncio.gather(*bulk)
+        await api.close()
+        return api.scheduler
+
+    scheduler = asyncio.run(main())
+    assert scheduler.expired[Priority.bulk] == 1
+    assert scheduler.depths == dict.fromkeys(Priority, 0) and scheduler.in_flight == 0
+
+
+def test_joined_request_gets_priority_of_caller():
+    async def main():
+        api = _make_api()
+        bulk = [asyncio.ensure_future(_get_faculty(api, f'b{i}', Priority.bulk)) for i in range(20)]
+        await asyncio.sleep(0.01)
+        # The last bulk request is joined by interactive caller with deadline
+        started = time.monotonic()
+        await _get_faculty(api, 'b19', timeout=0.3)
+        waited = time.monotonic() - started
+        await asyncio.gather(*bulk)
+        await api.close()
+        return waited
+
+    assert asyncio.run(main()) < 0.3
+
+
+def test_deadline_of_caller_applies_to_its_wait_only():
+    async def main():
+        api = _make_api()
+        bulk = [asyncio.ensure_future(_get_faculty(api, f'b{i}', Priority.bulk)) for i in range(5)]
+        await asyncio.sleep(0.01)
+        hurried = asyncio.ensure_future(_get_faculty(api, 'shared', Priority.bulk, timeout=0.01))
+        patient = asyncio.ensure_future(_get_faculty(api, 'shared', Priority.bulk))
+        with pytest.raises(exc.RequestDeadlineExceeded):
+            await hurried
+        response = await patient
+        await asyncio.gather(*bulk)
+        await api.close()
+        return response
+
+    assert asyncio.run(main()) == FACULTY
+
+
+def test_request_is_dropped_when_all_callers_exceed_deadline():
+    async def main():
+        api = _make_api()
+        bulk = [asyncio.ensure_future(_get_faculty(api, f'b{i}', Priority.bulk)) for i in range(5)]
+        await asyncio.sleep(0.01)
+        callers = [_get_faculty(api, 'dropped', Priority.bulk, timeout=0.01) for _ in range(2)]
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.gather(*bulk)
+        await api.close()
+        return results, api.transport.requests
+
+    results, requests = asyncio.run(main())
+    assert all(isinstance(result, exc.RequestDeadlineExceeded) for result in results)
+    assert not any(url.endswith('/dropped') for url in requests)
@@ -0,0 +1,91 @@
+import copy
+import datetime
+
+import pytest
+
+from aiospbstu import exceptions as exc, types
+from aiospbstu.snapshot import OwnerKind, Snapshot, SnapshotWriter
+from conftest import make_group, make_lesson, make_teacher_schedule
+
+WEEKS = [datetime.date(2019, 9, 2), datetime.date(2019, 9, 9)]
+
+
+def _group_schedule(week_start: datetime.date) -> dict:
+    schedule = make_teacher_schedule(week_start, lessons_per_day=2, groups_count=3)
+    del schedule['teacher']
+    # Lesson without teachers and type in another auditory
+    lesson = make_lesson('Физическая культура', '18:00', '19:40', auditory_id=101)
+    lesson.update(teachers=None, typeObj=None)
+    schedule['days'][0]['lessons'].append(lesson)
+    return dict(schedule, group=make_group(30000))
+
+
+@pytest.fixture
+def schedules() -> dict:
+    raw = {(OwnerKind.teacher, 5000, week): make_teacher_schedule(week, groups_count=3) for week in WEEKS}
+    raw.update({(OwnerKind.group, 30000, week): _group_schedule(week) for week in WEEKS})
+    return raw
+
+
+@pytest.fixture
+def snapshot(tmp_path, schedules):
+    writer = SnapshotWriter()
+    for raw in schedules.values():
+        writer.add_schedule(types.Schedule(**copy.deepcopy(raw)))
+    writer.write(str(tmp_path / 'schedules.snapshot'))
+
+    with Snapshot(str(tmp_path / 'schedules.snapshot')) as snapshot:
+        yield snapshot
+
+
+def test_schedules_round_trip(snapshot, schedules):
+    assert len(snapshot) == 4
+    for (kind, owner_id, week), raw in schedules.items():
+        assert snapshot.get_schedule(kind, owner_id, week) == types.Schedule(**copy.deepcopy(raw))
+        # Any date of week finds it
+        assert snapshot.get_schedule(kind, owner_id, week + datetime.timedelta(days=6)).week.date_start == week
+
+
+def test_owners_and_weeks_are_listed(snapshot):
+    assert snapshot.owners(OwnerKind.group) == [30000]
+    assert snapshot.owners(OwnerKind.teacher) == [5000]
+    assert snapshot.weeks(OwnerKind.teacher, 5000) == WEEKS
+    assert set(snapshot) == {(kind, owner_id, week) for kind, owner_id in ((OwnerKind.group, 30000),
+                                                                           (OwnerKind.teacher, 5000))
+                             for week in WEEKS}
+
+
+@pytest.mark.parametrize('kind, owner_id, date', [
+    (OwnerKind.group, 30001, WEEKS[0]),
+    (OwnerKind.auditory, 30000, WEEKS[0]),
+    (OwnerKind.group, 30000, datetime.date(2019, 8, 26)),
+    (OwnerKind.group, 30000, datetime.date(2019, 9, 16)),
+])
+def test_missing_schedule_raises(snapshot, kind, owner_id, date):
+    with pytest.raises(exc.ScheduleNotFoundInSnapshot):
+        snapshot.get_raw_schedule(kind, owner_id, date)
+
+
+def test_entities_are_looked_up_by_id(snapshot, schedules):
+    raw = schedules[OwnerKind.group, 30000, WEEKS[0]]
+    assert snapshot.get_group(30002) == types.Group(**make_group(30002))
+    assert snapshot.get_teacher(5000) == types.Teacher(**raw['days'][0]['lessons'][0]['teachers'][0])
+    assert snapshot.get_auditory(101) == types.Auditory(**raw['days'][0]['lessons'][-1]['auditories'][0])
+    assert snapshot.get_faculty(95).abbr == 'ИКНТ'
+    assert snapshot.get_building(11).address == 'Политехническая, 29'
+    assert snapshot.get_group(29999) is None
+    assert snapshot.get_teacher(5001) is None
+
+
+def test_schedule_without_owner_is_rejected(schedules):
+    raw = copy.deepcopy(schedules[OwnerKind.group, 30000, WEEKS[0]])
+    del raw['group']
+    with pytest.raises(ValueError):
+        SnapshotWriter().add_schedule(types.Schedule(**raw))
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / 'other.snapshot'
+    path.write_bytes(b'\0' * 128)
+    with pytest.raises(exc.SnapshotError):
+        Snapshot(str(path))
@@ -0,0 +1,63 @@
+import asyncio
+import datetime
+import time
+
+from aiospbstu import PolyScheduleAPI
+from aiospbstu.base import _pack_cached, _unpack_cached
+from aiospbstu.cache import MemoryCache
+from aiospbstu.transport import FakeTransport
+
+WEEK = datetime.date(2019, 9, 2)
+
+
+def _make_api(**kwargs) -> PolyScheduleAPI:
+    async def handler(url: str) -> dict:
+        return {'week': {'date_start': '2019.09.02', 'date_end': '2019.09.08', 'is_odd': True}, 'days': []}
+
+    return PolyScheduleAPI(transport=FakeTransport(handler=handler), **kwargs)
+
+
+def test_fresh_schedule_is_reused():
+    async def main():
+        api = _make_api(cache_ttl=100, stale_grace=60)
+        first = await api.get_group_schedule(1, WEEK)
+        second = await api.get_group_schedule(1, WEEK)
+        await api.close()
+        return first, second, api.transport.requests
+
+    first, second, requests = asyncio.run(main())
+    assert first is second
+    assert len(requests) == 1
+
+
+def test_schedule_older_than_max_staleness_is_not_returned():
+    async def main():
+        api = _make_api(cache_ttl=100, stale_grace=60, max_staleness=10)
+        first = await api.get_group_schedule(1, WEEK)
+        first._set_fetched_at(time.time() - 20)
+        second = await api.get_group_schedule(1, WEEK)
+        await api.close()
+        return first, second, api.transport.requests
+
+    first, second, requests = asyncio.run(main())
+    assert second is not first and second.age < 10
+    assert len(requests) == 2
+
+
+def test_cached_response_older_than_max_staleness_is_refreshed():
+    async def main():
+        cache = MemoryCache()
+        api = _make_api(cache=cache, cache_ttl=100, stale_grace=60, max_staleness=10)
+        await api.get_group_schedule(1, WEEK)
+        # Response was fetched long ago by another worker sharing the cache
+        api._schedules.clear()
+        for key in list(cache._storage):
+            body, _ = _unpack_cached(await cache.get(key))
+            await cache.set(key, _pack_cached(body, time.time() - 20), ttl=100)
+        schedule = await api.get_group_schedule(1, WEEK)
+        await api.close()
+        return schedule, api.transport.requests
+
+    schedule, requests = asyncio.run(main())
+    assert schedule.age < 10
+    assert len(requests) == 2
@@ -0,0 +1,52 @@
+import json
+import subprocess
+import sys
+
+# Modules of models and HTTP client, creating api must not import them
+HEAVY_MODULES = ('aiohttp', 'aiospbstu.transport', 'aiospbstu.types.schedule', 'aiospbstu.types.faculty',
+                 'aiospbstu.types.group', 'aiospbstu.types.lesson', 'aiospbstu.warmup')
+
+
+def _run(code: str) -> dict:
+    """
+    Run code in a fresh interpreter, so modules imported by other tests don't count
+    """
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def test_api_construction_loads_no_models_and_no_http_client():
+    loaded = _run(
+        'import json, sys\n'
+        'import aiospbstu\n'
+        'api = aiospbstu.PolyScheduleAPI()\n'
+        f'print(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))\n'
+    )
+    assert loaded == []
+
+
+def test_models_are_loaded_on_first_access():
+    loaded = _run(
+        'import json, sys\n'
+        'import aiospbstu\n'
+        'aiospbstu.types.Group\n'
+        'print(json.dumps(sorted(name for name in sys.modules if name.startswith("aiospbstu.types."))))\n'
+    )
+    assert 'aiospbstu.types.group' in loaded
+    assert 'aiospbstu.types.schedule' not in loaded
+
+
+def _measure(code: str, runs: int = 3) -> float:
+    """
+    Best time of code in fresh interpreters, so the comparison doesn't depend on a single slow start
+    """
+    return min(float(subprocess.run([sys.executable, '-c', 'import time; started = time.perf_counter(); '
+                                     + code + '; print(time.perf_counter() - started)'],
+                                    check=True, capture_output=True, text=True).stdout)
+               for _ in range(runs))
+
+
+def test_startup_is_faster_than_loading_everything():
+    lazy = _measure('import aiospbstu; aiospbstu.PolyScheduleAPI()')
+    full = _measure('import aiospbstu, aiospbstu.transport, aiospbstu.types.schedule; aiospbstu.PolyScheduleAPI()')
+    assert lazy < full
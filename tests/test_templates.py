@@ -0,0 +1,96 @@
+import copy
+import datetime
+import json
+
+import pytest
+
+from aiospbstu import types
+from aiospbstu.templates import ScheduleTemplates
+from conftest import make_lesson, make_teacher_schedule
+
+MONDAYS = [datetime.date(2019, 9, 2) + datetime.timedelta(weeks=number) for number in range(8)]
+
+
+def _week(start: datetime.date) -> dict:
+    return make_teacher_schedule(start, lessons_per_day=2, groups_count=1)
+
+
+def _changed_week(start: datetime.date) -> dict:
+    """
+    Week with the first Monday lesson cancelled and an extra lesson on Saturday
+    """
+    response = _week(start)
+    del response['days'][0]['lessons'][0]
+    response['days'][5]['lessons'].append(make_lesson('Консультация', '18:00', '19:40'))
+    return response
+
+
+@pytest.fixture
+def templates() -> ScheduleTemplates:
+    templates = ScheduleTemplates(stable_weeks=2)
+    for start in MONDAYS[:4]:
+        templates.add('teacher', 5000, _week(start))
+    return templates
+
+
+def test_repeated_weeks_are_stored_as_empty_deltas(templates):
+    assert templates.weeks('teacher', 5000) == MONDAYS[:4]
+    assert all(templates.get_delta('teacher', 5000, start).is_empty for start in MONDAYS[:4])
+    assert templates.stats() == {'lessons': 4 * 12, 'stored': 2 * 12}
+
+
+def test_delta_has_only_changed_lessons(templates):
+    delta = templates.add('teacher', 5000, _changed_week(MONDAYS[4]))
+
+    assert delta.removed == {1: [0]}
+    assert [lesson['subject'] for lesson in delta.added[6]] == ['Консультация']
+    assert delta.size == 2
+
+
+@pytest.mark.parametrize('start', MONDAYS[:5])
+def test_stored_weeks_are_expanded_to_responses(templates, start):
+    templates.add('teacher', 5000, _changed_week(MONDAYS[4]))
+    expected = _changed_week(start) if start == MONDAYS[4] else _week(start)
+
+    assert templates.expand('teacher', 5000, start + datetime.timedelta(days=3)) == expected
+    assert templates.get_schedule('teacher', 5000, start) == types.Schedule(**copy.deepcopy(expected))
+
+
+def test_template_follows_the_majority_of_weeks(templates):
+    for start in MONDAYS[4:]:
+        templates.add('teacher', 5000, _changed_week(start))
+    # Half of the weeks of each parity has the extra lesson, so it's added to templates,
+    # and the cancelled lesson is kept in them
+    first = templates.get_delta('teacher', 5000, MONDAYS[0])
+    assert first.removed == {6: [2]} and not first.added
+    assert templates.expand('teacher', 5000, MONDAYS[0]) == _week(MONDAYS[0])
+
+
+def test_predictable_owner_expands_next_weeks(templates):
+    assert templates.is_predictable('teacher', 5000)
+    predicted = templates.expand('teacher', 5000, MONDAYS[5])
+    assert predicted == _week(MONDAYS[5])
+    assert templates.expand('teacher', 5000, MONDAYS[5], predict=False) is None
+
+    templates.add('teacher', 5000, _changed_week(MONDAYS[4]))
+    assert not templates.is_predictable('teacher', 5000)
+
+
+def test_unknown_owner_is_rejected(templates):
+    assert ('group', 5000) not in templates
+    assert not templates.is_predictable('group', 5000)
+    with pytest.raises(KeyError):
+        templates.expand('group', 5000, MONDAYS[0])
+
+
+def test_templates_round_trip_through_json(templates):
+    templates.add('teacher', 5000, _changed_week(MONDAYS[4]))
+    restored = ScheduleTemplates.from_dict(json.loads(json.dumps(templates.to_dict(), ensure_ascii=False)))
+
+    assert restored.to_dict() == templates.to_dict()
+    for start in MONDAYS:
+        assert restored.expand('teacher', 5000, start) == templates.expand('teacher', 5000, start)
+    # Counts are restored, so new weeks update templates the same way
+    for other in (templates, restored):
+        other.add('teacher', 5000, _changed_week(MONDAYS[5]))
+    assert restored.to_dict() == templates.to_dict()
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from aiospbstu import PolyScheduleAPI, exceptions as exc
+from aiospbstu.transport import AiohttpTransport, CassetteTransport, FakeTransport
+
+FACULTY_URL = PolyScheduleAPI.API_URL + '/faculties/95'
+FACULTY = {'id': 95, 'name': 'Институт компьютерных наук', 'abbr': 'ИКНТ'}
+
+
+def test_cassette_is_created_outside_of_loop(tmp_path):
+    cassette = CassetteTransport(str(tmp_path / 'ruz.cassette'), mode='record')
+    assert cassette._transport is None
+
+    async def main():
+        transport = cassette.transport
+        await cassette.close()
+        return transport
+
+    assert isinstance(asyncio.run(main()), AiohttpTransport)
+
+
+def test_cassette_records_and_replays(tmp_path):
+    path = str(tmp_path / 'ruz.cassette')
+
+    async def record():
+        api = PolyScheduleAPI(transport=CassetteTransport(path, 'record', FakeTransport({FACULTY_URL: FACULTY})))
+        response = await api.request(api.methods.GET_FACULTY, faculty_id=95)
+        await api.close()
+        return response
+
+    async def replay():
+        api = PolyScheduleAPI(transport=CassetteTransport(path))
+        response = await api.request(api.methods.GET_FACULTY, faculty_id=95)
+        with pytest.raises(exc.NetworkError):
+            await api.request(api.methods.GET_FACULTY, faculty_id=96)
+        await api.close()
+        return response
+
+    assert asyncio.run(record()) == FACULTY
+    assert asyncio.run(replay()) == FACULTY
+
+
+def test_cassette_auto_mode_appends_unknown_urls(tmp_path):
+    path = str(tmp_path / 'ruz.cassette')
+    responses = {FACULTY_URL: FACULTY, PolyScheduleAPI.API_URL + '/faculties/96': dict(FACULTY, id=96)}
+
+    async def auto(faculty_id):
+        fake = FakeTransport(responses)
+        cassette = CassetteTransport(path, 'auto', fake)
+        await cassette.get(PolyScheduleAPI.API_URL + f'/faculties/{faculty_id}')
+        await cassette.close()
+        return fake.requests
+
+    assert len(asyncio.run(auto(95))) == 1
+    assert len(asyncio.run(auto(95))) == 0
+    assert len(asyncio.run(auto(96))) == 1
+    with open(path, encoding='utf-8') as file:
+        assert len(file.readlines()) == 2